@@ -274,6 +274,47 @@ class TestS3EventHandling:
 		assert s3_objects[1]['bucket'] == 'test-source-bucket'
 		assert s3_objects[1]['key'] == 'test/object2.txt'
 
+	def test_extract_s3_event_info_eventbridge(self):
+		"""Test extracting S3 event information from an EventBridge event."""
+		# Given: An S3 Object Created event delivered by EventBridge
+		eventbridge_event = {
+			'Body': json.dumps(
+				{
+					'source': 'aws.s3',
+					'detail-type': 'Object Created',
+					'detail': {
+						'bucket': {'name': 'test-source-bucket'},
+						'object': {'key': 'test/my+object.txt', 'size': 1024},
+					},
+				}
+			)
+		}
+
+		# When: We extract the S3 object information
+		s3_objects = extract_s3_event_info(eventbridge_event)
+
+		# Then: We should get the bucket and the decoded key
+		assert s3_objects == [{'bucket': 'test-source-bucket', 'key': 'test/my object.txt'}]
+
+	def test_extract_s3_event_info_eventbridge_other_event(self):
+		"""Test ignoring EventBridge S3 events other than Object Created."""
+		# Given: An S3 Object Deleted event delivered by EventBridge
+		eventbridge_event = {
+			'Body': json.dumps(
+				{
+					'source': 'aws.s3',
+					'detail-type': 'Object Deleted',
+					'detail': {'bucket': {'name': 'test-source-bucket'}, 'object': {'key': 'test/object.txt'}},
+				}
+			)
+		}
+
+		# When: We extract the S3 object information
+		s3_objects = extract_s3_event_info(eventbridge_event)
+
+		# Then: No object should be returned
+		assert s3_objects == []
+
 	def test_extract_s3_event_info_invalid_json(self):
 		"""Test handling invalid JSON in event message."""
 		# Given: A message with invalid JSON
@@ -150,6 +150,8 @@ def extract_s3_event_info(message: Dict) -> List[Dict]:
 	"""
 	Extract S3 event information from an SQS message.
 
+	Handles both S3 event notifications and S3 Object Created events delivered by EventBridge.
+
 	Args:
 	    message: SQS message dictionary
 
@@ -158,6 +160,18 @@ def extract_s3_event_info(message: Dict) -> List[Dict]:
 	"""
 	try:
 		body = json.loads(message.get('Body', '{}'))
+
+		# S3 events routed through EventBridge carry a single object in their detail
+		if body.get('source') == 'aws.s3':
+			if body.get('detail-type') != 'Object Created':
+				return []
+			detail = body.get('detail', {})
+			bucket = detail.get('bucket', {}).get('name')
+			key = detail.get('object', {}).get('key')
+			if bucket and key:
+				return [{'bucket': bucket, 'key': unquote_plus(key)}]
+			return []
+
 		records = body.get('Records', [])
 
 		s3_objects = []
@@ -14,8 +14,10 @@ Environment Variables:
 import logging
 import os
 import signal
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Tuple
 
 import traceback
@@ -23,22 +25,28 @@ from pythonjsonlogger import jsonlogger
 
 # Import utility modules
 from utils.aws_utils import (
+	enqueue_sqs_delete,
 	delete_sqs_messages_batch,
 	extract_s3_event_info,
 	get_s3_object,
 	get_sqs_messages,
+	change_sqs_message_visibility_batch,
 	is_s3_test_event,
 	upload_to_s3,
 	delete_s3_object,
+	format_tagging,
 	get_env_var,
 	get_current_region,
+	sqs_delete_batcher,
 )
+from utils.batching import AdaptiveBatcher
 from utils.decompression import (
 	cleanup_temp_directory,
 	create_temp_directory,
+	calculate_archive_buffer_sizes,
 	decompress_and_extract,
+	open_archive,
 	stream_extract_file,
-	get_tar_members,
 )
 from utils.manifest import (
 	read_manifest_from_file,
@@ -58,13 +66,21 @@ logHandler.setFormatter(formatter)
 logger.addHandler(logHandler)
 
 # Constants
-MAX_MESSAGES_PER_BATCH = 1
-MAX_WORKERS = max(1, os.cpu_count() or 4)
+MAX_MESSAGES_PER_BATCH = 10
+MAX_WORKERS = min(16, 4 * (os.cpu_count() or 1))  # Uploads are IO-bound, so oversubscribe the CPUs
 POLL_INTERVAL = 20  # seconds
+BATCHING_WINDOW = 5  # seconds to keep receiving to fill a batch
+VISIBILITY_TIMEOUT = 300  # seconds
 
 # Global variables
 running = True
 
+# Batch size grows with queue backlog and shrinks before batches approach the visibility timeout
+batcher = AdaptiveBatcher(max_size=MAX_MESSAGES_PER_BATCH, latency_budget=VISIBILITY_TIMEOUT / 2)
+
+# Shared thread pool for uploading extracted objects while the next ones are extracted
+upload_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='s3-upload')
+
 
 def signal_handler(sig, frame):
 	"""
@@ -134,8 +150,8 @@ def upload_object_to_targets(object_info: Dict) -> bool:
 			logger.error(f'Object file not found: {local_path}')
 			return False
 
-		# Prepare tags
-		tags = prepare_object_tags(object_info)
+		# Prepare tags once per object, formatted for the upload request
+		tags = format_tagging(prepare_object_tags(object_info))
 
 		# Get targets
 		targets = object_info.get('targets', [])
@@ -244,6 +260,218 @@ def upload_object_to_targets(object_info: Dict) -> bool:
 		return False
 
 
+def upload_and_remove(object_info: Dict, upload_slots: threading.BoundedSemaphore) -> bool:
+	"""
+	Upload an extracted object to its targets and delete the extracted file.
+
+	Runs on the upload thread pool. The upload slot taken before the object was
+	extracted is released once the extracted file has been removed.
+
+	Args:
+	    object_info: Dictionary with object information, including local_path
+	    upload_slots: Semaphore bounding the number of extracted files on disk
+
+	Returns:
+	    True if successful, False otherwise
+	"""
+	extracted_path = object_info['local_path']
+	try:
+		upload_success = upload_object_to_targets(object_info)
+		logger.debug(f'Upload result for {object_info["object_name"]}: {upload_success}')
+		return upload_success
+	finally:
+		# Delete the extracted file to free up space immediately
+		try:
+			if os.path.exists(extracted_path):
+				os.remove(extracted_path)
+				logger.debug(f'Removed extracted file after upload: {extracted_path}')
+		except Exception as e:
+			logger.error(f'Error removing extracted file {extracted_path}: {e}')
+		upload_slots.release()
+
+
+def process_archive(s3_object: Dict, temp_dir: str) -> bool:
+	"""
+	Download a compressed archive, extract its objects and upload them to their targets.
+
+	Args:
+	    s3_object: Dictionary with bucket and key information of the archive
+	    temp_dir: Temporary directory for downloaded and extracted files
+
+	Returns:
+	    True if all objects of the archive were uploaded, False otherwise
+	"""
+	# Download the compressed object
+	success, local_path, s3_source_info = process_s3_object(s3_object, temp_dir)
+	if not success:
+		logger.error(f'Failed to download object: {s3_object}')
+		return False
+
+	logger.debug(f'Decompressing archive: {local_path}')
+	# Decompress and extract the archive
+	success, extract_dir, compressed_size, decompressed_size, tar_members = decompress_and_extract(
+		local_path, temp_dir
+	)
+	if not success:
+		logger.error(f'Failed to decompress and extract archive: {local_path}')
+		return False
+
+	logger.debug(f'Archive ready for streaming extraction at: {extract_dir}')
+
+	# Read the manifest file - with our new approach, this should already be extracted
+	manifest_path = os.path.join(extract_dir, 'manifest.json')
+	if not os.path.exists(manifest_path):
+		logger.error(f'Manifest file not found: {manifest_path}')
+		return False
+
+	logger.debug(f'Reading manifest file: {manifest_path}')
+	manifest = read_manifest_from_file(manifest_path)
+	if not manifest:
+		logger.error('Failed to read manifest file')
+		return False
+
+	try:
+		# Log manifest structure for debugging
+		logger.debug(
+			f'Manifest structure: objects={len(manifest.get("objects", []))}, has_targets={("targets" in manifest)}'
+		)
+	except Exception as e:
+		logger.error(f'Error logging manifest structure: {e}')
+
+	# Objects indexed while scanning the TAR for the manifest (not extracted yet)
+	tar_members.pop('manifest.json', None)
+	object_members = tar_members.values()
+	logger.debug(f'Found {len(object_members)} object files in TAR archive')
+
+	# Get mapping of object paths from manifest (but without the actual extracted files)
+	logger.debug('Getting object information from manifest')
+	object_infos = get_object_paths_from_manifest(manifest, extract_dir)
+	if not object_infos:
+		logger.error('No valid objects found in manifest')
+		return False
+
+	logger.info(f'Found {len(object_infos)} objects in manifest')
+
+	# Create a dictionary mapping relative keys to their info for quick lookup
+	object_map = {}
+	for obj_info in object_infos:
+		# Use relative_key as the primary lookup key
+		relative_key = obj_info.get('relative_key', '')
+		if relative_key:
+			object_map[relative_key] = obj_info
+
+	# Extract objects one at a time and upload them concurrently
+	logger.info(f'Starting streaming extraction and upload of {len(object_members)} objects')
+	upload_results = []
+	upload_futures = []
+
+	# At most MAX_WORKERS extracted files are on disk at any time
+	upload_slots = threading.BoundedSemaphore(MAX_WORKERS)
+
+	try:
+		# For each object, in archive order so this second pass decompresses the stream once, we'll:
+		# 1. Wait for a free upload slot
+		# 2. Extract that object from the compressed archive
+		# 3. Hand it to the upload pool, which deletes the extracted file once uploaded
+		read_size, write_size = calculate_archive_buffer_sizes(compressed_size, decompressed_size)
+		with open_archive(local_path, read_size) as archive:
+			for member in object_members:
+				member_name = member.name
+
+				# Get the relative key by removing the 'objects/' prefix
+				relative_key = (
+					member_name.replace('objects/', '', 1)
+					if member_name.startswith('objects/')
+					else member_name
+				)
+
+				# Skip if we can't find this object in the manifest
+				if relative_key not in object_map:
+					logger.warning(
+						f'Object with path {relative_key} found in TAR but not in manifest, skipping'
+					)
+					continue
+
+				logger.debug(f'Streaming extraction of {member_name}')
+
+				# Extract just this one file from the archive
+				upload_slots.acquire()
+				extraction_success = stream_extract_file(archive, member, extract_dir, write_size)
+				if not extraction_success:
+					upload_slots.release()
+					logger.error(f'Failed to extract {member_name} from TAR')
+					upload_results.append(False)
+					continue
+
+				# Get the object info using the relative key
+				object_info = object_map[relative_key]
+
+				# Set the local path (which now exists from the extraction)
+				extracted_path = os.path.join(extract_dir, member_name)
+				object_info['local_path'] = extracted_path
+
+				# Upload this object in the background while the next one is extracted
+				logger.debug(f'Uploading extracted object: {object_info["object_name"]}')
+				upload_futures.append(upload_executor.submit(upload_and_remove, object_info, upload_slots))
+
+	except Exception as e:
+		logger.exception(f'Exception in streaming extraction process: {e}')
+
+	# Wait for in-flight uploads before the archive and temporary directory are cleaned up
+	for future in upload_futures:
+		try:
+			upload_results.append(future.result())
+		except Exception as e:
+			logger.exception(f'Exception during object upload: {e}')
+			upload_results.append(False)
+
+	# Clean up the compressed archive as well since we're done with it
+	try:
+		if os.path.exists(local_path):
+			os.remove(local_path)
+			logger.debug(f'Removed compressed archive after processing: {local_path}')
+	except Exception as e:
+		logger.error(f'Error removing compressed archive {local_path}: {e}')
+
+	# Check if all uploads were successful
+	successes = upload_results.count(True)
+	failures = upload_results.count(False)
+	logger.info(f'Upload results: {successes} successes, {failures} failures out of {len(upload_results)}')
+
+	if failures == 0 and len(upload_results) > 0:
+		logger.info(f'Successfully processed {len(object_infos)} objects')
+
+		# Report metrics
+		try:
+			# Use the first target bucket for metrics
+			first_object = object_infos[0]
+			first_target = first_object.get('targets', [{}])[0]
+			target_bucket = first_target.get('bucket', 'unknown')
+
+			logger.debug(f'Reporting metrics to bucket: {target_bucket}')
+			report_decompression_metrics(target_bucket, compressed_size, decompressed_size)
+		except Exception as e:
+			logger.exception(f'Error reporting metrics: {e}')
+
+		# Delete the compressed object from the staging bucket
+		try:
+			if delete_s3_object(s3_source_info['bucket'], s3_source_info['key']):
+				logger.debug(
+					f'Deleted compressed object from staging bucket: {s3_source_info["bucket"]}/{s3_source_info["key"]}'
+				)
+			else:
+				logger.warning(
+					f'Failed to delete compressed object from staging bucket: {s3_source_info["bucket"]}/{s3_source_info["key"]}'
+				)
+		except Exception as e:
+			logger.exception(f'Error deleting compressed object: {e}')
+
+		return True
+	else:
+		logger.warning(f'Some objects failed to upload: {failures} failures out of {len(upload_results)}')
+		return False
+
+
 @track_processing_time
 def process_message_batch(queue_url: str) -> int:
 	"""
@@ -258,16 +486,21 @@ def process_message_batch(queue_url: str) -> int:
 	try:
 		logger.info('Starting to process message batch')
 
-		# Retrieve messages from SQS
+		# Retrieve messages from SQS; their visibility timeout starts with the receive
+		visibility_deadline = time.monotonic() + VISIBILITY_TIMEOUT
 		messages = get_sqs_messages(
 			queue_url=queue_url,
-			max_messages=MAX_MESSAGES_PER_BATCH,
+			max_messages=batcher.batch_size,
+			visibility_timeout=VISIBILITY_TIMEOUT,
+			batching_window=BATCHING_WINDOW,
 		)
 
 		if not messages:
 			return 0
 
-		logger.info(f'Retrieved {len(messages)} messages from SQS')
+		logger.info(f'Retrieved {len(messages)} messages from SQS (batch size {batcher.batch_size})')
+		received_count = len(messages)
+		start_processing_time = time.monotonic()
 
 		# Process test events first
 		test_event_receipt_handles = []
@@ -280,11 +513,11 @@ def process_message_batch(queue_url: str) -> int:
 			else:
 				regular_messages.append(message)
 
-		# Delete test events immediately
+		# Queue test event deletes; they are sent in the background, batched with other deletes
 		if test_event_receipt_handles:
 			logger.debug(f'Deleting {len(test_event_receipt_handles)} S3 test event messages')
-			delete_sqs_messages_batch(queue_url, test_event_receipt_handles)
-			logger.debug(f'Successfully deleted {len(test_event_receipt_handles)} test event messages')
+			for receipt_handle in test_event_receipt_handles:
+				enqueue_sqs_delete(queue_url, receipt_handle)
 
 		# If all messages were test events, return now
 		if not regular_messages:
@@ -300,200 +533,49 @@ def process_message_batch(queue_url: str) -> int:
 		logger.debug(f'Created temporary directory: {temp_dir}')
 
 		try:
-			# Process each message
-			receipt_handles = []
-			s3_objects = []
-
+			# Group the S3 objects by message, so each message can be deleted once its archives are done
+			message_objects = []
 			for message in messages:
-				receipt_handles.append(message['ReceiptHandle'])
 				extracted_objects = extract_s3_event_info(message)
 				logger.debug(f'Extracted {len(extracted_objects)} S3 objects from message')
-				s3_objects.extend(extracted_objects)
+				message_objects.append((message['ReceiptHandle'], extracted_objects))
 
-			logger.info(f'Total S3 objects to process: {len(s3_objects)}')
+			total_objects = sum(len(extracted_objects) for _, extracted_objects in message_objects)
+			logger.info(f'Total S3 objects to process: {total_objects}')
 
-			if not s3_objects:
+			if not total_objects:
 				logger.warning('No S3 objects found in messages')
-				# delete_sqs_messages_batch(queue_url, receipt_handles)
 				return len(messages)
 
-			# Process each S3 object (compressed archive)
-			for s3_index, s3_object in enumerate(s3_objects, 1):
-				logger.info(
-					f'Processing S3 object {s3_index}/{len(s3_objects)}: {s3_object.get("bucket", "Unknown")}/{s3_object.get("key", "Unknown")}'
-				)
-
-				# Download the compressed object
-				success, local_path, s3_source_info = process_s3_object(s3_object, temp_dir)
-				if not success:
-					logger.error(f'Failed to download object: {s3_object}')
+			s3_index = 0
+			for message_index, (receipt_handle, extracted_objects) in enumerate(message_objects):
+				if not extracted_objects:
+					logger.warning('No S3 objects found in message')
 					continue
 
-				logger.debug(f'Decompressing archive: {local_path}')
-				# Decompress and extract the archive
-				success, extract_dir, compressed_size, decompressed_size = decompress_and_extract(local_path, temp_dir)
-				if not success:
-					logger.error(f'Failed to decompress and extract archive: {local_path}')
-					continue
-
-				# Path to the TAR file
-				tar_path = os.path.join(temp_dir, 'archive.tar')
-				if not os.path.exists(tar_path):
-					logger.error(f'TAR file not found: {tar_path}')
-					continue
-
-				logger.debug(f'Archive ready for streaming extraction at: {extract_dir}')
-
-				# Read the manifest file - with our new approach, this should already be extracted
-				manifest_path = os.path.join(extract_dir, 'manifest.json')
-				if not os.path.exists(manifest_path):
-					logger.error(f'Manifest file not found: {manifest_path}')
-					continue
-
-				logger.debug(f'Reading manifest file: {manifest_path}')
-				manifest = read_manifest_from_file(manifest_path)
-				if not manifest:
-					logger.error('Failed to read manifest file')
-					continue
-
-				try:
-					# Log manifest structure for debugging
-					logger.debug(
-						f'Manifest structure: objects={len(manifest.get("objects", []))}, has_targets={("targets" in manifest)}'
+				# Keep the messages still waiting in this batch from becoming visible to other tasks
+				if time.monotonic() >= visibility_deadline - VISIBILITY_TIMEOUT / 2:
+					pending_handles = [handle for handle, _ in message_objects[message_index:]]
+					logger.debug(f'Extending visibility of {len(pending_handles)} pending SQS messages')
+					visibility_deadline = time.monotonic() + VISIBILITY_TIMEOUT
+					change_sqs_message_visibility_batch(queue_url, pending_handles, VISIBILITY_TIMEOUT)
+
+				# Process each S3 object (compressed archive)
+				for s3_object in extracted_objects:
+					s3_index += 1
+					logger.info(
+						f'Processing S3 object {s3_index}/{total_objects}: {s3_object.get("bucket", "Unknown")}/{s3_object.get("key", "Unknown")}'
 					)
-				except Exception as e:
-					logger.error(f'Error logging manifest structure: {e}')
-
-				# Get list of objects from TAR file (without extracting them yet)
-				tar_members = get_tar_members(tar_path)
-				object_members = [m for m in tar_members if m != 'manifest.json']
-				logger.debug(f'Found {len(object_members)} object files in TAR archive')
-
-				# Get mapping of object paths from manifest (but without the actual extracted files)
-				logger.debug('Getting object information from manifest')
-				object_infos = get_object_paths_from_manifest(manifest, extract_dir)
-				if not object_infos:
-					logger.error('No valid objects found in manifest')
-					continue
+					process_archive(s3_object, temp_dir)
 
-				logger.info(f'Found {len(object_infos)} objects in manifest')
-
-				# Create a dictionary mapping relative keys to their info for quick lookup
-				object_map = {}
-				for obj_info in object_infos:
-					# Use relative_key as the primary lookup key
-					relative_key = obj_info.get('relative_key', '')
-					if relative_key:
-						object_map[relative_key] = obj_info
-
-				# Process each object one at a time with streaming extraction
-				logger.info(f'Starting streaming extraction and upload of {len(object_members)} objects')
-				upload_results = []
-
-				try:
-					# We'll still use ThreadPoolExecutor, but for each object we'll:
-					# 1. Extract that object from the TAR
-					# 2. Upload it
-					# 3. Delete the extracted file before moving to the next one
-					for member_name in object_members:
-						# Get the relative key by removing the 'objects/' prefix
-						relative_key = (
-							member_name.replace('objects/', '', 1)
-							if member_name.startswith('objects/')
-							else member_name
-						)
-
-						# Skip if we can't find this object in the manifest
-						if relative_key not in object_map:
-							logger.warning(
-								f'Object with path {relative_key} found in TAR but not in manifest, skipping'
-							)
-							continue
-
-						logger.debug(f'Streaming extraction of {member_name}')
-
-						# Extract just this one file from the TAR
-						extraction_success = stream_extract_file(tar_path, member_name, extract_dir)
-						if not extraction_success:
-							logger.error(f'Failed to extract {member_name} from TAR')
-							upload_results.append(False)
-							continue
-
-						# Get the object info using the relative key
-						object_info = object_map[relative_key]
-
-						# Set the local path (which now exists from the extraction)
-						extracted_path = os.path.join(extract_dir, member_name)
-						object_info['local_path'] = extracted_path
-
-						# Upload this object
-						logger.debug(f'Uploading extracted object: {object_info["object_name"]}')
-						upload_success = upload_object_to_targets(object_info)
-						upload_results.append(upload_success)
-						logger.debug(f'Upload result for {object_info["object_name"]}: {upload_success}')
-
-						# Delete the extracted file to free up space immediately
-						try:
-							if os.path.exists(extracted_path):
-								os.remove(extracted_path)
-								logger.debug(f'Removed extracted file after upload: {extracted_path}')
-						except Exception as e:
-							logger.error(f'Error removing extracted file {extracted_path}: {e}')
-
-				except Exception as e:
-					logger.exception(f'Exception in streaming extraction process: {e}')
-
-				# Clean up the TAR file as well since we're done with it
+				# Delete this message now rather than at the end of the batch
 				try:
-					if os.path.exists(tar_path):
-						os.remove(tar_path)
-						logger.debug(f'Removed TAR file after processing: {tar_path}')
+					delete_sqs_messages_batch(queue_url, [receipt_handle])
+					logger.debug('Successfully deleted SQS message')
 				except Exception as e:
-					logger.error(f'Error removing TAR file {tar_path}: {e}')
-
-				# Check if all uploads were successful
-				successes = upload_results.count(True)
-				failures = upload_results.count(False)
-				logger.info(f'Upload results: {successes} successes, {failures} failures out of {len(upload_results)}')
-
-				if failures == 0 and len(upload_results) > 0:
-					logger.info(f'Successfully processed {len(object_infos)} objects')
-
-					# Report metrics
-					try:
-						# Use the first target bucket for metrics
-						first_object = object_infos[0]
-						first_target = first_object.get('targets', [{}])[0]
-						target_bucket = first_target.get('bucket', 'unknown')
-
-						logger.debug(f'Reporting metrics to bucket: {target_bucket}')
-						report_decompression_metrics(target_bucket, compressed_size, decompressed_size)
-					except Exception as e:
-						logger.exception(f'Error reporting metrics: {e}')
-
-					# Delete the compressed object from the staging bucket
-					try:
-						if delete_s3_object(s3_source_info['bucket'], s3_source_info['key']):
-							logger.debug(
-								f'Deleted compressed object from staging bucket: {s3_source_info["bucket"]}/{s3_source_info["key"]}'
-							)
-						else:
-							logger.warning(
-								f'Failed to delete compressed object from staging bucket: {s3_source_info["bucket"]}/{s3_source_info["key"]}'
-							)
-					except Exception as e:
-						logger.exception(f'Error deleting compressed object: {e}')
-				else:
-					logger.warning(f'Some objects failed to upload: {failures} failures out of {len(upload_results)}')
-
-			logger.info(f'Finished processing all S3 objects, deleting {len(receipt_handles)} SQS messages')
-			# Delete processed messages
-			try:
-				delete_sqs_messages_batch(queue_url, receipt_handles)
-				logger.debug('Successfully deleted SQS messages')
-			except Exception as e:
-				logger.exception(f'Error deleting SQS messages: {e}')
+					logger.exception(f'Error deleting SQS message: {e}')
 
+			logger.info(f'Finished processing all S3 objects of {len(messages)} SQS messages')
 			return len(messages)
 
 		finally:
@@ -502,6 +584,9 @@ def process_message_batch(queue_url: str) -> int:
 			cleanup_temp_directory(temp_dir)
 			logger.debug('Temporary directory cleaned')
 
+			# Feed the batch outcome back into the adaptive batch size
+			batcher.record(received_count, time.monotonic() - start_processing_time)
+
 	except Exception:
 		logger.exception(f'Unhandled exception in process_message_batch: {traceback.format_exc()}')
 		return 0
@@ -520,14 +605,18 @@ def main():
 
 	logger.info('Starting Target Region Container')
 	logger.info(f'Queue URL: {queue_url}')
-	logger.info(f'MAX_WORKERS: {MAX_WORKERS}, MAX_MESSAGES_PER_BATCH: {MAX_MESSAGES_PER_BATCH}')
+	logger.info(
+		f'MAX_WORKERS: {MAX_WORKERS}, MAX_MESSAGES_PER_BATCH: {MAX_MESSAGES_PER_BATCH}, BATCHING_WINDOW: {BATCHING_WINDOW}s'
+	)
 
 	# Get current region for logging
 	current_region = get_current_region()
 
 	logger.info(f'Starting Target Region Container in region: {current_region}')
 	logger.info(f'Queue URL: {queue_url}')
-	logger.info(f'MAX_WORKERS: {MAX_WORKERS}, MAX_MESSAGES_PER_BATCH: {MAX_MESSAGES_PER_BATCH}')
+	logger.info(
+		f'MAX_WORKERS: {MAX_WORKERS}, MAX_MESSAGES_PER_BATCH: {MAX_MESSAGES_PER_BATCH}, BATCHING_WINDOW: {BATCHING_WINDOW}s'
+	)
 
 	# Main processing loop
 	while running:
@@ -546,6 +635,8 @@ def main():
 			logger.exception(f'Stack trace: {traceback.format_exc()}')
 			time.sleep(POLL_INTERVAL)
 
+	# Send any deletes still queued before exiting
+	sqs_delete_batcher.flush()
 	logger.info('Shutting down')
 
 
@@ -8,10 +8,11 @@ import os
 import json
 import pytest
 import boto3
+import pyzstd
 import tempfile
 import tarfile
-from moto import mock_aws
 from unittest.mock import patch
+from moto import mock_aws
 
 
 @pytest.fixture(scope='function', autouse=True)
@@ -34,6 +35,20 @@ def aws_credentials():
 	os.environ.pop('AWS_DEFAULT_REGION', None)
 
 
+@pytest.fixture(scope='function', autouse=True)
+def processing_time_buffer():
+	"""Isolate each test's processing time metrics so nothing is reported at interpreter exit."""
+	from bin.target_region.utils.metrics import ProcessingTimeBuffer
+
+	# server.py imports the metrics module as utils.metrics, the tests as bin.target_region.utils.metrics
+	buffer = ProcessingTimeBuffer()
+	with (
+		patch('bin.target_region.utils.metrics.processing_time_buffer', buffer),
+		patch('utils.metrics.processing_time_buffer', buffer),
+	):
+		yield buffer
+
+
 @pytest.fixture
 def s3_client():
 	"""Create a boto3 S3 client with moto mock."""
@@ -210,11 +225,10 @@ def create_test_archive(temp_directory, test_manifest_file):
 		tar.add(file1_path, arcname='objects/file1.txt')
 		tar.add(file2_path, arcname='objects/file2.txt')
 
-	# Create a mock compressed archive (we don't actually compress it for tests)
+	# Compress the tar archive with zstd, as the source region does
 	compressed_path = os.path.join(temp_directory, 'archive.tar.zstd')
-	with open(compressed_path, 'wb') as f:
-		with open(tar_path, 'rb') as src:
-			f.write(src.read())
+	with open(tar_path, 'rb') as src, open(compressed_path, 'wb') as f:
+		pyzstd.compress_stream(src, f)
 
 	yield {
 		'tar_path': tar_path,
@@ -236,20 +250,6 @@ def setup_s3_compressed_object(s3_client, staging_bucket, create_test_archive):
 	return {'bucket': staging_bucket, 'key': key, 'local_path': compressed_path}
 
 
-@pytest.fixture
-def mock_decompress_stream():
-	"""Mock the pyzstd decompress_stream function."""
-	with patch('bin.target_region.utils.decompression.pyzstd.decompress_stream') as mock:
-		# Configure the mock to "decompress" by copying input to output
-		def side_effect(input_stream, output_stream, read_size=None, write_size=None):
-			data = input_stream.read()
-			output_stream.write(data)
-			return len(data), len(data)
-
-		mock.side_effect = side_effect
-		yield mock
-
-
 @pytest.fixture
 def setup_environment_variables():
 	"""Setup required environment variables for tests."""
@@ -4,7 +4,10 @@ Unit tests for the aws_utils module in target_region.
 
 import json
 import os
+import threading
 import pytest
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 from botocore.exceptions import ClientError
 
@@ -14,16 +17,24 @@ os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
 # Import the module under test
 from bin.target_region.utils.aws_utils import (
 	get_sqs_messages,
+	change_sqs_message_visibility_batch,
 	delete_sqs_message,
+	enqueue_sqs_delete,
 	delete_sqs_messages_batch,
+	SqsDeleteBatcher,
+	parse_message,
 	is_s3_test_event,
 	extract_s3_event_info,
 	get_s3_object,
 	upload_to_s3,
+	format_tagging,
 	delete_s3_object,
 	put_cloudwatch_metric,
+	MetricBuffer,
 	get_env_var,
 	get_current_region,
+	_resolve_region,
+	ThreadLocalClient,
 )
 
 
@@ -75,6 +86,40 @@ class TestSQSFunctions:
 			# Then: We should get an empty list
 			assert messages == []
 
+	def test_get_sqs_messages_batching_window(self, sqs_queue):
+		"""Test receiving repeatedly within the batching window to fill a batch."""
+		# Given: A mocked SQS client returning messages over several receives
+		first = [{'MessageId': str(i), 'ReceiptHandle': f'rh-{i}'} for i in range(10)]
+		second = [{'MessageId': str(i), 'ReceiptHandle': f'rh-{i}'} for i in range(10, 15)]
+
+		with patch('bin.target_region.utils.aws_utils.sqs_client') as mock_sqs:
+			mock_sqs.receive_message.side_effect = [{'Messages': first}, {'Messages': second}]
+
+			# When: We ask for more messages than a single receive can return
+			messages = get_sqs_messages(sqs_queue, max_messages=15, batching_window=10)
+
+			# Then: The receives should be merged into a single batch
+			assert len(messages) == 15
+			assert mock_sqs.receive_message.call_count == 2
+			second_call = mock_sqs.receive_message.call_args_list[1].kwargs
+			assert second_call['MaxNumberOfMessages'] == 5
+			assert second_call['WaitTimeSeconds'] <= 10
+
+	def test_get_sqs_messages_batching_window_stops_when_drained(self, sqs_queue):
+		"""Test the batching window stops receiving once the queue is drained."""
+		# Given: A mocked SQS client that runs out of messages
+		first = [{'MessageId': '1', 'ReceiptHandle': 'rh-1'}]
+
+		with patch('bin.target_region.utils.aws_utils.sqs_client') as mock_sqs:
+			mock_sqs.receive_message.side_effect = [{'Messages': first}, {}]
+
+			# When: We receive with a batching window
+			messages = get_sqs_messages(sqs_queue, max_messages=10, batching_window=10)
+
+			# Then: We should get the partial batch
+			assert messages == first
+			assert mock_sqs.receive_message.call_count == 2
+
 	def test_get_sqs_messages_error(self):
 		"""Test handling errors when retrieving SQS messages."""
 		# Given: A mocked SQS client and an invalid queue URL
@@ -126,6 +171,113 @@ class TestSQSFunctions:
 			# Then: The function should handle the error and return False
 			assert result is False
 
+	def test_enqueue_sqs_delete(self, sqs_queue):
+		"""Test queueing a message delete on the shared batcher."""
+		# Given: A mocked SQS client, an empty delete batcher and a receipt handle
+		receipt_handle = 'test-receipt-handle'
+
+		with (
+			patch('bin.target_region.utils.aws_utils.sqs_client') as mock_sqs,
+			patch('bin.target_region.utils.aws_utils.sqs_delete_batcher', SqsDeleteBatcher(max_delay=60)) as batcher,
+		):
+			mock_sqs.delete_message_batch.return_value = {'Successful': [{'Id': '0'}], 'Failed': []}
+
+			# When: We queue the delete and flush the batcher
+			result = enqueue_sqs_delete(sqs_queue, receipt_handle)
+			flushed = batcher.flush()
+
+			# Then: The delete should be queued and then sent as a batch
+			assert result is True
+			assert flushed is True
+			mock_sqs.delete_message.assert_not_called()
+			mock_sqs.delete_message_batch.assert_called_once_with(
+				QueueUrl=sqs_queue, Entries=[{'Id': '0', 'ReceiptHandle': receipt_handle}]
+			)
+
+	def test_enqueue_sqs_delete_error(self, sqs_queue):
+		"""Test batch delete errors are reported by the flush."""
+		# Given: A mocked SQS client that raises an exception
+		invalid_receipt_handle = 'invalid-receipt-handle'
+
+		with (
+			patch('bin.target_region.utils.aws_utils.sqs_client') as mock_sqs,
+			patch('bin.target_region.utils.aws_utils.sqs_delete_batcher', SqsDeleteBatcher(max_delay=60)) as batcher,
+		):
+			error = ClientError(
+				error_response={'Error': {'Code': 'InvalidReceiptHandle', 'Message': 'The receipt handle is invalid'}},
+				operation_name='DeleteMessageBatch',
+			)
+			mock_sqs.delete_message_batch = MagicMock(side_effect=error)
+
+			# When: We try to delete a message with an invalid receipt handle
+			enqueue_sqs_delete(sqs_queue, invalid_receipt_handle)
+			result = batcher.flush()
+
+			# Then: The flush should handle the error and return False
+			assert result is False
+
+	def test_delete_sqs_message_flushes_in_background(self, sqs_queue):
+		"""Test queued deletes are flushed in one batch once the batch size is reached."""
+		# Given: A batcher that flushes at 10 deletes and would otherwise wait a minute
+		batcher = SqsDeleteBatcher(max_batch_size=10, max_delay=60)
+		flushed = threading.Event()
+
+		def delete_batch(queue_url, receipt_handles):
+			flushed.set()
+			return [str(i) for i in range(len(receipt_handles))], []
+
+		with patch('bin.target_region.utils.aws_utils.delete_sqs_messages_batch', side_effect=delete_batch) as mock_batch:
+			# When: We queue 10 deletes
+			for i in range(10):
+				assert batcher.add(sqs_queue, f'receipt-handle-{i}') is True
+
+			# Then: The background thread should send them in a single batch
+			assert flushed.wait(timeout=5)
+			mock_batch.assert_called_once_with(sqs_queue, [f'receipt-handle-{i}' for i in range(10)])
+
+	def test_delete_sqs_message_flush_after_executor_shutdown(self, sqs_queue):
+		"""Test flushing more than 10 deletes still works once the delete pool is shut down."""
+		# Given: 25 queued deletes and a delete pool that was shut down, as it is at interpreter exit
+		batcher = SqsDeleteBatcher(max_batch_size=100, max_delay=60)
+		for i in range(25):
+			batcher.add(sqs_queue, f'receipt-handle-{i}')
+
+		executor = ThreadPoolExecutor(max_workers=1)
+		executor.shutdown()
+
+		def delete_batch(QueueUrl, Entries):
+			return {'Successful': [{'Id': entry['Id']} for entry in Entries], 'Failed': []}
+
+		with (
+			patch('bin.target_region.utils.aws_utils.sqs_client') as mock_sqs,
+			patch('bin.target_region.utils.aws_utils.sqs_delete_executor', executor),
+		):
+			mock_sqs.delete_message_batch.side_effect = delete_batch
+
+			# When: We flush the batcher
+			result = batcher.flush()
+
+			# Then: All deletes should be sent inline in chunks of at most 10
+			assert result is True
+			assert [len(call.kwargs['Entries']) for call in mock_sqs.delete_message_batch.call_args_list] == [10, 10, 5]
+
+	def test_change_sqs_message_visibility_batch(self, sqs_queue):
+		"""Test extending the visibility of more than 10 messages splits the calls into chunks."""
+		# Given: More receipt handles than a single ChangeMessageVisibilityBatch call accepts
+		receipt_handles = [f'handle{i}' for i in range(12)]
+
+		with patch('bin.target_region.utils.aws_utils.sqs_client') as mock_sqs:
+			mock_sqs.change_message_visibility_batch.return_value = {'Successful': [], 'Failed': []}
+
+			# When: We extend the visibility of the messages
+			result = change_sqs_message_visibility_batch(sqs_queue, receipt_handles, 300)
+
+			# Then: The entries should be sent in chunks of at most 10 with the new timeout
+			assert result is True
+			calls = mock_sqs.change_message_visibility_batch.call_args_list
+			assert [len(call.kwargs['Entries']) for call in calls] == [10, 2]
+			assert calls[1].kwargs['Entries'][0] == {'Id': '10', 'ReceiptHandle': 'handle10', 'VisibilityTimeout': 300}
+
 	def test_delete_sqs_messages_batch(self, sqs_client, sqs_queue, sample_s3_event):
 		"""Test deleting a batch of messages from SQS queue."""
 		# Given: A queue with messages and receipt handles
@@ -171,6 +323,33 @@ class TestSQSFunctions:
 			assert successful_ids == ['0', '2']
 			assert failed_ids == ['1']
 
+	def test_delete_sqs_messages_batch_chunks_of_ten(self, sqs_client, sqs_queue):
+		"""Test deleting more than 10 messages splits the deletes into API-sized chunks."""
+		# Given: More receipt handles than a single DeleteMessageBatch call accepts
+		receipt_handles = [f'handle{i}' for i in range(25)]
+
+		def delete_batch(QueueUrl, Entries):
+			# Fail the first entry of every chunk, succeed the rest
+			return {
+				'Successful': [{'Id': entry['Id']} for entry in Entries[1:]],
+				'Failed': [{'Id': Entries[0]['Id']}],
+			}
+
+		with patch('bin.target_region.utils.aws_utils.sqs_client.delete_message_batch') as mock_delete_batch:
+			mock_delete_batch.side_effect = delete_batch
+
+			# When: We delete the messages in batch
+			successful_ids, failed_ids = delete_sqs_messages_batch(sqs_queue, receipt_handles)
+
+			# Then: The deletes should be split into chunks of at most 10 entries
+			assert mock_delete_batch.call_count == 3
+			assert sorted(len(call.kwargs['Entries']) for call in mock_delete_batch.call_args_list) == [5, 10, 10]
+
+			# And the results should be aggregated in input order
+			assert failed_ids == ['0', '10', '20']
+			assert len(successful_ids) == 22
+			assert successful_ids == sorted(successful_ids, key=int)
+
 
 class TestS3EventHandling:
 	"""Tests for S3 event handling functions."""
@@ -290,6 +469,21 @@ class TestS3EventHandling:
 		# Then: We should get an empty list due to error handling
 		assert s3_objects == []
 
+	def test_parse_message_parses_body_once(self, sample_s3_event):
+		"""Test the test event check and event extraction share a single JSON parse."""
+		# Given: An S3 event message
+
+		with patch('bin.target_region.utils.aws_utils.json.loads', wraps=json.loads) as mock_loads:
+			# When: We check for a test event and then extract the S3 object information
+			is_test = is_s3_test_event(sample_s3_event)
+			s3_objects = extract_s3_event_info(sample_s3_event)
+
+			# Then: The body should be parsed once and memoized on the message
+			assert is_test is False
+			assert len(s3_objects) == 1
+			mock_loads.assert_called_once()
+			assert parse_message(sample_s3_event) is sample_s3_event['_parsed_body']
+
 
 class TestS3Operations:
 	"""Tests for S3 operations."""
@@ -401,15 +595,32 @@ class TestS3Operations:
 			# When: We upload the file to S3 with tags
 			result = upload_to_s3(local_path, target_bucket, key, tags=tags)
 
-			# Then: The upload should be successful and tags should be applied
+			# Then: The upload should be successful and tags should be sent with the upload
 			assert result is True
 			mock_s3.upload_file.assert_called_once()
-			mock_s3.put_object_tagging.assert_called_once()
-			# Check that put_object_tagging was called with the right parameters
-			call_args = mock_s3.put_object_tagging.call_args
-			assert call_args[1]['Bucket'] == target_bucket
-			assert call_args[1]['Key'] == key
-			assert len(call_args[1]['Tagging']['TagSet']) == 2
+			call_args = mock_s3.upload_file.call_args
+			assert call_args[1]['ExtraArgs']['Tagging'] == 'Purpose=Testing&Environment=Dev'
+			mock_s3.put_object_tagging.assert_not_called()
+
+	def test_upload_to_s3_with_preformatted_tags(self, target_bucket, temp_directory):
+		"""Test uploading a file to S3 with a pre-formatted tagging string."""
+		# Given: A local file to upload and tags already formatted for the upload
+		local_path = os.path.join(temp_directory, 'upload_file.txt')
+		with open(local_path, 'w') as f:
+			f.write('This is a test file for uploading')
+		key = 'uploads/upload_file.txt'
+		tagging = format_tagging({'OriginalCreationTime': '2023-01-01 00:00:00+00:00', 'Team': 'a&b'})
+
+		with patch('bin.target_region.utils.aws_utils.s3_client') as mock_s3:
+			# When: We upload the file to S3 with the tagging string
+			result = upload_to_s3(local_path, target_bucket, key, tags=tagging)
+
+			# Then: The tagging string should be passed through URL-encoded
+			assert result is True
+			call_args = mock_s3.upload_file.call_args
+			assert call_args[1]['ExtraArgs']['Tagging'] == (
+				'OriginalCreationTime=2023-01-01%2000%3A00%3A00%2B00%3A00&Team=a%26b'
+			)
 
 	def test_upload_to_s3_error(self, target_bucket, temp_directory):
 		"""Test handling errors when uploading to S3."""
@@ -471,29 +682,77 @@ class TestCloudWatchMetrics:
 
 	def test_put_cloudwatch_metric(self, cloudwatch_client):
 		"""Test putting a metric data point to CloudWatch."""
-		# Given: CloudWatch metric data
+		# Given: CloudWatch metric data and an empty metric buffer
 		namespace = 'TestNamespace'
 		metric_name = 'TestMetric'
 		value = 123.45
 		unit = 'Count'
 		dimensions = [{'Name': 'TestDimension', 'Value': 'TestValue'}]
 
-		with patch('bin.target_region.utils.aws_utils.cloudwatch_client') as mock_cw:
-			# When: We put a metric data point
+		with (
+			patch('bin.target_region.utils.aws_utils.cloudwatch_client') as mock_cw,
+			patch('bin.target_region.utils.aws_utils.metric_buffer', MetricBuffer()) as buffer,
+		):
+			# When: We put a metric data point and flush the buffer
+			before = datetime.now(timezone.utc)
 			result = put_cloudwatch_metric(namespace, metric_name, value, unit, dimensions)
+			after = datetime.now(timezone.utc)
+
+			# Then: The data point should be buffered until the flush
+			assert result is True
+			mock_cw.put_metric_data.assert_not_called()
+
+			assert buffer.flush() is True
+			mock_cw.put_metric_data.assert_called_once()
+			metric_data = mock_cw.put_metric_data.call_args.kwargs['MetricData']
+			timestamp = metric_data[0].pop('Timestamp')
+			assert mock_cw.put_metric_data.call_args.kwargs['Namespace'] == 'TestNamespace'
+			assert metric_data == [
+				{
+					'MetricName': 'TestMetric',
+					'Value': 123.45,
+					'Unit': 'Count',
+					'Dimensions': [{'Name': 'TestDimension', 'Value': 'TestValue'}],
+				}
+			]
 
-			# Then: The operation should be successful
+			# And the data point should carry the time it was observed
+			assert before <= timestamp <= after
+
+	def test_put_cloudwatch_metric_batches_data_points(self):
+		"""Test buffered data points are sent in a single call when the buffer fills."""
+		# Given: A metric buffer that flushes every 20 data points
+		dimensions = [{'Name': 'TestDimension', 'Value': 'TestValue'}]
+
+		with (
+			patch('bin.target_region.utils.aws_utils.cloudwatch_client') as mock_cw,
+			patch('bin.target_region.utils.aws_utils.metric_buffer', MetricBuffer(max_size=20, max_age=60)),
+		):
+			# When: We put 20 data points
+			results = [put_cloudwatch_metric('TestNamespace', 'TestMetric', i, 'Count', dimensions) for i in range(20)]
+
+			# Then: All data points should be sent in one PutMetricData call
+			assert all(results)
+			mock_cw.put_metric_data.assert_called_once()
+			assert len(mock_cw.put_metric_data.call_args.kwargs['MetricData']) == 20
+
+	def test_put_cloudwatch_metric_flushes_in_background(self):
+		"""Test a partially filled buffer is flushed by the background thread after max_age."""
+		# Given: A metric buffer that flushes every 0.1 seconds
+		buffer = MetricBuffer(max_size=20, max_age=0.1)
+		flushed = threading.Event()
+
+		with patch('bin.target_region.utils.aws_utils.cloudwatch_client') as mock_cw:
+			mock_cw.put_metric_data.side_effect = lambda **kwargs: flushed.set()
+
+			# When: We add a single data point and no more metrics arrive
+			result = buffer.add('TestNamespace', {'MetricName': 'TestMetric', 'Value': 1, 'Unit': 'Count'})
+
+			# Then: The data point should be sent without another add or an explicit flush
 			assert result is True
+			assert flushed.wait(timeout=5)
 			mock_cw.put_metric_data.assert_called_once_with(
-				Namespace='TestNamespace',
-				MetricData=[
-					{
-						'MetricName': 'TestMetric',
-						'Value': 123.45,
-						'Unit': 'Count',
-						'Dimensions': [{'Name': 'TestDimension', 'Value': 'TestValue'}],
-					}
-				],
+				Namespace='TestNamespace', MetricData=[{'MetricName': 'TestMetric', 'Value': 1, 'Unit': 'Count'}]
 			)
 
 	def test_put_cloudwatch_metric_error(self):
@@ -505,7 +764,10 @@ class TestCloudWatchMetrics:
 		unit = 'Count'
 		dimensions = [{'Name': 'TestDimension', 'Value': 'TestValue'}]
 
-		with patch('bin.target_region.utils.aws_utils.cloudwatch_client') as mock_cw:
+		with (
+			patch('bin.target_region.utils.aws_utils.cloudwatch_client') as mock_cw,
+			patch('bin.target_region.utils.aws_utils.metric_buffer', MetricBuffer()) as buffer,
+		):
 			# Configure mock to raise an exception
 			error = ClientError(
 				error_response={'Error': {'Code': 'InternalServiceError', 'Message': 'CloudWatch service error'}},
@@ -513,10 +775,11 @@ class TestCloudWatchMetrics:
 			)
 			mock_cw.put_metric_data.side_effect = error
 
-			# When: We try to put a metric
-			result = put_cloudwatch_metric(namespace, metric_name, value, unit, dimensions)
+			# When: We put a metric and flush the buffer
+			put_cloudwatch_metric(namespace, metric_name, value, unit, dimensions)
+			result = buffer.flush()
 
-			# Then: The function should handle the error and return False
+			# Then: The flush should handle the error and return False
 			assert result is False
 
 
@@ -560,12 +823,12 @@ class TestUtilityFunctions:
 		assert result is None
 
 	def test_get_current_region_from_env(self):
-		"""Test getting the current region from environment variable."""
+		"""Test resolving the current region from environment variable."""
 		# Given: AWS_DEFAULT_REGION is set
 		os.environ['AWS_DEFAULT_REGION'] = 'us-west-2'
 
-		# When: We get the current region
-		region = get_current_region()
+		# When: We resolve the current region
+		region = _resolve_region()
 
 		# Then: We should get the region from the environment variable
 		assert region == 'us-west-2'
@@ -574,19 +837,17 @@ class TestUtilityFunctions:
 		os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
 
 	def test_get_current_region_from_session(self):
-		"""Test getting the current region from boto3 session."""
+		"""Test resolving the current region from the shared boto3 session."""
 		# Given: AWS_DEFAULT_REGION is not set
 		original_region = os.environ.get('AWS_DEFAULT_REGION')
 		os.environ.pop('AWS_DEFAULT_REGION', None)
 
-		# Mock boto3 session region
-		with patch('bin.target_region.utils.aws_utils.boto3.session.Session') as mock_session:
-			mock_session_instance = MagicMock()
-			mock_session_instance.region_name = 'eu-west-1'
-			mock_session.return_value = mock_session_instance
+		# Mock the shared session region
+		with patch('bin.target_region.utils.aws_utils.session') as mock_session:
+			mock_session.region_name = 'eu-west-1'
 
-			# When: We get the current region
-			region = get_current_region()
+			# When: We resolve the current region
+			region = _resolve_region()
 
 			# Then: We should get the region from the boto3 session
 			assert region == 'eu-west-1'
@@ -596,19 +857,17 @@ class TestUtilityFunctions:
 			os.environ['AWS_DEFAULT_REGION'] = original_region
 
 	def test_get_current_region_fallback(self):
-		"""Test getting the current region with fallback to default."""
-		# Given: AWS_DEFAULT_REGION is not set and boto3 session returns None
+		"""Test resolving the current region with fallback to default."""
+		# Given: AWS_DEFAULT_REGION is not set and the session has no region
 		original_region = os.environ.get('AWS_DEFAULT_REGION')
 		os.environ.pop('AWS_DEFAULT_REGION', None)
 
-		# Mock boto3 session region as None
-		with patch('bin.target_region.utils.aws_utils.boto3.session.Session') as mock_session:
-			mock_session_instance = MagicMock()
-			mock_session_instance.region_name = None
-			mock_session.return_value = mock_session_instance
+		# Mock the shared session region as None
+		with patch('bin.target_region.utils.aws_utils.session') as mock_session:
+			mock_session.region_name = None
 
-			# When: We get the current region
-			region = get_current_region()
+			# When: We resolve the current region
+			region = _resolve_region()
 
 			# Then: We should get the default region
 			assert region == 'us-east-1'
@@ -616,3 +875,40 @@ class TestUtilityFunctions:
 		# Restore original region if it existed
 		if original_region is not None:
 			os.environ['AWS_DEFAULT_REGION'] = original_region
+
+	def test_get_current_region_is_cached(self):
+		"""Test the current region is resolved once instead of creating a session per call."""
+		# Given: A cached region
+		with (
+			patch('bin.target_region.utils.aws_utils._CURRENT_REGION', 'ap-southeast-2'),
+			patch('bin.target_region.utils.aws_utils.boto3.session.Session') as mock_session,
+		):
+			# When: We get the current region
+			region = get_current_region()
+
+			# Then: The cached region should be returned without a new session
+			assert region == 'ap-southeast-2'
+			mock_session.assert_not_called()
+
+
+class TestThreadLocalClient:
+	"""Tests for per-thread boto3 clients."""
+
+	def test_client_created_once_per_thread(self):
+		"""Test each thread gets its own client, reused across calls."""
+		# Given: A proxy backed by a mocked shared session
+		with patch('bin.target_region.utils.aws_utils.session') as mock_session:
+			mock_session.client.side_effect = lambda *args, **kwargs: MagicMock()
+			proxy = ThreadLocalClient('s3')
+
+			# When: The proxy is used twice on this thread and once on another thread
+			main_client = proxy._get_client()
+			proxy.head_object(Bucket='bucket', Key='key')
+			with ThreadPoolExecutor(max_workers=1) as executor:
+				worker_client = executor.submit(proxy._get_client).result()
+
+			# Then: One client per thread should have been created
+			assert mock_session.client.call_count == 2
+			assert proxy._get_client() is main_client
+			assert worker_client is not main_client
+			main_client.head_object.assert_called_once_with(Bucket='bucket', Key='key')
@@ -0,0 +1,64 @@
+"""
+Unit tests for the batching module in target_region.
+"""
+
+# Import the module under test
+from bin.target_region.utils.batching import AdaptiveBatcher
+
+
+class TestAdaptiveBatcher:
+	"""Tests for adaptive SQS batch sizing."""
+
+	def test_starts_at_min_size(self):
+		"""Test the batcher starts at the minimum batch size."""
+		# Given/When: A new batcher
+		batcher = AdaptiveBatcher(min_size=1, max_size=10)
+
+		# Then: The batch size should be the minimum
+		assert batcher.batch_size == 1
+
+	def test_grows_when_batches_are_full(self):
+		"""Test the batch size doubles up to the maximum while receives fill the batch."""
+		# Given: A batcher with a short batch size
+		batcher = AdaptiveBatcher(min_size=1, max_size=10, latency_budget=150)
+
+		# When: Every receive fills the whole batch quickly
+		sizes = [batcher.record(batcher.batch_size, 1.0) for _ in range(5)]
+
+		# Then: The batch size should grow and cap at the maximum
+		assert sizes == [2, 4, 8, 10, 10]
+
+	def test_shrinks_under_latency_pressure(self):
+		"""Test the batch size halves when processing exceeds the latency budget."""
+		# Given: A batcher that has grown to the maximum
+		batcher = AdaptiveBatcher(min_size=1, max_size=8, latency_budget=150)
+		batcher.batch_size = 8
+
+		# When: A full batch takes longer than the latency budget
+		size = batcher.record(8, 200.0)
+
+		# Then: The batch size should be halved
+		assert size == 4
+
+	def test_drifts_down_when_batches_are_sparse(self):
+		"""Test the batch size decreases when receives return few messages."""
+		# Given: A batcher with a large batch size
+		batcher = AdaptiveBatcher(min_size=1, max_size=10)
+		batcher.batch_size = 10
+
+		# When: A receive returns a mostly empty batch
+		size = batcher.record(2, 1.0)
+
+		# Then: The batch size should step down by one
+		assert size == 9
+
+	def test_never_below_min_size(self):
+		"""Test the batch size never drops below the minimum."""
+		# Given: A batcher at its minimum size
+		batcher = AdaptiveBatcher(min_size=1, max_size=10, latency_budget=150)
+
+		# When: Processing is slow
+		size = batcher.record(1, 500.0)
+
+		# Then: The batch size should stay at the minimum
+		assert size == 1
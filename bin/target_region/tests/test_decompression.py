@@ -2,21 +2,29 @@
 Unit tests for the decompression module in target_region.
 """
 
+import io
 import os
 import tarfile
 import tempfile
 from unittest.mock import patch, MagicMock
 
+import pyzstd
+
 # Import the module under test
 from bin.target_region.utils.decompression import (
 	get_available_memory,
+	ZSTD_DSTREAM_IN_SIZE,
+	ZSTD_DSTREAM_OUT_SIZE,
 	calculate_buffer_sizes,
+	calculate_archive_buffer_sizes,
+	MAX_STREAM_BLOCKS,
 	create_temp_directory,
 	cleanup_temp_directory,
-	decompress_zstd_file,
-	extract_manifest_only,
+	ArchiveMember,
+	iter_file_members,
+	open_archive,
+	scan_tar_archive,
 	stream_extract_file,
-	get_tar_members,
 	decompress_and_extract,
 )
 
@@ -60,10 +68,68 @@ class TestMemoryManagement:
 		# When: We calculate buffer sizes
 		read_size, write_size = calculate_buffer_sizes(available_memory)
 
-		# Then: We should get the expected proportions
-		assert read_size == int(available_memory * 0.15 * 0.25)  # 15% of memory * 25% for read
-		assert write_size == int(available_memory * 0.15 * 0.75)  # 15% of memory * 75% for write
-		assert read_size + write_size == int(available_memory * 0.15)  # Total is 15% of memory
+		# Then: We should get the expected proportions, aligned down to zstd's streaming sizes
+		assert read_size % ZSTD_DSTREAM_IN_SIZE == 0
+		assert write_size % ZSTD_DSTREAM_OUT_SIZE == 0
+		assert int(available_memory * 0.15 * 0.25) - ZSTD_DSTREAM_IN_SIZE < read_size <= int(available_memory * 0.15 * 0.25)
+		assert int(available_memory * 0.15 * 0.75) - ZSTD_DSTREAM_OUT_SIZE < write_size <= int(available_memory * 0.15 * 0.75)
+
+	def test_calculate_buffer_sizes_low_memory(self):
+		"""Test buffer sizes never drop below one zstd streaming block."""
+		# Given: Very little available memory
+		available_memory = 64 * 1024  # 64 KB
+
+		# When: We calculate buffer sizes
+		read_size, write_size = calculate_buffer_sizes(available_memory)
+
+		# Then: Each buffer should hold at least one zstd streaming block
+		assert read_size == ZSTD_DSTREAM_IN_SIZE
+		assert write_size == ZSTD_DSTREAM_OUT_SIZE
+
+
+	def test_calculate_archive_buffer_sizes_small_archive(self):
+		"""Test a small archive gets single-block buffers instead of the full memory budget."""
+		# Given: An archive smaller than one zstd streaming block
+		compressed_size = 1024
+		decompressed_size = 10 * 1024
+
+		# When: We size the buffers for it
+		read_size, write_size = calculate_archive_buffer_sizes(compressed_size, decompressed_size)
+
+		# Then: Each buffer should be a single streaming block
+		assert read_size == ZSTD_DSTREAM_IN_SIZE
+		assert write_size == ZSTD_DSTREAM_OUT_SIZE
+
+	def test_calculate_archive_buffer_sizes_large_archive(self):
+		"""Test a large archive's buffers are capped at MAX_STREAM_BLOCKS streaming blocks."""
+		# Given: A multi-gigabyte archive and a large memory budget
+		compressed_size = 4 * (1024**3)
+		decompressed_size = 16 * (1024**3)
+
+		with (
+			patch('bin.target_region.utils.decompression.READ_BUFFER_SIZE', 1024**3),
+			patch('bin.target_region.utils.decompression.WRITE_BUFFER_SIZE', 1024**3),
+		):
+			# When: We size the buffers for it
+			read_size, write_size = calculate_archive_buffer_sizes(compressed_size, decompressed_size)
+
+		# Then: The buffers should stop at MAX_STREAM_BLOCKS streaming blocks
+		assert read_size == ZSTD_DSTREAM_IN_SIZE * MAX_STREAM_BLOCKS
+		assert write_size == ZSTD_DSTREAM_OUT_SIZE * MAX_STREAM_BLOCKS
+
+	def test_calculate_archive_buffer_sizes_memory_budget(self):
+		"""Test archive buffers never exceed the memory budget."""
+		# Given: A large archive and a memory budget of two streaming blocks
+		with (
+			patch('bin.target_region.utils.decompression.READ_BUFFER_SIZE', 2 * ZSTD_DSTREAM_IN_SIZE),
+			patch('bin.target_region.utils.decompression.WRITE_BUFFER_SIZE', 2 * ZSTD_DSTREAM_OUT_SIZE),
+		):
+			# When: We size the buffers for it
+			read_size, write_size = calculate_archive_buffer_sizes(1024**3, 4 * 1024**3)
+
+		# Then: The buffers should be limited by the budget
+		assert read_size == 2 * ZSTD_DSTREAM_IN_SIZE
+		assert write_size == 2 * ZSTD_DSTREAM_OUT_SIZE
 
 
 class TestTemporaryDirectories:
@@ -114,94 +180,98 @@ class TestTemporaryDirectories:
 		assert result is False
 
 
-class TestDecompressionFunctions:
-	"""Tests for decompression functions."""
-
-	def test_decompress_zstd_file(self, temp_directory, mock_decompress_stream):
-		"""Test decompressing a zstd file."""
-		# Given: A compressed file
-		input_path = os.path.join(temp_directory, 'test.zstd')
-		output_path = os.path.join(temp_directory, 'test.tar')
-
-		# Create a test compressed file (just a dummy file for testing)
-		with open(input_path, 'wb') as f:
-			f.write(b'compressed content')
-
-		# When: We decompress the file
-		success, compressed_size, decompressed_size = decompress_zstd_file(input_path, output_path)
-
-		# Then: The operation should be successful
-		assert success is True
-		assert compressed_size > 0
-		assert decompressed_size > 0
-		assert os.path.exists(output_path)
-		with open(output_path, 'rb') as f:
-			assert f.read() == b'compressed content'  # Our mock simply copies the content
-
-	def test_decompress_zstd_file_error(self, temp_directory):
-		"""Test handling errors during decompression."""
-		# Given: A non-existent input file
-		input_path = os.path.join(temp_directory, 'nonexistent.zstd')
-		output_path = os.path.join(temp_directory, 'output.tar')
-
-		# When: We try to decompress the non-existent file
-		success, compressed_size, decompressed_size = decompress_zstd_file(input_path, output_path)
-
-		# Then: The function should handle the error and return False
-		assert success is False
-		assert compressed_size == 0
-		assert decompressed_size == 0
-		assert not os.path.exists(output_path)
-
-	def test_decompress_zstd_file_pyzstd_error(self, temp_directory):
-		"""Test handling pyzstd errors during decompression."""
-		# Given: A compressed file but pyzstd raises an error
-		input_path = os.path.join(temp_directory, 'test.zstd')
-		output_path = os.path.join(temp_directory, 'test.tar')
-
-		# Create a test compressed file
-		with open(input_path, 'wb') as f:
-			f.write(b'compressed content')
-
-		# When: We try to decompress with pyzstd raising an error
-		with patch(
-			'bin.target_region.utils.decompression.pyzstd.decompress_stream',
-			side_effect=Exception('Decompression failed'),
-		):
-			success, compressed_size, decompressed_size = decompress_zstd_file(input_path, output_path)
-
-		# Then: The function should handle the error and return False
-		assert success is False
-		assert compressed_size == 0
-		assert decompressed_size == 0
-
-
 class TestTarOperations:
-	"""Tests for TAR archive operations."""
+	"""Tests for streaming TAR archive operations."""
 
-	def test_extract_manifest_only(self, create_test_archive):
-		"""Test extracting just the manifest from a TAR archive."""
-		# Given: A TAR archive with a manifest
-		tar_path = create_test_archive['tar_path']
-		extract_dir = os.path.join(os.path.dirname(tar_path), 'manifest_extraction')
+	def test_scan_tar_archive(self, create_test_archive):
+		"""Test extracting the manifest and indexing members in a single pass."""
+		# Given: A compressed TAR archive with a manifest
+		compressed_path = create_test_archive['compressed_path']
+		extract_dir = os.path.join(os.path.dirname(compressed_path), 'manifest_extraction')
 		os.makedirs(extract_dir, exist_ok=True)
 
-		# When: We extract only the manifest
-		success, manifest_path = extract_manifest_only(tar_path, extract_dir)
+		# When: We scan the archive
+		success, members, compressed_size, decompressed_size = scan_tar_archive(compressed_path, extract_dir)
 
-		# Then: The operation should be successful
+		# Then: The operation should be successful and report both sizes
 		assert success is True
-		assert os.path.exists(manifest_path)
-		assert os.path.basename(manifest_path) == 'manifest.json'
+		assert compressed_size == os.path.getsize(compressed_path)
+		assert decompressed_size == os.path.getsize(create_test_archive['tar_path'])
+
+		# All file members should be indexed
+		names = list(members)
+		assert len(names) == 3
+		assert 'objects/file1.txt' in names
+		assert 'objects/file2.txt' in names
+		assert 'manifest.json' in names
+
+		# Offsets and sizes should point at the member data in the decompressed TAR
+		with tarfile.open(create_test_archive['tar_path'], 'r') as tar:
+			for member in members.values():
+				tar_member = tar.getmember(member.name)
+				assert member.offset == tar_member.offset_data
+				assert member.size == tar_member.size
 
 		# Verify only the manifest was extracted
 		extracted_files = os.listdir(extract_dir)
 		assert len(extracted_files) == 1
 		assert 'manifest.json' in extracted_files
 
-	def test_extract_manifest_only_no_manifest(self, temp_directory):
-		"""Test extracting manifest when it doesn't exist in the archive."""
-		# Given: A TAR archive without a manifest
+	def test_scan_tar_archive_repeated_member(self, temp_directory):
+		"""Test a repeated member name is indexed at its last occurrence, in archive order."""
+		# Given: A compressed TAR archive where an object is stored twice
+		tar_path = os.path.join(temp_directory, 'repeated.tar')
+		with tarfile.open(tar_path, 'w') as tar:
+			for name, content in [
+				('objects/a.txt', b'old'),
+				('objects/b.txt', b'b'),
+				('objects/a.txt', b'new'),
+				('manifest.json', b'{}'),
+			]:
+				info = tarfile.TarInfo(name)
+				info.size = len(content)
+				tar.addfile(info, io.BytesIO(content))
+
+		compressed_path = os.path.join(temp_directory, 'repeated.tar.zstd')
+		with open(tar_path, 'rb') as src, open(compressed_path, 'wb') as f:
+			pyzstd.compress_stream(src, f)
+
+		# When: We scan the archive
+		success, members, _, _ = scan_tar_archive(compressed_path, os.path.join(temp_directory, 'extract'))
+
+		# Then: The later copy should win and the index should follow the archive order
+		assert success is True
+		assert list(members) == ['objects/b.txt', 'objects/a.txt', 'manifest.json']
+		with tarfile.open(tar_path, 'r') as tar:
+			assert members['objects/a.txt'].offset == tar.getmember('objects/a.txt').offset_data
+
+	def test_iter_file_members(self, temp_directory):
+		"""Test only regular file members are yielded, in archive order."""
+		# Given: A TAR archive with directories, a symlink and regular files
+		tar_path = os.path.join(temp_directory, 'mixed.tar')
+		with tarfile.open(tar_path, 'w') as tar:
+			for name, member_type in [
+				('objects', tarfile.DIRTYPE),
+				('objects/a.txt', tarfile.REGTYPE),
+				('objects/link', tarfile.SYMTYPE),
+				('objects/b.txt', tarfile.REGTYPE),
+			]:
+				info = tarfile.TarInfo(name)
+				info.type = member_type
+				if member_type == tarfile.SYMTYPE:
+					info.linkname = 'a.txt'
+				tar.addfile(info, io.BytesIO(b'') if member_type == tarfile.REGTYPE else None)
+
+		# When: We iterate the file members in streaming mode
+		with open(tar_path, 'rb') as f, tarfile.open(fileobj=f, mode='r|') as tar:
+			names = [member.name for member in iter_file_members(tar)]
+
+		# Then: Only the regular files should be yielded
+		assert names == ['objects/a.txt', 'objects/b.txt']
+
+	def test_scan_tar_archive_no_manifest(self, temp_directory):
+		"""Test scanning an archive that doesn't contain a manifest."""
+		# Given: A compressed TAR archive without a manifest
 		tar_path = os.path.join(temp_directory, 'no_manifest.tar')
 		with tarfile.open(tar_path, 'w') as tar:
 			# Add some other file but not manifest.json
@@ -210,134 +280,197 @@ class TestTarOperations:
 				f.write('dummy content')
 			tar.add(dummy_file, arcname='dummy.txt')
 
+		compressed_path = os.path.join(temp_directory, 'no_manifest.tar.zstd')
+		with open(tar_path, 'rb') as src, open(compressed_path, 'wb') as f:
+			pyzstd.compress_stream(src, f)
+
 		extract_dir = os.path.join(temp_directory, 'extract')
 		os.makedirs(extract_dir, exist_ok=True)
 
-		# When: We try to extract the manifest
-		success, manifest_path = extract_manifest_only(tar_path, extract_dir)
+		# When: We scan the archive
+		success, members, compressed_size, decompressed_size = scan_tar_archive(compressed_path, extract_dir)
 
 		# Then: The operation should fail
 		assert success is False
-		assert manifest_path == ''
+		assert members == {}
+		assert compressed_size == 0
+		assert decompressed_size == 0
+
+	def test_scan_tar_archive_invalid_archive(self, temp_directory):
+		"""Test handling a file that is not zstd-compressed."""
+		# Given: An invalid compressed file
+		invalid_archive = os.path.join(temp_directory, 'invalid.tar.zstd')
+		with open(invalid_archive, 'wb') as f:
+			f.write(b'not a zstd file')
+
+		# When: We try to scan it
+		success, members, compressed_size, decompressed_size = scan_tar_archive(invalid_archive, temp_directory)
+
+		# Then: We should get a failure due to error handling
+		assert success is False
+		assert members == {}
+		assert compressed_size == 0
+		assert decompressed_size == 0
 
 	def test_stream_extract_file(self, create_test_archive):
-		"""Test streaming extraction of a single file from TAR."""
-		# Given: A TAR archive with files
-		tar_path = create_test_archive['tar_path']
-		extract_dir = os.path.join(os.path.dirname(tar_path), 'file_extraction')
+		"""Test streaming extraction of a single file from the compressed archive."""
+		# Given: A compressed archive and its member index
+		compressed_path = create_test_archive['compressed_path']
+		extract_dir = os.path.join(os.path.dirname(compressed_path), 'file_extraction')
 		os.makedirs(extract_dir, exist_ok=True)
+		_, members, _, _ = scan_tar_archive(compressed_path, os.path.join(extract_dir, 'manifest'))
+		member = members['objects/file1.txt']
 
 		# When: We extract a specific file
-		success = stream_extract_file(tar_path, 'objects/file1.txt', extract_dir)
+		with open_archive(compressed_path) as archive:
+			success = stream_extract_file(archive, member, extract_dir)
 
 		# Then: The operation should be successful
 		assert success is True
 		extracted_path = os.path.join(extract_dir, 'objects/file1.txt')
-		assert os.path.exists(extracted_path)
+		with open(extracted_path) as f:
+			assert f.read() == 'This is test file 1 content'
 
 		# Check that only one file was extracted
 		assert not os.path.exists(os.path.join(extract_dir, 'objects/file2.txt'))
 		assert not os.path.exists(os.path.join(extract_dir, 'manifest.json'))
 
-	def test_stream_extract_file_nonexistent(self, create_test_archive):
-		"""Test streaming extraction of a file that doesn't exist in the TAR."""
-		# Given: A TAR archive
-		tar_path = create_test_archive['tar_path']
-		extract_dir = os.path.join(os.path.dirname(tar_path), 'file_extraction')
-		os.makedirs(extract_dir, exist_ok=True)
+	def test_stream_extract_file_in_archive_order(self, create_test_archive):
+		"""Test extracting several files from a single open archive."""
+		# Given: A compressed archive and its member index
+		compressed_path = create_test_archive['compressed_path']
+		extract_dir = os.path.join(os.path.dirname(compressed_path), 'file_extraction')
+		_, members, _, _ = scan_tar_archive(compressed_path, os.path.join(extract_dir, 'manifest'))
 
-		# When: We try to extract a non-existent file
-		success = stream_extract_file(tar_path, 'objects/nonexistent.txt', extract_dir)
+		# When: We extract every object member through the same archive stream
+		with open_archive(compressed_path) as archive:
+			results = [stream_extract_file(archive, m, extract_dir) for m in members.values() if m.name != 'manifest.json']
 
-		# Then: The operation should fail
-		assert success is False
-		assert not os.path.exists(os.path.join(extract_dir, 'objects/nonexistent.txt'))
+		# Then: All files should be extracted with their content
+		assert results == [True, True]
+		with open(os.path.join(extract_dir, 'objects/file2.txt')) as f:
+			assert f.read() == 'This is test file 2 content with more data'
 
-	def test_get_tar_members(self, create_test_archive):
-		"""Test getting member list from a TAR archive."""
-		# Given: A TAR archive with files
-		tar_path = create_test_archive['tar_path']
+	def test_stream_extract_file_in_chunks(self, create_test_archive):
+		"""Test extracting a file larger than the write buffer."""
+		# Given: A write buffer smaller than the member
+		compressed_path = create_test_archive['compressed_path']
+		extract_dir = os.path.join(os.path.dirname(compressed_path), 'file_extraction')
+		_, members, _, _ = scan_tar_archive(compressed_path, os.path.join(extract_dir, 'manifest'))
+		member = members['objects/file2.txt']
+
+		# When: We extract the file through several buffer-sized chunks
+		with open_archive(compressed_path) as archive:
+			success = stream_extract_file(archive, member, extract_dir, write_size=8)
 
-		# When: We get the member list
-		members = get_tar_members(tar_path)
+		# Then: The chunks should be written back to back
+		assert success is True
+		with open(os.path.join(extract_dir, 'objects/file2.txt')) as f:
+			assert f.read() == 'This is test file 2 content with more data'
+
+	def test_open_archive_advises_sequential_reads(self, create_test_archive):
+		"""Test the compressed file is opened with sequential read-ahead advice."""
+		# Given: A compressed archive
+		compressed_path = create_test_archive['compressed_path']
 
-		# Then: We should get all the files in the archive
-		assert len(members) == 3
-		assert 'objects/file1.txt' in members
-		assert 'objects/file2.txt' in members
-		assert 'manifest.json' in members
+		with patch('bin.target_region.utils.decompression.os.posix_fadvise', create=True) as mock_fadvise:
+			# When: We open the archive by path
+			with open_archive(compressed_path) as archive:
+				header = archive.read(512)
 
-	def test_get_tar_members_invalid_tar(self, temp_directory):
-		"""Test handling an invalid TAR file."""
-		# Given: An invalid TAR file
-		invalid_tar = os.path.join(temp_directory, 'invalid.tar')
-		with open(invalid_tar, 'wb') as f:
-			f.write(b'not a tar file')
+		# Then: The kernel should be told the file is read sequentially
+		assert len(header) == 512
+		mock_fadvise.assert_called_once()
+		assert mock_fadvise.call_args[0][1:] == (0, 0, os.POSIX_FADV_SEQUENTIAL)
 
-		# When: We try to get member list
-		members = get_tar_members(invalid_tar)
+	def test_stream_extract_file_truncated(self, create_test_archive):
+		"""Test extracting a member that runs past the end of the archive."""
+		# Given: A member entry pointing beyond the end of the archive
+		compressed_path = create_test_archive['compressed_path']
+		extract_dir = os.path.join(os.path.dirname(compressed_path), 'file_extraction')
+		member = ArchiveMember('objects/nonexistent.txt', 10**6, 100)
 
-		# Then: We should get an empty list due to error handling
-		assert members == []
+		# When: We try to extract it
+		with open_archive(compressed_path) as archive:
+			success = stream_extract_file(archive, member, extract_dir)
+
+		# Then: The operation should fail
+		assert success is False
+
+	def test_stream_extract_file_path_traversal(self, create_test_archive):
+		"""Test refusing to extract a member outside of the extraction directory."""
+		# Given: A member whose name escapes the extraction directory
+		compressed_path = create_test_archive['compressed_path']
+		extract_dir = os.path.join(os.path.dirname(compressed_path), 'file_extraction')
+		member = ArchiveMember('../escaped.txt', 0, 10)
+
+		# When: We try to extract it
+		with open_archive(compressed_path) as archive:
+			success = stream_extract_file(archive, member, extract_dir)
+
+		# Then: The operation should fail without writing the file
+		assert success is False
+		assert not os.path.exists(os.path.join(os.path.dirname(compressed_path), 'escaped.txt'))
 
 
 class TestFullDecompression:
 	"""Tests for complete decompression process."""
 
-	def test_decompress_and_extract(self, create_test_archive, mock_decompress_stream):
+	def test_decompress_and_extract(self, create_test_archive):
 		"""Test decompressing and extracting an archive."""
 		# Given: A compressed archive
 		compressed_path = create_test_archive['compressed_path']
-		temp_dir = os.path.dirname(compressed_path)
+		temp_dir = os.path.join(os.path.dirname(compressed_path), 'work')
+		os.makedirs(temp_dir)
 
 		# When: We decompress and extract the archive
-		success, extract_dir, compressed_size, decompressed_size = decompress_and_extract(compressed_path, temp_dir)
+		success, extract_dir, compressed_size, decompressed_size, members = decompress_and_extract(
+			compressed_path, temp_dir
+		)
 
 		# Then: The operation should be successful
 		assert success is True
 		assert os.path.exists(extract_dir)
+		assert compressed_size == os.path.getsize(compressed_path)
+		assert decompressed_size == os.path.getsize(create_test_archive['tar_path'])
+		assert sorted(members) == ['manifest.json', 'objects/file1.txt', 'objects/file2.txt']
 
 		# The manifest should be extracted
 		manifest_path = os.path.join(extract_dir, 'manifest.json')
 		assert os.path.exists(manifest_path)
 
-		# The uncompressed TAR should exist for later streaming extraction
-		tar_path = os.path.join(temp_dir, 'archive.tar')
-		assert os.path.exists(tar_path)
+		# No decompressed TAR should be written to disk
+		assert os.listdir(temp_dir) == ['extracted']
 
 	def test_decompress_and_extract_decompress_failure(self, temp_directory):
 		"""Test handling decompression failure during extract."""
-		# Given: A mock compressed file that will fail decompression
+		# Given: A file that is not valid zstd data
 		compressed_path = os.path.join(temp_directory, 'will_fail.tar.zstd')
 		with open(compressed_path, 'wb') as f:
 			f.write(b'invalid compressed data')
 
-		# When: We try to decompress with a failing mock
-		with patch('bin.target_region.utils.decompression.decompress_zstd_file', return_value=(False, 0, 0)):
-			success, extract_dir, compressed_size, decompressed_size = decompress_and_extract(
-				compressed_path, temp_directory
-			)
+		# When: We try to decompress it
+		success, extract_dir, compressed_size, decompressed_size, members = decompress_and_extract(
+			compressed_path, temp_directory
+		)
 
 		# Then: The operation should fail
 		assert success is False
 		assert extract_dir == ''
 		assert compressed_size == 0
 		assert decompressed_size == 0
+		assert members == {}
 
 	def test_decompress_and_extract_manifest_failure(self, temp_directory):
 		"""Test handling manifest extraction failure."""
-		# Given: A compressed file and a mocked decompression that succeeds but manifest extraction fails
+		# Given: A compressed file and a mocked scan that fails to find the manifest
 		compressed_path = os.path.join(temp_directory, 'test.tar.zstd')
 		with open(compressed_path, 'wb') as f:
 			f.write(b'test content')
 
-		# Mock decompress_zstd_file to succeed but extract_manifest_only to fail
-		with (
-			patch('bin.target_region.utils.decompression.decompress_zstd_file', return_value=(True, 100, 200)),
-			patch('bin.target_region.utils.decompression.extract_manifest_only', return_value=(False, '')),
-		):
+		with patch('bin.target_region.utils.decompression.scan_tar_archive', return_value=(False, {}, 0, 0)):
 			# When: We try to decompress and extract
-			success, extract_dir, compressed_size, decompressed_size = decompress_and_extract(
+			success, extract_dir, compressed_size, decompressed_size, members = decompress_and_extract(
 				compressed_path, temp_directory
 			)
 
@@ -346,3 +479,4 @@ class TestFullDecompression:
 		assert extract_dir == ''
 		assert compressed_size == 0
 		assert decompressed_size == 0
+		assert members == {}
@@ -2,6 +2,7 @@
 Unit tests for the manifest module in target_region.
 """
 
+import json
 import os
 
 # Import the module under test
@@ -53,6 +54,19 @@ class TestManifestReading:
 		# Then: The function should handle the error and return None
 		assert manifest is None
 
+	def test_read_manifest_from_file_non_ascii(self, temp_directory):
+		"""Test reading a manifest with non-ASCII object names."""
+		# Given: A UTF-8 encoded manifest with non-ASCII characters
+		manifest_file = os.path.join(temp_directory, 'manifest.json')
+		with open(manifest_file, 'w', encoding='utf-8') as f:
+			json.dump({'objects': [{'object_name': 'données/résumé.txt'}]}, f, ensure_ascii=False)
+
+		# When: We read the manifest
+		manifest = read_manifest_from_file(manifest_file)
+
+		# Then: The object name should be decoded correctly
+		assert manifest['objects'][0]['object_name'] == 'données/résumé.txt'
+
 
 class TestObjectPathsExtraction:
 	"""Tests for object paths extraction from manifest."""
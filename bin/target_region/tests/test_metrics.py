@@ -11,6 +11,7 @@ from bin.target_region.utils.metrics import (
 	calculate_decompression_ratio,
 	report_decompression_metrics,
 	track_processing_time,
+	ProcessingTimeBuffer,
 )
 
 
@@ -119,67 +120,89 @@ class TestProcessingTimeTracking:
 	def test_track_processing_time(self):
 		"""Test the processing time tracking decorator."""
 		# Given: A function with the decorator
-		mock_metrics = MagicMock()
-
 		@track_processing_time
 		def test_function():
 			time.sleep(0.1)  # Sleep to have measurable time
 			return 'result'
 
-		# Create a patched metric_scope that returns our mock_metrics
-		def patched_metric_scope(f):
-			def wrapper(*args, **kwargs):
-				return f(*args, **kwargs, metrics=mock_metrics)
-
-			return wrapper
-
 		# When: We call the decorated function
-		with patch('bin.target_region.utils.metrics.metric_scope', patched_metric_scope):
+		with patch('bin.target_region.utils.metrics.processing_time_buffer') as mock_buffer:
 			result = test_function()
 
-		# Then: The function should execute and metrics should be reported
+		# Then: The function should execute and its processing time should be buffered
 		assert result == 'result'
+		mock_buffer.record.assert_called_once()
 
-		# Verify metrics were set and reported correctly
-		mock_metrics.set_dimensions.assert_called_once_with({'Function': 'test_function'})
-		mock_metrics.put_metric.assert_called_once()
-
-		# First arg should be 'ProcessingTime'
-		assert mock_metrics.put_metric.call_args[0][0] == 'ProcessingTime'
+		# First arg should be the function name
+		assert mock_buffer.record.call_args[0][0] == 'test_function'
 
 		# Second arg should be a float (the time)
-		assert isinstance(mock_metrics.put_metric.call_args[0][1], float)
-
-		# Third arg should be 'Seconds'
-		assert mock_metrics.put_metric.call_args[0][2] == 'Seconds'
+		assert isinstance(mock_buffer.record.call_args[0][1], float)
+		assert mock_buffer.record.call_args[0][1] >= 0.1
 
 	def test_track_processing_time_with_args(self):
 		"""Test the processing time tracking decorator with arguments."""
 		# Given: A function with arguments and the decorator
-		mock_metrics = MagicMock()
-
 		@track_processing_time
 		def test_function_with_args(arg1, arg2=None):
 			time.sleep(0.1)  # Sleep to have measurable time
 			return f'{arg1}-{arg2}'
 
-		# Create a patched metric_scope that returns our mock_metrics
-		def patched_metric_scope(f):
-			def wrapper(*args, **kwargs):
-				return f(*args, **kwargs, metrics=mock_metrics)
-
-			return wrapper
-
 		# When: We call the decorated function with arguments
-		with patch('bin.target_region.utils.metrics.metric_scope', patched_metric_scope):
+		with patch('bin.target_region.utils.metrics.processing_time_buffer') as mock_buffer:
 			result = test_function_with_args('test', arg2='value')
 
-		# Then: The function should execute with the arguments and metrics should be reported
+		# Then: The function should execute with the arguments and its processing time should be buffered
 		assert result == 'test-value'
-
-		# Verify metrics were set and reported correctly
-		mock_metrics.set_dimensions.assert_called_once_with({'Function': 'test_function_with_args'})
-		mock_metrics.put_metric.assert_called_once()
+		mock_buffer.record.assert_called_once()
+		assert mock_buffer.record.call_args[0][0] == 'test_function_with_args'
+
+	def test_processing_time_buffer_flush(self):
+		"""Test buffered timings are reported as one EMF record per function."""
+		# Given: A buffer holding timings for two functions
+		buffer = ProcessingTimeBuffer(flush_interval=3600)
+		buffer.record('download', 0.5)
+		buffer.record('download', 0.7)
+		buffer.record('upload', 1.2)
+		loggers = {}
+
+		def create_logger():
+			mock_logger = MagicMock()
+			mock_logger.set_dimensions.side_effect = lambda dims: loggers.setdefault(dims['Function'], mock_logger)
+			return mock_logger
+
+		# When: We flush the buffer
+		with patch('bin.target_region.utils.metrics.create_metrics_logger', side_effect=create_logger):
+			result = buffer.flush()
+
+		# Then: Each function should be reported once with all of its timings
+		assert result is True
+		assert sorted(loggers) == ['download', 'upload']
+		assert [c[0] for c in loggers['download'].put_metric.call_args_list] == [
+			('ProcessingTime', 0.5, 'Seconds'),
+			('ProcessingTime', 0.7, 'Seconds'),
+		]
+		loggers['download'].flush_sync.assert_called_once()
+		loggers['upload'].flush_sync.assert_called_once()
+
+		# And the buffer should be empty afterwards
+		with patch('bin.target_region.utils.metrics.create_metrics_logger') as mock_create:
+			buffer.flush()
+			mock_create.assert_not_called()
+
+	def test_processing_time_buffer_samples_fast_calls(self):
+		"""Test calls faster than the sample threshold are only recorded 1 in sample_rate."""
+		# Given: A buffer that samples calls under 1ms at a rate of 1 in 10
+		buffer = ProcessingTimeBuffer(flush_interval=3600, sample_threshold=0.001, sample_rate=10)
+
+		# When: We record 25 fast calls and one slow call
+		for _ in range(25):
+			buffer.record('fast', 0.0001)
+		buffer.record('slow', 0.5)
+
+		# Then: Only every tenth fast call should be kept, and the slow call always
+		assert len(buffer._timings['fast']) == 3
+		assert buffer._timings['slow'] == [0.5]
 
 	def test_track_processing_time_exception(self):
 		"""Test the processing time tracking decorator when the function raises an exception."""
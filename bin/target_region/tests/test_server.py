@@ -3,13 +3,18 @@ Unit tests for the server module in target_region.
 """
 
 import os
+import threading
 from unittest.mock import patch
 import tempfile
 
+import pytest
+
 # Import the module under test
+from bin.target_region.utils.decompression import ArchiveMember
 from bin.target_region.server import (
 	process_s3_object,
 	upload_object_to_targets,
+	upload_and_remove,
 	process_message_batch,
 	signal_handler,
 	main,
@@ -149,7 +154,7 @@ class TestObjectUpload:
 				args = mock_upload.call_args[0]
 				assert args[1] == 'test-target-bucket'  # Bucket name
 				assert args[2] == 'test/test_file.txt'  # Target key with prefix
-				assert args[3] == {'Purpose': 'Testing'}  # Tags
+				assert args[3] == 'Purpose=Testing'  # Tags formatted for the upload request
 				assert args[4] == 'STANDARD'  # Storage class
 				assert args[5] is None  # KMS key ARN
 
@@ -370,6 +375,47 @@ class TestObjectUpload:
 			assert success is False
 			assert mock_upload.call_count == 2
 
+	def test_upload_and_remove(self, temp_directory):
+		"""Test an extracted object is uploaded, removed and its upload slot released."""
+		# Given: An extracted file and a taken upload slot
+		extracted_path = os.path.join(temp_directory, 'test_file.txt')
+		with open(extracted_path, 'w') as f:
+			f.write('test content')
+		object_info = {'object_name': 'test_file.txt', 'local_path': extracted_path}
+		upload_slots = threading.BoundedSemaphore(1)
+		upload_slots.acquire()
+
+		with patch('bin.target_region.server.upload_object_to_targets', return_value=True) as mock_upload:
+			# When: We upload and remove the object
+			success = upload_and_remove(object_info, upload_slots)
+
+			# Then: The object should be uploaded and the extracted file removed
+			assert success is True
+			mock_upload.assert_called_once_with(object_info)
+			assert not os.path.exists(extracted_path)
+
+		# The upload slot should be free again
+		assert upload_slots.acquire(blocking=False) is True
+
+	def test_upload_and_remove_failure_releases_slot(self, temp_directory):
+		"""Test the upload slot is released and the file removed when the upload raises."""
+		# Given: An extracted file and an upload that raises
+		extracted_path = os.path.join(temp_directory, 'test_file.txt')
+		with open(extracted_path, 'w') as f:
+			f.write('test content')
+		object_info = {'object_name': 'test_file.txt', 'local_path': extracted_path}
+		upload_slots = threading.BoundedSemaphore(1)
+		upload_slots.acquire()
+
+		with patch('bin.target_region.server.upload_object_to_targets', side_effect=RuntimeError('boom')):
+			# When: We upload and remove the object
+			with pytest.raises(RuntimeError):
+				upload_and_remove(object_info, upload_slots)
+
+		# Then: The extracted file should be removed and the slot released
+		assert not os.path.exists(extracted_path)
+		assert upload_slots.acquire(blocking=False) is True
+
 
 class TestMessageBatchProcessing:
 	"""Tests for SQS message batch processing."""
@@ -398,7 +444,7 @@ class TestMessageBatchProcessing:
 		with (
 			patch('bin.target_region.server.get_sqs_messages') as mock_get_messages,
 			patch('bin.target_region.server.is_s3_test_event') as mock_is_test,
-			patch('bin.target_region.server.delete_sqs_messages_batch') as mock_delete_batch,
+			patch('bin.target_region.server.enqueue_sqs_delete') as mock_delete,
 		):
 			# Configure mocks
 			mock_get_messages.return_value = [s3_test_event]
@@ -407,9 +453,9 @@ class TestMessageBatchProcessing:
 			# When: We process the message batch
 			processed = process_message_batch(queue_url)
 
-			# Then: The test event should be deleted without processing
+			# Then: The test event should be queued for deletion without processing
 			assert processed == 1
-			mock_delete_batch.assert_called_once_with(queue_url, [s3_test_event['ReceiptHandle']])
+			mock_delete.assert_called_once_with(queue_url, s3_test_event['ReceiptHandle'])
 
 	def test_process_message_batch_full_flow(self, setup_environment_variables, sample_s3_event, temp_directory):
 		"""Test processing a batch with a full successful flow."""
@@ -425,8 +471,8 @@ class TestMessageBatchProcessing:
 			patch('bin.target_region.server.process_s3_object') as mock_process_obj,
 			patch('bin.target_region.server.decompress_and_extract') as mock_decompress,
 			patch('bin.target_region.server.read_manifest_from_file') as mock_read_manifest,
-			patch('bin.target_region.server.get_tar_members') as mock_get_members,
 			patch('bin.target_region.server.get_object_paths_from_manifest') as mock_get_paths,
+			patch('bin.target_region.server.open_archive') as mock_open_archive,
 			patch('bin.target_region.server.stream_extract_file') as mock_stream_extract,
 			patch('bin.target_region.server.upload_object_to_targets') as mock_upload,
 			patch('bin.target_region.server.report_decompression_metrics') as mock_report_metrics,
@@ -451,7 +497,16 @@ class TestMessageBatchProcessing:
 			)
 
 			extract_dir = os.path.join(temp_directory, 'extracted')
-			mock_decompress.return_value = (True, extract_dir, 1000, 5000)
+			mock_decompress.return_value = (
+				True,
+				extract_dir,
+				1000,
+				5000,
+				{
+					'objects/file.txt': ArchiveMember('objects/file.txt', 512, 100),
+					'manifest.json': ArchiveMember('manifest.json', 1536, 200),
+				},
+			)
 
 			manifest_path = os.path.join(extract_dir, 'manifest.json')
 			mock_exists.return_value = True
@@ -464,8 +519,6 @@ class TestMessageBatchProcessing:
 			}
 			mock_read_manifest.return_value = mock_manifest
 
-			mock_get_members.return_value = ['manifest.json', 'objects/file.txt']
-
 			mock_get_paths.return_value = [
 				{
 					'object_name': 'test_file.txt',
@@ -492,8 +545,8 @@ class TestMessageBatchProcessing:
 			mock_process_obj.assert_called_once()
 			mock_decompress.assert_called_once()
 			mock_read_manifest.assert_called_once()
-			mock_get_members.assert_called_once()
 			mock_get_paths.assert_called_once()
+			mock_open_archive.assert_called_once()
 			mock_stream_extract.assert_called_once()
 			mock_upload.assert_called_once()
 			mock_report_metrics.assert_called_once()
@@ -571,7 +624,7 @@ class TestMessageBatchProcessing:
 			)
 
 			# Configure decompression to fail
-			mock_decompress.return_value = (False, '', 0, 0)
+			mock_decompress.return_value = (False, '', 0, 0, {})
 
 			# When: We process the message batch
 			processed = process_message_batch(queue_url)
@@ -585,6 +638,75 @@ class TestMessageBatchProcessing:
 			mock_delete_batch.assert_called_once_with(queue_url, [sample_s3_event['ReceiptHandle']])
 			mock_cleanup.assert_called_once()
 
+	def test_process_message_batch_deletes_each_message_when_done(
+		self, setup_environment_variables, sample_s3_event, temp_directory
+	):
+		"""Test each message is deleted as soon as its archive is processed, not at the end of the batch."""
+		# Given: Two messages, each with one archive
+		queue_url = os.environ.get('SQS_QUEUE_URL')
+		messages = [dict(sample_s3_event, ReceiptHandle=f'receipt-handle-{i}') for i in (1, 2)]
+		calls = []
+
+		with (
+			patch('bin.target_region.server.get_sqs_messages') as mock_get_messages,
+			patch('bin.target_region.server.is_s3_test_event') as mock_is_test,
+			patch('bin.target_region.server.extract_s3_event_info') as mock_extract_info,
+			patch('bin.target_region.server.create_temp_directory') as mock_create_temp,
+			patch('bin.target_region.server.process_archive') as mock_process_archive,
+			patch('bin.target_region.server.delete_sqs_messages_batch') as mock_delete_batch,
+			patch('bin.target_region.server.change_sqs_message_visibility_batch') as mock_change_visibility,
+			patch('bin.target_region.server.cleanup_temp_directory'),
+		):
+			mock_get_messages.return_value = messages
+			mock_is_test.return_value = False
+			mock_extract_info.side_effect = [[{'bucket': 'test-staging-bucket', 'key': f'archive-{i}'}] for i in (1, 2)]
+			mock_create_temp.return_value = temp_directory
+			mock_process_archive.side_effect = lambda s3_object, temp_dir: calls.append(s3_object['key'])
+			mock_delete_batch.side_effect = lambda queue_url, receipt_handles: calls.extend(receipt_handles)
+
+			# When: We process the message batch
+			processed = process_message_batch(queue_url)
+
+			# Then: Each message should be deleted right after its own archive
+			assert processed == 2
+			assert calls == ['archive-1', 'receipt-handle-1', 'archive-2', 'receipt-handle-2']
+
+			# And the visibility should not be touched while the timeout is far away
+			mock_change_visibility.assert_not_called()
+
+	def test_process_message_batch_extends_pending_visibility(
+		self, setup_environment_variables, sample_s3_event, temp_directory
+	):
+		"""Test messages still waiting in the batch get their visibility timeout extended."""
+		# Given: Two messages and a visibility timeout that is always half used up
+		queue_url = os.environ.get('SQS_QUEUE_URL')
+		messages = [dict(sample_s3_event, ReceiptHandle=f'receipt-handle-{i}') for i in (1, 2)]
+
+		with (
+			patch('bin.target_region.server.VISIBILITY_TIMEOUT', 0),
+			patch('bin.target_region.server.get_sqs_messages') as mock_get_messages,
+			patch('bin.target_region.server.is_s3_test_event') as mock_is_test,
+			patch('bin.target_region.server.extract_s3_event_info') as mock_extract_info,
+			patch('bin.target_region.server.create_temp_directory') as mock_create_temp,
+			patch('bin.target_region.server.process_archive'),
+			patch('bin.target_region.server.delete_sqs_messages_batch'),
+			patch('bin.target_region.server.change_sqs_message_visibility_batch') as mock_change_visibility,
+			patch('bin.target_region.server.cleanup_temp_directory'),
+		):
+			mock_get_messages.return_value = messages
+			mock_is_test.return_value = False
+			mock_extract_info.return_value = [{'bucket': 'test-staging-bucket', 'key': 'archive'}]
+			mock_create_temp.return_value = temp_directory
+
+			# When: We process the message batch
+			process_message_batch(queue_url)
+
+			# Then: Only the messages not processed yet should be extended, before each archive
+			assert [call.args[1] for call in mock_change_visibility.call_args_list] == [
+				['receipt-handle-1', 'receipt-handle-2'],
+				['receipt-handle-2'],
+			]
+
 
 class TestMainFunction:
 	"""Tests for the main function."""
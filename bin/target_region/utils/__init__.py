@@ -3,6 +3,7 @@ Utility modules for Target Region Container.
 
 This package contains utility modules for the Target Region Container:
 - aws_utils: AWS service interactions
+- batching: Adaptive SQS batch sizing
 - decompression: Decompression utilities
 - manifest: Manifest handling
 - metrics: CloudWatch metrics reporting
@@ -8,12 +8,17 @@ This module provides utility functions for interacting with AWS services:
 - S3 Event Detection: Identification of test events
 """
 
+import atexit
 import json
 import logging
 import os
 import sys
-from typing import Dict, List, Optional, Tuple
-from urllib.parse import unquote_plus
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import quote, unquote_plus, urlencode
 
 import boto3
 from botocore.config import Config
@@ -29,36 +34,138 @@ boto_config = Config(max_pool_connections=50, retries={'max_attempts': 3})
 # Create a session with the custom configuration
 session = boto3.session.Session()
 
+# Sessions are not thread-safe, so client creation from the shared session is serialized
+_session_lock = threading.Lock()
+
+
+class ThreadLocalClient:
+	"""
+	Proxy to a boto3 client that is created once per thread from the shared session.
+
+	Worker threads each get their own client (and connection pool) instead of contending
+	on a single client's endpoint resolver and connection pool.
+	"""
+
+	def __init__(self, service_name: str):
+		"""
+		Initialize the proxy.
+
+		Args:
+		    service_name: AWS service name passed to session.client
+		"""
+		self._service_name = service_name
+		self._local = threading.local()
+
+	def _get_client(self):
+		"""
+		Get the calling thread's client, creating it on first use.
+
+		Returns:
+		    boto3 client for the calling thread
+		"""
+		client = getattr(self._local, 'client', None)
+		if client is None:
+			with _session_lock:
+				client = session.client(self._service_name, config=boto_config)
+			self._local.client = client
+		return client
+
+	def __getattr__(self, name):
+		# Only called for attributes not set on the proxy itself
+		return getattr(self._get_client(), name)
+
+
 # Initialize AWS clients with the custom configuration
-s3_client = session.client('s3', config=boto_config)
-sqs_client = session.client('sqs', config=boto_config)
-cloudwatch_client = session.client('cloudwatch', config=boto_config)
+s3_client = ThreadLocalClient('s3')
+sqs_client = ThreadLocalClient('sqs')
+cloudwatch_client = ThreadLocalClient('cloudwatch')
+
+# SQS API limits
+SQS_MAX_BATCH_SIZE = 10  # Maximum entries per ReceiveMessage and DeleteMessageBatch call
+SQS_LONG_POLL_SECONDS = 20  # Maximum long-polling wait time
+
+# CloudWatch API limits
+CLOUDWATCH_MAX_METRIC_DATA = 1000  # Maximum MetricData entries per PutMetricData call
 
+# Shared thread pool for concurrent DeleteMessageBatch calls
+sqs_delete_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='sqs-delete')
 
-def get_sqs_messages(queue_url: str, max_messages: int = 1, visibility_timeout: int = 300) -> List[Dict]:
+
+def get_sqs_messages(
+	queue_url: str, max_messages: int = 10, visibility_timeout: int = 300, batching_window: float = 0
+) -> List[Dict]:
 	"""
 	Retrieve a batch of messages from an SQS queue.
 
+	A single ReceiveMessage call returns at most 10 messages. When a batching window is given,
+	receives are repeated until max_messages have been accumulated or the window elapses,
+	whichever comes first, and the merged list is returned.
+
 	Args:
 	    queue_url: URL of the SQS queue
-	    max_messages: Maximum number of messages to retrieve (1-10)
+	    max_messages: Maximum number of messages to retrieve
 	    visibility_timeout: Visibility timeout in seconds
+	    batching_window: Maximum seconds to keep receiving to fill the batch (0 for a single receive)
 
 	Returns:
 	    List of message dictionaries
 	"""
+	messages = []
+	deadline = time.monotonic() + batching_window
+	wait_time = SQS_LONG_POLL_SECONDS
+
 	try:
-		response = sqs_client.receive_message(
-			QueueUrl=queue_url,
-			MaxNumberOfMessages=max_messages,
-			VisibilityTimeout=visibility_timeout,
-			WaitTimeSeconds=20,  # Long polling
-		)
-
-		return response.get('Messages', [])
+		while True:
+			response = sqs_client.receive_message(
+				QueueUrl=queue_url,
+				MaxNumberOfMessages=min(SQS_MAX_BATCH_SIZE, max_messages - len(messages)),
+				VisibilityTimeout=visibility_timeout,
+				WaitTimeSeconds=wait_time,  # Long polling
+			)
+
+			received = response.get('Messages', [])
+			messages.extend(received)
+
+			remaining = deadline - time.monotonic()
+			if not received or len(messages) >= max_messages or remaining <= 0:
+				return messages
+
+			# Only wait for the rest of the batching window on follow-up receives
+			wait_time = min(SQS_LONG_POLL_SECONDS, int(remaining))
 	except ClientError as e:
 		logger.error(f'Error retrieving SQS messages: {e}')
-		return []
+		# Return whatever was already received so those messages are not left in flight
+		return messages
+
+
+def change_sqs_message_visibility_batch(queue_url: str, receipt_handles: List[str], visibility_timeout: int) -> bool:
+	"""
+	Reset the visibility timeout of in-flight messages, in chunks of 10.
+
+	Args:
+	    queue_url: URL of the SQS queue
+	    receipt_handles: Receipt handles of the messages to extend
+	    visibility_timeout: New visibility timeout in seconds, counted from now
+
+	Returns:
+	    True if the visibility of all messages was changed, False otherwise
+	"""
+	success = True
+	for i in range(0, len(receipt_handles), SQS_MAX_BATCH_SIZE):
+		entries = [
+			{'Id': str(i + index), 'ReceiptHandle': receipt_handle, 'VisibilityTimeout': visibility_timeout}
+			for index, receipt_handle in enumerate(receipt_handles[i : i + SQS_MAX_BATCH_SIZE])
+		]
+		try:
+			response = sqs_client.change_message_visibility_batch(QueueUrl=queue_url, Entries=entries)
+			if response.get('Failed'):
+				logger.warning(f'Failed to change visibility of {len(response["Failed"])} SQS messages')
+				success = False
+		except ClientError as e:
+			logger.error(f'Error changing SQS message visibility: {e}')
+			success = False
+
+	return success
 
 
 def delete_sqs_message(queue_url: str, receipt_handle: str) -> bool:
@@ -80,9 +187,37 @@ def delete_sqs_message(queue_url: str, receipt_handle: str) -> bool:
 		return False
 
 
+def _delete_sqs_message_chunk(queue_url: str, entries: List[Dict[str, str]]) -> Tuple[List[str], List[str]]:
+	"""
+	Send a single DeleteMessageBatch call for up to 10 entries.
+
+	Args:
+	    queue_url: URL of the SQS queue
+	    entries: DeleteMessageBatch entries with 'Id' and 'ReceiptHandle' keys
+
+	Returns:
+	    Tuple of (successful_ids, failed_ids)
+	"""
+	try:
+		response = sqs_client.delete_message_batch(QueueUrl=queue_url, Entries=entries)
+
+		successful_ids = [entry['Id'] for entry in response.get('Successful', [])]
+		failed_ids = [entry['Id'] for entry in response.get('Failed', [])]
+
+		return successful_ids, failed_ids
+	except ClientError as e:
+		logger.error(f'Error batch deleting SQS messages: {e}')
+		return [], [entry['Id'] for entry in entries]
+
+
 def delete_sqs_messages_batch(queue_url: str, receipt_handles: List[str]) -> Tuple[List[str], List[str]]:
 	"""
-	Delete multiple messages from an SQS queue in a batch.
+	Delete multiple messages from an SQS queue in batches.
+
+	Receipt handles are split into chunks of 10 (the DeleteMessageBatch limit) and the
+	chunks are deleted concurrently on a shared thread pool, or inline once the pool has
+	been shut down at interpreter exit. Entry IDs are the positions of the receipt handles
+	in the input list.
 
 	Args:
 	    queue_url: URL of the SQS queue
@@ -95,20 +230,158 @@ def delete_sqs_messages_batch(queue_url: str, receipt_handles: List[str]) -> Tup
 		return [], []
 
 	entries = [{'Id': str(i), 'ReceiptHandle': rh} for i, rh in enumerate(receipt_handles)]
+	chunks = [entries[i : i + SQS_MAX_BATCH_SIZE] for i in range(0, len(entries), SQS_MAX_BATCH_SIZE)]
 
-	try:
-		response = sqs_client.delete_message_batch(QueueUrl=queue_url, Entries=entries)
+	if len(chunks) == 1:
+		successful_ids, failed_ids = _delete_sqs_message_chunk(queue_url, chunks[0])
+	else:
+		successful_ids, failed_ids = [], []
+		results = []
+		futures = []
+		for chunk in chunks:
+			try:
+				futures.append(sqs_delete_executor.submit(_delete_sqs_message_chunk, queue_url, chunk))
+			except RuntimeError:
+				# The pool is shut down before atexit handlers run, so exit-time flushes send inline
+				results.append(_delete_sqs_message_chunk(queue_url, chunk))
+		results.extend(future.result() for future in as_completed(futures))
 
-		successful_ids = [entry['Id'] for entry in response.get('Successful', [])]
-		failed_ids = [entry['Id'] for entry in response.get('Failed', [])]
+		for chunk_successful, chunk_failed in results:
+			successful_ids.extend(chunk_successful)
+			failed_ids.extend(chunk_failed)
 
-		if failed_ids:
-			logger.warning(f'Failed to delete {len(failed_ids)} messages from SQS queue')
+		# Keep IDs in input order regardless of which chunk finished first
+		successful_ids.sort(key=int)
+		failed_ids.sort(key=int)
 
-		return successful_ids, failed_ids
-	except ClientError as e:
-		logger.error(f'Error batch deleting SQS messages: {e}')
-		return [], [str(i) for i in range(len(receipt_handles))]
+	if failed_ids:
+		logger.warning(f'Failed to delete {len(failed_ids)} messages from SQS queue')
+
+	return successful_ids, failed_ids
+
+
+class SqsDeleteBatcher:
+	"""
+	Collect individual SQS message deletes and send them in DeleteMessageBatch calls.
+
+	Pending deletes are flushed by a background thread once max_batch_size of them are
+	queued or max_delay seconds after the first one was queued, whichever comes first.
+	"""
+
+	def __init__(self, max_batch_size: int = SQS_MAX_BATCH_SIZE, max_delay: float = 0.1):
+		"""
+		Initialize the batcher.
+
+		Args:
+		    max_batch_size: Number of pending deletes that triggers a flush
+		    max_delay: Maximum seconds a delete waits before it is flushed
+		"""
+		self.max_batch_size = max_batch_size
+		self.max_delay = max_delay
+		self._pending: Dict[str, List[str]] = {}
+		self._count = 0
+		self._condition = threading.Condition()
+		self._flush_thread = None
+
+	def add(self, queue_url: str, receipt_handle: str) -> bool:
+		"""
+		Queue a message delete.
+
+		Args:
+		    queue_url: URL of the SQS queue
+		    receipt_handle: Receipt handle of the message to delete
+
+		Returns:
+		    True if the delete was queued, False otherwise
+		"""
+		try:
+			with self._condition:
+				self._pending.setdefault(queue_url, []).append(receipt_handle)
+				self._count += 1
+
+				if self._flush_thread is None:
+					self._flush_thread = threading.Thread(
+						target=self._flush_periodically, name='sqs-delete-batcher', daemon=True
+					)
+					self._flush_thread.start()
+
+				self._condition.notify()
+			return True
+		except RuntimeError as e:
+			logger.error(f'Error queueing SQS message delete: {e}')
+			return False
+
+	def flush(self) -> bool:
+		"""
+		Delete all pending messages now.
+
+		Returns:
+		    True if all pending messages were deleted, False otherwise
+		"""
+		with self._condition:
+			pending = self._pending
+			self._pending = {}
+			self._count = 0
+
+		success = True
+		for queue_url, receipt_handles in pending.items():
+			_, failed_ids = delete_sqs_messages_batch(queue_url, receipt_handles)
+			if failed_ids:
+				success = False
+
+		return success
+
+	def _flush_periodically(self) -> None:
+		"""Flush pending deletes when a batch fills up or the oldest delete reaches max_delay."""
+		while True:
+			with self._condition:
+				self._condition.wait_for(lambda: self._count > 0)
+				self._condition.wait_for(lambda: self._count >= self.max_batch_size, timeout=self.max_delay)
+			self.flush()
+
+
+# Shared delete batcher, flushed on process exit so queued deletes are not lost
+sqs_delete_batcher = SqsDeleteBatcher()
+atexit.register(sqs_delete_batcher.flush)
+
+
+def enqueue_sqs_delete(queue_url: str, receipt_handle: str) -> bool:
+	"""
+	Queue a message delete on the shared SqsDeleteBatcher.
+
+	The delete is sent with other pending deletes in a DeleteMessageBatch call shortly
+	afterwards. Failures of that call are only logged, so use delete_sqs_message when
+	the caller needs to know whether the message was deleted.
+
+	Args:
+	    queue_url: URL of the SQS queue
+	    receipt_handle: Receipt handle of the message to delete
+
+	Returns:
+	    True if the delete was queued, False otherwise
+	"""
+	return sqs_delete_batcher.add(queue_url, receipt_handle)
+
+
+def parse_message(message: Dict) -> Dict:
+	"""
+	Parse the JSON body of an SQS message, once.
+
+	The parsed body is memoized on the message under '_parsed_body', so the test event
+	check and the event extraction share a single parse. Invalid JSON raises
+	json.JSONDecodeError, which callers handle.
+
+	Args:
+	    message: SQS message dictionary
+
+	Returns:
+	    Parsed message body
+	"""
+	body = message.get('_parsed_body')
+	if body is None:
+		body = json.loads(message.get('Body', '{}'))
+		message['_parsed_body'] = body
+	return body
 
 
 def is_s3_test_event(message: Dict) -> bool:
@@ -126,7 +399,7 @@ def is_s3_test_event(message: Dict) -> bool:
 	    True if the message is an S3 test event, False otherwise
 	"""
 	try:
-		body = json.loads(message.get('Body', '{}'))
+		body = parse_message(message)
 
 		# Check for the presence of 'Event' field with 's3:TestEvent' value
 		if body.get('Event') == 's3:TestEvent':
@@ -157,7 +430,7 @@ def extract_s3_event_info(message: Dict) -> List[Dict]:
 	    List of dictionaries with bucket and key information
 	"""
 	try:
-		body = json.loads(message.get('Body', '{}'))
+		body = parse_message(message)
 		records = body.get('Records', [])
 
 		s3_objects = []
@@ -211,22 +484,37 @@ def get_s3_object(bucket: str, key: str, local_path: str) -> bool:
 		return False
 
 
+def format_tagging(tags: Dict[str, str]) -> str:
+	"""
+	Format tags as the URL-encoded query string accepted by the S3 Tagging upload argument.
+
+	Args:
+	    tags: Dictionary of tags
+
+	Returns:
+	    Tagging string in the form 'key1=value1&key2=value2'
+	"""
+	return urlencode(tags, quote_via=quote)
+
+
 def upload_to_s3(
 	local_path: str,
 	bucket: str,
 	key: str,
-	tags: Optional[Dict[str, str]] = None,
+	tags: Optional[Union[Dict[str, str], str]] = None,
 	storage_class: Optional[str] = None,
 	kms_key_arn: Optional[str] = None,
 ) -> bool:
 	"""
 	Upload a local file to S3 with optional tags, storage class, and KMS encryption.
 
+	Tags are sent with the upload itself rather than in a separate PutObjectTagging call.
+
 	Args:
 	    local_path: Local file path
 	    bucket: S3 bucket name
 	    key: S3 object key
-	    tags: Optional dictionary of tags to apply
+	    tags: Optional dictionary of tags, or a tagging string from format_tagging
 	    storage_class: Optional storage class for the object (e.g., 'STANDARD', 'STANDARD_IA', etc.)
 	    kms_key_arn: Optional KMS key ARN for server-side encryption
 
@@ -242,6 +530,10 @@ def upload_to_s3(
 			extra_args['StorageClass'] = storage_class
 			logger.debug(f'Setting storage class to {storage_class} for {bucket}/{key}')
 
+		# Add tags if provided, accepting a pre-formatted tagging string
+		if tags:
+			extra_args['Tagging'] = tags if isinstance(tags, str) else format_tagging(tags)
+
 		# Add KMS encryption if a key ARN is provided
 		if kms_key_arn:
 			extra_args['ServerSideEncryption'] = 'aws:kms'
@@ -254,11 +546,6 @@ def upload_to_s3(
 		# Upload the file with extra args
 		s3_client.upload_file(local_path, bucket, key, ExtraArgs=extra_args)
 
-		# Apply tags if provided
-		if tags:
-			tag_set = [{'Key': k, 'Value': v} for k, v in tags.items()]
-			s3_client.put_object_tagging(Bucket=bucket, Key=key, Tagging={'TagSet': tag_set})
-
 		return True
 	except ClientError as e:
 		logger.error(f'Error uploading file to S3 {bucket}/{key}: {e}')
@@ -284,6 +571,92 @@ def delete_s3_object(bucket: str, key: str) -> bool:
 		return False
 
 
+class MetricBuffer:
+	"""
+	Buffer CloudWatch metric data points and send them in batched PutMetricData calls.
+
+	Data points are grouped by namespace and flushed when the buffer holds max_size
+	data points, from a background thread every max_age seconds and at process exit.
+	"""
+
+	def __init__(self, max_size: int = 20, max_age: float = 5.0):
+		"""
+		Initialize the buffer.
+
+		Args:
+		    max_size: Number of buffered data points that triggers a flush
+		    max_age: Seconds between background flushes
+		"""
+		self.max_size = max_size
+		self.max_age = max_age
+		self._metric_data: Dict[str, List[Dict]] = {}
+		self._count = 0
+		self._lock = threading.Lock()
+		self._flush_thread = None
+
+	def add(self, namespace: str, datum: Dict) -> bool:
+		"""
+		Add a metric data point, flushing the buffer if it is full.
+
+		Args:
+		    namespace: Metric namespace
+		    datum: PutMetricData MetricData entry
+
+		Returns:
+		    True if the data point was buffered or flushed successfully, False otherwise
+		"""
+		with self._lock:
+			self._metric_data.setdefault(namespace, []).append(datum)
+			self._count += 1
+			flush_due = self._count >= self.max_size
+
+			if self._flush_thread is None:
+				self._flush_thread = threading.Thread(
+					target=self._flush_periodically, name='metric-buffer-flush', daemon=True
+				)
+				self._flush_thread.start()
+
+		if flush_due:
+			return self.flush()
+		return True
+
+	def flush(self) -> bool:
+		"""
+		Send all buffered data points, one PutMetricData call per namespace and 1000 entries.
+
+		Returns:
+		    True if all data points were sent, False otherwise
+		"""
+		with self._lock:
+			pending = self._metric_data
+			self._metric_data = {}
+			self._count = 0
+
+		success = True
+		for namespace, metric_data in pending.items():
+			for i in range(0, len(metric_data), CLOUDWATCH_MAX_METRIC_DATA):
+				try:
+					cloudwatch_client.put_metric_data(
+						Namespace=namespace, MetricData=metric_data[i : i + CLOUDWATCH_MAX_METRIC_DATA]
+					)
+				except ClientError as e:
+					logger.error(f'Error putting CloudWatch metrics to {namespace}: {e}')
+					success = False
+
+		return success
+
+	def _flush_periodically(self) -> None:
+		"""Flush the buffer every max_age seconds."""
+		while True:
+			time.sleep(self.max_age)
+			self.flush()
+
+
+# Shared metric buffer, flushed on process exit so buffered data points are not lost
+metric_buffer = MetricBuffer()
+atexit.register(metric_buffer.flush)
+
+
 def put_cloudwatch_metric(
 	namespace: str,
 	metric_name: str,
@@ -294,6 +667,9 @@ def put_cloudwatch_metric(
 	"""
 	Put a metric data point to CloudWatch.
 
+	Data points are timestamped when they are observed, then buffered and sent in
+	batches by the shared MetricBuffer.
+
 	Args:
 	    namespace: Metric namespace
 	    metric_name: Metric name
@@ -304,22 +680,16 @@ def put_cloudwatch_metric(
 	Returns:
 	    True if successful, False otherwise
 	"""
-	try:
-		cloudwatch_client.put_metric_data(
-			Namespace=namespace,
-			MetricData=[
-				{
-					'MetricName': metric_name,
-					'Value': value,
-					'Unit': unit,
-					'Dimensions': dimensions,
-				}
-			],
-		)
-		return True
-	except ClientError as e:
-		logger.error(f'Error putting CloudWatch metric {metric_name}: {e}')
-		return False
+	return metric_buffer.add(
+		namespace,
+		{
+			'MetricName': metric_name,
+			'Value': value,
+			'Unit': unit,
+			'Dimensions': dimensions,
+			'Timestamp': datetime.now(timezone.utc),
+		},
+	)
 
 
 def get_env_var(name: str, required: bool = True) -> Optional[str]:
@@ -342,9 +712,9 @@ def get_env_var(name: str, required: bool = True) -> Optional[str]:
 	return value
 
 
-def get_current_region() -> str:
+def _resolve_region() -> str:
 	"""
-	Get the current AWS region from the environment.
+	Resolve the current AWS region from the environment or the shared session.
 
 	Returns:
 	    Current AWS region
@@ -352,9 +722,8 @@ def get_current_region() -> str:
 	# Try to get from environment variable
 	region = os.environ.get('AWS_DEFAULT_REGION')
 
-	# Fall back to boto3 session if not in environment
+	# Fall back to the shared boto3 session if not in environment
 	if not region:
-		session = boto3.session.Session()
 		region = session.region_name
 
 	# Default to us-east-1 if still not found
@@ -363,3 +732,17 @@ def get_current_region() -> str:
 		region = 'us-east-1'
 
 	return region
+
+
+# The region does not change for the lifetime of the container, so resolve it once
+_CURRENT_REGION = _resolve_region()
+
+
+def get_current_region() -> str:
+	"""
+	Get the current AWS region from the environment.
+
+	Returns:
+	    Current AWS region
+	"""
+	return _CURRENT_REGION
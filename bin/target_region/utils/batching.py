@@ -0,0 +1,67 @@
+"""
+Adaptive SQS batch sizing for the Target Region Container.
+
+This module provides a small controller that decides how many SQS messages
+the processing loop should request per cycle, based on how full the previous
+receives were and how long the previous batch took to process.
+"""
+
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveBatcher:
+	"""
+	Grow the batch size while the queue keeps filling it, shrink it under latency pressure.
+
+	The batch size doubles when a receive returns a full batch (the queue has a backlog)
+	and halves when processing a batch takes longer than the latency budget, so that
+	messages are not left running up against their SQS visibility timeout.
+	"""
+
+	def __init__(self, min_size: int = 1, max_size: int = 10, latency_budget: float = 150.0):
+		"""
+		Initialize the batcher.
+
+		Args:
+		    min_size: Smallest batch size to request
+		    max_size: Largest batch size to request
+		    latency_budget: Maximum seconds a batch may take before the size is reduced
+		"""
+		self.min_size = max(1, min_size)
+		self.max_size = max(self.min_size, max_size)
+		self.latency_budget = latency_budget
+		self.batch_size = self.min_size
+
+	def record(self, received: int, elapsed: float) -> int:
+		"""
+		Record the outcome of a batch and compute the next batch size.
+
+		Args:
+		    received: Number of messages received for the batch
+		    elapsed: Seconds spent processing the batch
+
+		Returns:
+		    Batch size to use for the next receive
+		"""
+		previous = self.batch_size
+
+		if elapsed > self.latency_budget:
+			# Under latency pressure: back off quickly
+			self.batch_size = max(self.min_size, self.batch_size // 2)
+		elif received >= self.batch_size:
+			# The queue filled the whole batch: there is a backlog, take more per cycle
+			self.batch_size = min(self.max_size, self.batch_size * 2)
+		elif received < self.batch_size // 2:
+			# Batches are mostly empty: drift back towards the minimum
+			self.batch_size = max(self.min_size, self.batch_size - 1)
+
+		if self.batch_size != previous:
+			logger.debug(
+				f'Adjusted SQS batch size from {previous} to {self.batch_size} '
+				f'(received={received}, elapsed={elapsed:.2f}s)'
+			)
+
+		return self.batch_size
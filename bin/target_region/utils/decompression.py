@@ -2,16 +2,18 @@
 Decompression Utilities for Target Region Container
 
 This module provides utilities for decompressing files using zstd:
-- Extract files from zstd-compressed TAR archives
+- Stream zstd-compressed TAR archives without an intermediate TAR file
+- Extract files from zstd-compressed TAR archives on demand
 - Manage temporary files and directories
 """
 
+import contextlib
 import logging
 import os
 import shutil
 import tarfile
 import tempfile
-from typing import Tuple
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Optional, Tuple, Union
 
 import pyzstd
 
@@ -21,8 +23,13 @@ import psutil
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Constants
-MAX_WORKERS = max(1, os.cpu_count() or 1)  # Default to 1 if cpu_count returns None
+# zstd's recommended streaming buffer sizes (ZSTD_DStreamInSize/ZSTD_DStreamOutSize), which
+# pyzstd exposes only privately; buffers are kept at whole multiples of these. The fallback is
+# ZSTD_BLOCKSIZE_MAX + 3 and ZSTD_BLOCKSIZE_MAX, the values pyzstd 0.16.2 reports.
+ZSTD_DSTREAM_IN_SIZE, ZSTD_DSTREAM_OUT_SIZE = getattr(pyzstd, '_ZSTD_DStreamSizes', (131075, 131072))
+
+# Buffers larger than this many streaming blocks no longer reduce per-call overhead
+MAX_STREAM_BLOCKS = 16
 
 
 def get_available_memory():
@@ -66,6 +73,20 @@ def get_available_memory():
 		return fallback_memory
 
 
+def align_buffer_size(size: int, unit: int) -> int:
+	"""
+	Round a buffer size down to a whole multiple of a zstd streaming block size.
+
+	Args:
+	    size: Requested buffer size in bytes
+	    unit: zstd streaming block size in bytes
+
+	Returns:
+	    Aligned buffer size in bytes, never smaller than one block
+	"""
+	return max(unit, size - size % unit)
+
+
 def calculate_buffer_sizes(available_memory):
 	"""
 	Calculate optimal buffer sizes based on available memory.
@@ -80,8 +101,9 @@ def calculate_buffer_sizes(available_memory):
 	max_buffer_memory = available_memory * 0.15
 
 	# 25% for read buffer, 75% for write buffer
-	read_size = int(max_buffer_memory * 0.25)
-	write_size = int(max_buffer_memory * 0.75)
+	# Align to zstd's streaming sizes so each read feeds and drains whole decoder blocks
+	read_size = align_buffer_size(int(max_buffer_memory * 0.25), ZSTD_DSTREAM_IN_SIZE)
+	write_size = align_buffer_size(int(max_buffer_memory * 0.75), ZSTD_DSTREAM_OUT_SIZE)
 
 	logger.info(f'Memory available: {available_memory / 1024 / 1024:.1f}MB')
 	logger.info(
@@ -98,6 +120,33 @@ logger.info(
 )
 
 
+def calculate_archive_buffer_sizes(compressed_size: int, decompressed_size: int) -> Tuple[int, int]:
+	"""
+	Size the decompression buffers for a specific archive.
+
+	Buffers are no larger than the archive itself, capped at MAX_STREAM_BLOCKS zstd
+	streaming blocks, and never exceed the memory budget from calculate_buffer_sizes.
+
+	Args:
+	    compressed_size: Compressed archive size in bytes
+	    decompressed_size: Decompressed TAR size in bytes
+
+	Returns:
+	    Tuple of (read_size, write_size) in bytes
+	"""
+	read_size = min(
+		READ_BUFFER_SIZE,
+		ZSTD_DSTREAM_IN_SIZE * MAX_STREAM_BLOCKS,
+		align_buffer_size(compressed_size, ZSTD_DSTREAM_IN_SIZE),
+	)
+	write_size = min(
+		WRITE_BUFFER_SIZE,
+		ZSTD_DSTREAM_OUT_SIZE * MAX_STREAM_BLOCKS,
+		align_buffer_size(decompressed_size, ZSTD_DSTREAM_OUT_SIZE),
+	)
+	return read_size, write_size
+
+
 def create_temp_directory() -> str:
 	"""
 	Create a temporary directory for processing files.
@@ -151,168 +200,215 @@ def cleanup_temp_directory(temp_dir: str) -> bool:
 		return False
 
 
-def decompress_zstd_file(input_path: str, output_path: str, threads: int = MAX_WORKERS) -> Tuple[bool, int, int]:
+class ArchiveMember(NamedTuple):
+	"""Location of a file member inside the decompressed TAR stream."""
+
+	name: str
+	offset: int  # Offset of the member data in the decompressed stream
+	size: int
+
+
+# Member types that hold file data (the types accepted by TarInfo.isreg)
+FILE_MEMBER_TYPES = frozenset(tarfile.REGULAR_TYPES)
+
+
+def iter_file_members(tar: tarfile.TarFile) -> Iterator[tarfile.TarInfo]:
 	"""
-	Decompress a zstd-compressed file using streaming decompression with dynamic buffer sizing.
-	Uses memory-efficient approach that automatically optimizes buffer sizes based on available memory,
-	processing files in chunks rather than loading entire files into memory.
+	Lazily yield the regular file members of a TAR archive opened in streaming mode.
 
 	Args:
-	    input_path: Path to input compressed file
-	    output_path: Path to output decompressed file
-	    threads: Number of threads to use
+	    tar: TarFile opened with mode 'r|'
 
 	Returns:
-	    Tuple of (success, compressed_size, decompressed_size)
+	    Iterator over the TarInfo of each regular file, in archive order
+	"""
+	member = tar.next()
+	while member is not None:
+		# Compare the type code directly rather than calling isreg() for every entry
+		if member.type in FILE_MEMBER_TYPES:
+			yield member
+		member = tar.next()
+
+
+def advise_sequential(compressed: BinaryIO) -> None:
 	"""
+	Tell the kernel a file will be read once, front to back, so it reads ahead aggressively.
+
+	Args:
+	    compressed: Binary file object backed by a file descriptor
+	"""
+	if not hasattr(os, 'posix_fadvise'):
+		return
+
 	try:
-		# Get compressed file size
-		compressed_size = os.path.getsize(input_path)
-
-		# Use streaming decompression which processes the file in chunks
-		# instead of loading the entire file into memory at once
-		with open(input_path, 'rb') as f_in:
-			with open(output_path, 'wb') as f_out:
-				# Use dynamically sized buffers to optimize memory utilization
-				total_input, total_output = pyzstd.decompress_stream(
-					f_in,
-					f_out,
-					read_size=READ_BUFFER_SIZE,  # Dynamically calculated based on available memory
-					write_size=WRITE_BUFFER_SIZE,  # Dynamically calculated based on available memory
-				)
-
-		# Get decompressed file size
-		decompressed_size = os.path.getsize(output_path)
-
-		return True, compressed_size, decompressed_size
-	except Exception as e:
-		logger.error(f'Error decompressing file {input_path}: {e}')
-		return False, 0, 0
+		os.posix_fadvise(compressed.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+	except (OSError, ValueError) as e:
+		logger.debug(f'Could not set sequential read-ahead advice: {e}')
 
 
-def extract_manifest_only(tar_path: str, extract_dir: str) -> Tuple[bool, str]:
+@contextlib.contextmanager
+def open_archive(compressed: Union[str, BinaryIO], read_size: Optional[int] = None) -> Iterator[pyzstd.ZstdFile]:
 	"""
-	Extract only the manifest.json file from a TAR archive.
+	Open a zstd-compressed TAR file as a decompressed, forward-seekable stream.
 
 	Args:
-	    tar_path: Path to TAR file
-	    extract_dir: Directory to extract the manifest to
+	    compressed: Path to compressed TAR.ZSTD file, or a binary file object opened on it
+	    read_size: Input buffer size from calculate_archive_buffer_sizes (largest useful size if omitted)
 
 	Returns:
-	    Tuple of (success, manifest_path)
+	    Context manager yielding a readable ZstdFile positioned at the start of the TAR stream
 	"""
-	try:
-		manifest_path = os.path.join(extract_dir, 'manifest.json')
+	if read_size is None:
+		read_size = min(READ_BUFFER_SIZE, ZSTD_DSTREAM_IN_SIZE * MAX_STREAM_BLOCKS)
 
-		with tarfile.open(tar_path, 'r') as tar:
-			manifest_members = [m for m in tar.getmembers() if m.name == 'manifest.json']
-			if not manifest_members:
-				logger.error('manifest.json not found in TAR archive')
-				return False, ''
+	with contextlib.ExitStack() as stack:
+		if isinstance(compressed, str):
+			compressed = stack.enter_context(open(compressed, 'rb'))
 
-			tar.extract(manifest_members[0], path=extract_dir)
+		advise_sequential(compressed)
+		yield stack.enter_context(pyzstd.ZstdFile(compressed, 'rb', read_size=read_size))
 
-		return True, manifest_path
-	except Exception as e:
-		logger.error(f'Error extracting manifest from TAR archive: {e}')
-		return False, ''
 
-
-def stream_extract_file(tar_path: str, member_name: str, extract_dir: str) -> bool:
+def scan_tar_archive(compressed_path: str, extract_dir: str) -> Tuple[bool, Dict[str, ArchiveMember], int, int]:
 	"""
-	Extract a single file from TAR archive.
+	Read a zstd-compressed TAR archive in a single streaming pass.
+
+	The archive is decompressed on the fly and never written to disk. manifest.json is
+	extracted when it is encountered and the location of every file member in the
+	decompressed stream is recorded in a name-keyed index, in archive order, so members
+	can later be looked up and extracted on demand with stream_extract_file. Both sizes are taken from the stream positions once the archive
+	has been read to the end, so no extra stat calls are needed.
 
 	Args:
-	    tar_path: Path to TAR file
-	    member_name: Name of the file to extract
-	    extract_dir: Directory to extract the file to
+	    compressed_path: Path to compressed TAR.ZSTD file
+	    extract_dir: Directory to extract the manifest to
 
 	Returns:
-	    True if successful, False otherwise
+	    Tuple of (success, members, compressed_size, decompressed_size)
 	"""
 	try:
-		with tarfile.open(tar_path, 'r') as tar:
-			try:
-				member = tar.getmember(member_name)
-				tar.extract(member, path=extract_dir)
-				return True
-			except KeyError:
-				logger.error(f'File {member_name} not found in TAR archive')
-				return False
+		members = {}
+		manifest_found = False
+
+		with open(compressed_path, 'rb') as compressed, open_archive(compressed) as archive:
+			# Streaming mode reads the members sequentially without building a seekable index
+			with tarfile.open(fileobj=archive, mode='r|') as tar:
+				for member in iter_file_members(tar):
+					# A repeated name supersedes the earlier entry, as with tarfile.getmember;
+					# re-insert it so the index stays in archive order
+					members.pop(member.name, None)
+					members[member.name] = ArchiveMember(member.name, member.offset_data, member.size)
+
+					if member.name == 'manifest.json':
+						tar.extract(member, path=extract_dir)
+						manifest_found = True
+
+			# Drain the end-of-archive padding so both sizes are exact
+			while archive.read(ZSTD_DSTREAM_OUT_SIZE):
+				pass
+			compressed_size = compressed.tell()
+			decompressed_size = archive.tell()
+
+		if not manifest_found:
+			logger.error('manifest.json not found in TAR archive')
+			return False, {}, 0, 0
+
+		return True, members, compressed_size, decompressed_size
 	except Exception as e:
-		logger.error(f'Error extracting file {member_name} from TAR: {e}')
-		return False
+		logger.error(f'Error scanning TAR archive {compressed_path}: {e}')
+		return False, {}, 0, 0
 
 
-def get_tar_members(tar_path: str) -> list:
+def stream_extract_file(
+	archive: pyzstd.ZstdFile, member: ArchiveMember, extract_dir: str, write_size: Optional[int] = None
+) -> bool:
 	"""
-	Get list of all file members in a TAR archive.
+	Extract a single file from an archive opened with open_archive.
+
+	Seeking is emulated by decompressing forward, so members should be extracted in
+	archive order to decompress the stream only once.
 
 	Args:
-	    tar_path: Path to TAR file
+	    archive: Decompressed archive stream returned by open_archive
+	    member: Location of the member, as returned by scan_tar_archive
+	    extract_dir: Directory to extract the file to
+	    write_size: Output buffer size from calculate_archive_buffer_sizes (largest useful size if omitted)
 
 	Returns:
-	    List of member names in the TAR archive
+	    True if successful, False otherwise
 	"""
 	try:
-		with tarfile.open(tar_path, 'r') as tar:
-			members = [m.name for m in tar.getmembers() if not m.isdir()]
-			return members
+		if write_size is None:
+			write_size = min(WRITE_BUFFER_SIZE, ZSTD_DSTREAM_OUT_SIZE * MAX_STREAM_BLOCKS)
+
+		# Refuse member names that would escape the extraction directory
+		root = os.path.realpath(extract_dir)
+		output_path = os.path.realpath(os.path.join(root, member.name))
+		if not output_path.startswith(root + os.sep):
+			logger.error(f'Refusing to extract {member.name} outside of {extract_dir}')
+			return False
+
+		os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+		archive.seek(member.offset)
+		remaining = member.size
+
+		# Decompress into one reusable buffer and write it unbuffered, so each chunk is
+		# copied once into the buffer and once into the kernel
+		view = memoryview(bytearray(min(write_size, member.size)))
+		fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+		with os.fdopen(fd, 'wb', buffering=0) as f_out:
+			while remaining > 0:
+				read = archive.readinto(view[: min(len(view), remaining)])
+				if not read:
+					raise EOFError(f'Archive ended before the end of {member.name}')
+
+				# Unbuffered writes may be partial
+				written = 0
+				while written < read:
+					written += f_out.write(view[written:read])
+				remaining -= read
+
+		return True
 	except Exception as e:
-		logger.error(f'Error getting TAR members: {e}')
-		return []
+		logger.error(f'Error extracting file {member.name} from archive: {e}')
+		return False
 
 
-def decompress_and_extract(compressed_path: str, temp_dir: str) -> Tuple[bool, str, int, int]:
+def decompress_and_extract(
+	compressed_path: str, temp_dir: str
+) -> Tuple[bool, str, int, int, Dict[str, ArchiveMember]]:
 	"""
-	Decompress a zstd-compressed TAR file and extract its contents.
-	Uses streaming extraction to reduce memory usage.
+	Decompress a zstd-compressed TAR file and extract its manifest.
+
+	The decompressed TAR is streamed straight into the TAR reader instead of being
+	written to disk; object members are extracted later from the compressed file
+	with open_archive and stream_extract_file. The source region writes manifest.json
+	last, so the scan reads the whole archive and extraction decompresses it a second
+	time: this trades twice the decompression CPU for never holding the decompressed
+	TAR, or all of its objects, on disk.
 
 	Args:
 	    compressed_path: Path to compressed TAR.ZSTD file
 	    temp_dir: Temporary directory for processing
 
 	Returns:
-	    Tuple of (success, extract_dir, compressed_size, decompressed_size)
+	    Tuple of (success, extract_dir, compressed_size, decompressed_size, members)
 	"""
 	try:
-		# Create a temporary file for the decompressed TAR
-		tar_path = os.path.join(temp_dir, 'archive.tar')
-
-		# Decompress the ZSTD file
-		success, compressed_size, decompressed_size = decompress_zstd_file(compressed_path, tar_path)
-		if not success:
-			return False, '', 0, 0
-
 		# Create a directory for extracted files
 		extract_dir = os.path.join(temp_dir, 'extracted')
 		os.makedirs(extract_dir, exist_ok=True)
 
-		# Extract only the manifest file first
-		manifest_success, manifest_path = extract_manifest_only(tar_path, extract_dir)
-		if not manifest_success:
+		# Extract the manifest and index the archive members in one pass
+		scan_success, members, compressed_size, decompressed_size = scan_tar_archive(compressed_path, extract_dir)
+		if not scan_success:
 			logger.error('Failed to extract manifest from TAR archive')
-			return False, '', 0, 0
+			return False, '', 0, 0, {}
 
-		logger.debug(f'Successfully extracted manifest: {manifest_path}')
+		logger.debug(f'TAR archive contains {len(members) - 1} object files for streaming extraction')
 
-		# Get list of all files in the archive for future streaming extraction
-		# We don't extract them now, but ensure the tar file is retained for
-		# later streaming extraction in the server process
-		members = get_tar_members(tar_path)
-		object_members = [m for m in members if m != 'manifest.json']
-		logger.debug(f'TAR archive contains {len(object_members)} object files for streaming extraction')
-
-		# We now keep the TAR file for streaming extraction in the server process
-		# Each file will be extracted on demand, reducing memory usage
-
-		return True, extract_dir, compressed_size, decompressed_size
+		return True, extract_dir, compressed_size, decompressed_size, members
 	except Exception as e:
 		logger.error(f'Error in decompress_and_extract: {e}')
-		# Clean up TAR file on error
-		if os.path.exists(tar_path):
-			try:
-				os.remove(tar_path)
-			except Exception:
-				pass
-		return False, '', 0, 0
+		return False, '', 0, 0, {}
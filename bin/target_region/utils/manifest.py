@@ -26,8 +26,9 @@ def read_manifest_from_file(file_path: str) -> Optional[Dict]:
 	    Manifest dictionary or None if error
 	"""
 	try:
-		with open(file_path, 'r') as f:
-			return json.load(f)
+		# Parse the raw bytes in one call, skipping the text-mode decoding layer
+		with open(file_path, 'rb') as f:
+			return json.loads(f.read())
 	except Exception as e:
 		logger.error(f'Error reading manifest from file: {e}')
 		return None
@@ -55,6 +56,21 @@ def get_object_paths_from_manifest(manifest: Dict, extract_dir: str) -> List[Dic
 		logger.warning('No objects found in manifest')
 		return []
 
+	# Targets are shared by every object, so resolve them once for the whole manifest
+	if 'targets' not in manifest:
+		logger.warning(f'No targets found in manifest for {len(objects)} objects')
+		return []
+
+	targets = manifest['targets']
+
+	# Log target information for debugging
+	if logger.isEnabledFor(logging.DEBUG):
+		for target in targets:
+			if 'storage_class' in target:
+				logger.debug(
+					f"Found storage_class '{target['storage_class']}' in target config for region {target.get('region', 'unknown')}"
+				)
+
 	# Process each object
 	for obj in objects:
 		object_name = obj.get('object_name')
@@ -80,22 +96,9 @@ def get_object_paths_from_manifest(manifest: Dict, extract_dir: str) -> List[Dic
 			'etag': obj.get('etag', ''),
 			'size': obj.get('size', 0),
 			'storage_class': obj.get('storage_class', 'STANDARD'),
+			'targets': targets,
 		}
 
-		# Get targets from the top level of the manifest
-		if 'targets' in manifest:
-			object_info['targets'] = manifest.get('targets', [])
-		else:
-			logger.warning(f'No targets found in manifest for object: {object_name}')
-			continue
-
-		# Log target information for debugging
-		for target in object_info.get('targets', []):
-			if 'storage_class' in target:
-				logger.debug(
-					f"Found storage_class '{target['storage_class']}' in target config for region {target.get('region', 'unknown')}"
-				)
-
 		object_paths.append(object_info)
 
 	return object_paths
@@ -111,13 +114,8 @@ def prepare_object_tags(object_info: Dict) -> Dict[str, str]:
 	Returns:
 	    Dictionary of tags
 	"""
-	# Start with an empty tags dictionary
-	tags = {}
-
-	# Process existing tags
-	for tag_dict in object_info.get('tags', []):
-		for key, value in tag_dict.items():
-			tags[key] = value
+	# Merge the existing tag dictionaries, later entries winning
+	tags = {key: value for tag_dict in object_info.get('tags', []) for key, value in tag_dict.items()}
 
 	# Add original creation time and etag tags
 	if object_info.get('creation_time'):
@@ -7,14 +7,17 @@ This module provides utilities for tracking and reporting metrics:
 - CloudWatch metrics reporting using Embedded Metric Format (EMF)
 """
 
+import atexit
 import functools
 import logging
 import os
+import threading
 import time
-from typing import Callable
+from typing import Callable, Dict, List
 
 from aws_embedded_metrics import metric_scope, MetricsLogger
 from aws_embedded_metrics.config import get_config
+from aws_embedded_metrics.logger.metrics_logger_factory import create_metrics_logger
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -77,10 +80,96 @@ def report_decompression_metrics(
 		return False
 
 
+class ProcessingTimeBuffer:
+	"""
+	Buffer function processing times and report them in bulk using EMF.
+
+	Timings are grouped by function name and flushed as one EMF record per function,
+	from a background thread every flush_interval seconds and at process exit. Calls
+	faster than sample_threshold are sampled, recording only 1 in sample_rate.
+	"""
+
+	def __init__(self, flush_interval: float = 10.0, sample_threshold: float = 0.001, sample_rate: int = 10):
+		"""
+		Initialize the buffer.
+
+		Args:
+		    flush_interval: Seconds between background flushes
+		    sample_threshold: Calls faster than this many seconds are sampled
+		    sample_rate: Record 1 in this many sampled calls
+		"""
+		self.flush_interval = flush_interval
+		self.sample_threshold = sample_threshold
+		self.sample_rate = sample_rate
+		self._timings: Dict[str, List[float]] = {}
+		self._fast_calls: Dict[str, int] = {}
+		self._lock = threading.Lock()
+		self._flush_thread = None
+
+	def record(self, function_name: str, processing_time: float) -> None:
+		"""
+		Record the processing time of a function call.
+
+		Args:
+		    function_name: Name of the function
+		    processing_time: Processing time in seconds
+		"""
+		with self._lock:
+			if processing_time < self.sample_threshold:
+				fast_calls = self._fast_calls.get(function_name, 0)
+				self._fast_calls[function_name] = fast_calls + 1
+				if fast_calls % self.sample_rate:
+					return
+
+			self._timings.setdefault(function_name, []).append(processing_time)
+
+			if self._flush_thread is None:
+				self._flush_thread = threading.Thread(
+					target=self._flush_periodically, name='metrics-flush', daemon=True
+				)
+				self._flush_thread.start()
+
+	def flush(self) -> bool:
+		"""
+		Report all buffered processing times, one EMF record per function.
+
+		Returns:
+		    True if all timings were reported successfully, False otherwise
+		"""
+		with self._lock:
+			pending = self._timings
+			self._timings = {}
+
+		try:
+			for function_name, processing_times in pending.items():
+				metrics = create_metrics_logger()
+				metrics.set_dimensions({'Function': function_name})
+				for processing_time in processing_times:
+					metrics.put_metric('ProcessingTime', processing_time, 'Seconds')
+				metrics.flush_sync()
+			return True
+		except Exception as e:
+			logger.error(f'Error reporting processing time metrics: {e}')
+			return False
+
+	def _flush_periodically(self) -> None:
+		"""Flush the buffer every flush_interval seconds."""
+		while True:
+			time.sleep(self.flush_interval)
+			self.flush()
+
+
+# Shared processing time buffer, flushed on process exit so buffered timings are not lost
+processing_time_buffer = ProcessingTimeBuffer()
+atexit.register(processing_time_buffer.flush)
+
+
 def track_processing_time(func: Callable) -> Callable:
 	"""
 	Decorator to track processing time for a function and report it using EMF.
 
+	Timings are buffered in processing_time_buffer and reported in bulk.
+
 	Args:
 	    func: Function to track
 
@@ -90,22 +179,13 @@ def track_processing_time(func: Callable) -> Callable:
 
 	@functools.wraps(func)
 	def wrapper(*args, **kwargs):
-		@metric_scope
-		def _metric_wrapper(metrics: MetricsLogger):
-			start_time = time.time()
-			result = func(*args, **kwargs)
-			end_time = time.time()
-
-			processing_time = end_time - start_time
-
-			# Set dimensions and record processing time
-			metrics.set_dimensions({'Function': func.__name__})
-			metrics.put_metric('ProcessingTime', processing_time, 'Seconds')
-
-			logger.debug(f'Function {func.__name__} execution time: {processing_time:.2f} seconds')
+		start_time = time.perf_counter()
+		result = func(*args, **kwargs)
+		processing_time = time.perf_counter() - start_time
 
-			return result
+		processing_time_buffer.record(func.__name__, processing_time)
+		logger.debug(f'Function {func.__name__} execution time: {processing_time:.2f} seconds')
 
-		return _metric_wrapper()
+		return result
 
 	return wrapper
@@ -149,6 +149,14 @@ class BaselineRegionCompressorStack(Stack):
 			for key, value in props.tags.items():
 				Tags.of(self).add(key=key, value=value)
 
+		is_source = 'source' in props.source_target
+		is_target = 'target' in props.source_target
+
+		# The shared resources below are only used by the source and target services,
+		# so a region with neither role gets an empty stack
+		if not (is_source or is_target):
+			return
+
 		# Create VPC and Endpoints
 		# This creates a VPC with private isolated subnets and necessary VPC endpoints
 		self.vpc = create_vpc(scope=self, vpc_cidr=props.vpc_cidr, availability_zones=props.number_of_azs)
@@ -168,7 +176,7 @@ class BaselineRegionCompressorStack(Stack):
 			scope=self, stack_name=props.stack_name, notification_emails=props.notification_emails, kms_key=self.repository_kms_key
 		)
 
-		if 'source' in props.source_target:
+		if is_source:
 			SourceStack(
 				scope=self,
 				construct_id='SourceStack',
@@ -188,7 +196,7 @@ class BaselineRegionCompressorStack(Stack):
 				),
 			)
 
-		if 'target' in props.source_target:
+		if is_target:
 			self.target_stack = TargetStack(
 				scope=self,
 				construct_id='TargetStack',
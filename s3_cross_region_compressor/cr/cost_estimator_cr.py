@@ -7,14 +7,15 @@ This function calculates:
 """
 
 import boto3
+import functools
 import json
 import logging
-import urllib.request
+import urllib3
 
 #solve vuln B310
 import urllib.parse
 
-from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Optional, Any
 
 # Setup logging
@@ -24,8 +25,78 @@ logger.setLevel(logging.INFO)
 # URL for Fargate spot pricing
 FARGATE_PRICING_URL = 'https://dftu77xade0tc.cloudfront.net/fargate-spot-prices.json'
 
+# Shared HTTP connection pool, reused across warm invocations to avoid repeated TLS handshakes
+_http = urllib3.PoolManager(num_pools=2, maxsize=4)
 
-def get_fargate_spot_pricing(region: str) -> Tuple[Optional[Decimal], Optional[Decimal]]:
+# Fargate Spot price units used by the cost calculation
+FARGATE_PRICE_UNITS = frozenset(('ARM-vCPU-Hours', 'ARM-GB-Hours'))
+
+# Ephemeral storage price per region, cached across warm invocations
+_ephemeral_storage_prices: Dict[str, float] = {}
+
+# Data transfer price per (source region, destination region), cached across warm invocations
+_data_transfer_costs: Dict[Tuple[str, str], float] = {}
+
+# Free ephemeral storage included with every Fargate task, in GB
+FREE_EPHEMERAL_STORAGE_GB = 20
+
+# Pricing API client, created on first use and reused across warm invocations
+_pricing_client = None
+
+
+def _get_pricing_client() -> Any:
+	"""
+	Get the shared Pricing API client, creating it on first use.
+
+	Returns:
+	    boto3 Pricing API client in us-east-1 (the only region endpoint for pricing API)
+	"""
+	global _pricing_client
+	if _pricing_client is None:
+		_pricing_client = boto3.client('pricing', region_name='us-east-1')
+	return _pricing_client
+
+
+@functools.lru_cache(maxsize=1)
+def _fetch_pricing_data(url: str) -> Dict[str, Dict[str, float]]:
+	"""
+	Download the Fargate pricing JSON file and index its prices by region and unit.
+
+	The result is cached for the lifetime of the Lambda container, so warm
+	invocations skip the download and parse. Failures are not cached.
+
+	Args:
+	    url: URL of the pricing JSON file
+
+	Returns:
+	    dict: Mapping of region code to {unit: price per hour}
+	"""
+	#solve B301
+	parsed_url = urllib.parse.urlparse(url)
+	if parsed_url.scheme not in ('http', 'https'):
+		raise ValueError("Only HTTP and HTTPS URLs are allowed for Fargate pricing data.")
+
+	# Parse straight from the response stream rather than buffering the body first
+	response = _http.request('GET', url, preload_content=False)
+	try:
+		if response.status != 200:
+			raise ValueError(f'Unexpected HTTP status {response.status} fetching Fargate pricing data')
+		prices = json.load(response).get('prices', [])
+	finally:
+		response.release_conn()
+
+	# Keep only the units we price, so the cached index stays small
+	prices_by_region = {}
+	for price in prices:
+		unit = price.get('unit')
+		if unit in FARGATE_PRICE_UNITS:
+			region = price.get('attributes', {}).get('aws:region')
+			prices_by_region.setdefault(region, {})[unit] = float(price.get('price', {}).get('USD', '0'))
+
+	return prices_by_region
+
+
+def get_fargate_spot_pricing(region: str) -> Tuple[Optional[float], Optional[float]]:
 	"""
 	Get Fargate Spot pricing for a specific region from the pricing JSON file.
 
@@ -36,25 +107,12 @@ def get_fargate_spot_pricing(region: str) -> Tuple[Optional[Decimal], Optional[D
 	    tuple: (vCPU price per hour, Memory price per GB per hour) or (None, None) if not found
 	"""
 	try:
-		#solve B301
-		parsed_url = urllib.parse.urlparse(FARGATE_PRICING_URL)
-		if parsed_url.scheme not in ('http', 'https'):
-			raise ValueError("Only HTTP and HTTPS URLs are allowed for Fargate pricing data.")
-		
-		# Fetch the pricing data
-		with urllib.request.urlopen(FARGATE_PRICING_URL) as response:
-			pricing_data = json.loads(response.read().decode())
-
-		# Find ARM vCPU and memory prices for the specified region
-		vcpu_price = None
-		memory_price = None
-
-		for price in pricing_data.get('prices', []):
-			if price.get('attributes', {}).get('aws:region') == region:
-				if price.get('unit') == 'ARM-vCPU-Hours':
-					vcpu_price = Decimal(price.get('price', {}).get('USD', '0'))
-				elif price.get('unit') == 'ARM-GB-Hours':
-					memory_price = Decimal(price.get('price', {}).get('USD', '0'))
+		# Fetch the pricing data (cached across warm invocations)
+		region_prices = _fetch_pricing_data(FARGATE_PRICING_URL).get(region, {})
+
+		# Look up ARM vCPU and memory prices for the specified region
+		vcpu_price = region_prices.get('ARM-vCPU-Hours')
+		memory_price = region_prices.get('ARM-GB-Hours')
 
 		if not vcpu_price or not memory_price:
 			logger.warning(f'Could not find Fargate Spot pricing for region {region}')
@@ -67,7 +125,7 @@ def get_fargate_spot_pricing(region: str) -> Tuple[Optional[Decimal], Optional[D
 		return None, None
 
 
-def get_fargate_ephemeral_storage_price(region: str) -> Optional[Decimal]:
+def get_fargate_ephemeral_storage_price(region: str) -> Optional[float]:
 	"""
 	Get the price for Fargate ephemeral storage beyond the free tier (20GB) using the AWS Pricing API.
 
@@ -75,44 +133,39 @@ def get_fargate_ephemeral_storage_price(region: str) -> Optional[Decimal]:
 	    region: AWS region code (e.g., 'us-east-1')
 
 	Returns:
-	    Decimal: Cost per GB-Hour for ephemeral storage beyond 20GB, or None if not found
+	    float: Cost per GB-Hour for ephemeral storage beyond 20GB, or None if not found
 	"""
+	if region in _ephemeral_storage_prices:
+		return _ephemeral_storage_prices[region]
+
 	try:
-		# Initialize the pricing client in us-east-1 (the only region endpoint for pricing API)
-		pricing_client = boto3.client('pricing', region_name='us-east-1')
+		pricing_client = _get_pricing_client()
 
 		# Query for Fargate ephemeral storage pricing using the verified filters
-		response = pricing_client.get_products(
+		pages = pricing_client.get_paginator('get_products').paginate(
 			ServiceCode='AmazonECS',
 			Filters=[
 				{'Type': 'TERM_MATCH', 'Field': 'regionCode', 'Value': region},
 				{'Type': 'TERM_MATCH', 'Field': 'storagetype', 'Value': 'default'},
 			],
-			MaxResults=100,
+			PaginationConfig={'PageSize': 100},
 		)
 
-		# Parse the pricing data
-		for price_item_str in response.get('PriceList', []):
-			price_item = json.loads(price_item_str)
-
-			# Based on the CLI response, make sure we're looking at ephemeral storage
-			attributes = price_item.get('product', {}).get('attributes', {})
-			usage_type = attributes.get('usagetype', '')
-
-			# Check if this is Fargate Ephemeral Storage
-			if 'Fargate-EphemeralStorage-GB-Hours' in usage_type:
-				# Extract the price from the price list
-				terms = price_item.get('terms', {})
-				on_demand = terms.get('OnDemand', {})
-
-				# Extract the first pricing dimension we find
-				for dimension_key in on_demand:
-					price_dimensions = on_demand[dimension_key].get('priceDimensions', {})
-					for price_dimension in price_dimensions.values():
-						if 'pricePerUnit' in price_dimension:
-							usd_price = price_dimension['pricePerUnit'].get('USD')
-							if usd_price:
-								return Decimal(usd_price)
+		# Parse the pricing data, stopping at the first page with a match
+		for page in pages:
+			for price_item_str in page.get('PriceList', []):
+				price_item = json.loads(price_item_str)
+
+				# Based on the CLI response, make sure we're looking at ephemeral storage
+				attributes = price_item.get('product', {}).get('attributes', {})
+				usage_type = attributes.get('usagetype', '')
+
+				# Check if this is Fargate Ephemeral Storage
+				if 'Fargate-EphemeralStorage-GB-Hours' in usage_type:
+					usd_price = _parse_price_item(price_item)
+					if usd_price is not None:
+						_ephemeral_storage_prices[region] = usd_price
+						return usd_price
 
 		logger.warning(f'No ephemeral storage pricing found for region {region}')
 		return None
@@ -122,7 +175,7 @@ def get_fargate_ephemeral_storage_price(region: str) -> Optional[Decimal]:
 		return None
 
 
-def calculate_fargate_cost_per_minute(region: str, cpu: int, memory_mb: int, ephemeral_storage_gb: int = 20) -> Decimal:
+def calculate_fargate_cost_per_minute(region: str, cpu: int, memory_mb: int, ephemeral_storage_gb: int = 20) -> float:
 	"""
 	Calculate the cost of running Fargate per minute for the given resources.
 
@@ -133,28 +186,27 @@ def calculate_fargate_cost_per_minute(region: str, cpu: int, memory_mb: int, eph
 	    ephemeral_storage_gb: Ephemeral storage in GB (default 20)
 
 	Returns:
-	    Decimal: Cost per minute in USD
+	    float: Cost per minute in USD
 	"""
 	# Get Fargate spot pricing for CPU and memory
 	vcpu_price_per_hour, memory_price_per_hour = get_fargate_spot_pricing(region)
 
 	if not vcpu_price_per_hour or not memory_price_per_hour:
 		logger.warning(f'Could not find CPU/memory pricing for region {region}')
-		return Decimal('0')
+		return 0.0
 
 	# Convert CPU units to vCPU (1024 = 1 vCPU)
-	vcpu_count = Decimal(cpu) / Decimal('1024')
-	memory_gb = Decimal(memory_mb) / Decimal('1024')
+	vcpu_count = cpu / 1024
+	memory_gb = memory_mb / 1024
 
 	# Calculate compute and memory costs
-	compute_memory_cost = (vcpu_count * vcpu_price_per_hour) + (Decimal(memory_gb) * memory_price_per_hour)
+	compute_memory_cost = (vcpu_count * vcpu_price_per_hour) + (memory_gb * memory_price_per_hour)
 
 	# Calculate ephemeral storage cost (only for the portion above 20GB)
-	storage_cost = Decimal('0')
-	ephemeral_storage_gb = Decimal(ephemeral_storage_gb)
-	storage_gb_over_default = max(0, ephemeral_storage_gb - 20)
+	storage_cost = 0.0
 
-	if storage_gb_over_default > 0:
+	if ephemeral_storage_gb > FREE_EPHEMERAL_STORAGE_GB:
+		storage_gb_over_default = ephemeral_storage_gb - FREE_EPHEMERAL_STORAGE_GB
 		storage_price_per_gb_hour = get_fargate_ephemeral_storage_price(region)
 		if storage_price_per_gb_hour:
 			storage_cost = storage_gb_over_default * storage_price_per_gb_hour
@@ -166,43 +218,45 @@ def calculate_fargate_cost_per_minute(region: str, cpu: int, memory_mb: int, eph
 	hourly_cost = compute_memory_cost + storage_cost
 
 	# Convert to per minute cost
-	per_minute_cost = hourly_cost / Decimal('60')
+	per_minute_cost = hourly_cost / 60
 
 	return per_minute_cost
 
 
-def _get_data_transfer_cost(source_region: str, destination_region: str) -> Optional[Decimal]:
+def _get_data_transfer_cost(source_region: str, destination_region: str, pricing_client: Any) -> Optional[float]:
 	"""
 	Retrieve the cost per GB for data transfer from source_region to destination_region.
 
 	Args:
 	    source_region: The AWS source region code (e.g., 'us-east-1')
 	    destination_region: The AWS destination region code (e.g., 'eu-west-1')
+	    pricing_client: boto3 Pricing API client
 
 	Returns:
-	    Decimal: Cost per GB in USD, or None if pricing information could not be found
+	    float: Cost per GB in USD, or None if pricing information could not be found
 	"""
-	try:
-		# Initialize the pricing client in us-east-1 (the only region endpoint for pricing API)
-		session = boto3.Session()
-		pricing_client = session.client('pricing', region_name='us-east-1')
+	if (source_region, destination_region) in _data_transfer_costs:
+		return _data_transfer_costs[(source_region, destination_region)]
 
+	try:
 		# Query for data transfer pricing
-		response = pricing_client.get_products(
+		pages = pricing_client.get_paginator('get_products').paginate(
 			ServiceCode='AWSDataTransfer',
 			Filters=[
 				{'Type': 'TERM_MATCH', 'Field': 'fromRegionCode', 'Value': source_region},
 				{'Type': 'TERM_MATCH', 'Field': 'toRegionCode', 'Value': destination_region},
 				{'Type': 'TERM_MATCH', 'Field': 'transferType', 'Value': 'InterRegion Outbound'},
 			],
-			MaxResults=100,
+			PaginationConfig={'PageSize': 100},
 		)
 
-		# Parse the pricing data
-		cost = _parse_pricing_data(response)
-		if cost is not None:
-			logger.info(f'Data transfer cost from {source_region} to {destination_region}: ${cost} per GB')
-			return cost
+		# Parse the pricing data, stopping at the first page with a match
+		for page in pages:
+			cost = _parse_pricing_data(page)
+			if cost is not None:
+				logger.info(f'Data transfer cost from {source_region} to {destination_region}: ${cost} per GB')
+				_data_transfer_costs[(source_region, destination_region)] = cost
+				return cost
 
 		logger.warning(f'No pricing data found for transfer from {source_region} to {destination_region}')
 		return None
@@ -212,7 +266,7 @@ def _get_data_transfer_cost(source_region: str, destination_region: str) -> Opti
 		return None
 
 
-def _parse_pricing_data(response: dict) -> Optional[Decimal]:
+def _parse_pricing_data(response: dict) -> Optional[float]:
 	"""
 	Parse the AWS pricing API response to extract the cost per GB.
 
@@ -220,7 +274,7 @@ def _parse_pricing_data(response: dict) -> Optional[Decimal]:
 	    response: AWS Pricing API response
 
 	Returns:
-	    Decimal: Cost per GB in USD, or None if parsing fails
+	    float: Cost per GB in USD, or None if parsing fails
 	"""
 	try:
 		if 'PriceList' not in response or not response['PriceList']:
@@ -228,21 +282,9 @@ def _parse_pricing_data(response: dict) -> Optional[Decimal]:
 
 		# The pricing data is returned as a JSON string within the response
 		for price_item_str in response['PriceList']:
-			import json
-
-			price_item = json.loads(price_item_str)
-
-			terms = price_item.get('terms', {})
-			on_demand = terms.get('OnDemand', {})
-
-			# Extract the first pricing dimension we find
-			for dimension_key in on_demand:
-				price_dimensions = on_demand[dimension_key].get('priceDimensions', {})
-				for price_dimension in price_dimensions.values():
-					if 'pricePerUnit' in price_dimension:
-						usd_price = price_dimension['pricePerUnit'].get('USD')
-						if usd_price:
-							return Decimal(usd_price)
+			usd_price = _parse_price_item(json.loads(price_item_str))
+			if usd_price is not None:
+				return usd_price
 
 		return None
 
@@ -251,10 +293,70 @@ def _parse_pricing_data(response: dict) -> Optional[Decimal]:
 		return None
 
 
+def _parse_price_item(price_item: dict) -> Optional[float]:
+	"""
+	Extract the first on-demand USD price from a single Pricing API price item.
+
+	Args:
+	    price_item: Parsed price item from a Pricing API PriceList
+
+	Returns:
+	    float: Price in USD, or None if the item has no USD price
+	"""
+	on_demand = price_item.get('terms', {}).get('OnDemand', {})
+
+	# Extract the first pricing dimension we find
+	for term in on_demand.values():
+		for price_dimension in term.get('priceDimensions', {}).values():
+			if 'pricePerUnit' in price_dimension:
+				usd_price = price_dimension['pricePerUnit'].get('USD')
+				if usd_price:
+					return float(usd_price)
+
+	return None
+
+
+def _get_all_transfer_costs_from(source_region: str, pricing_client: Any) -> Dict[str, float]:
+	"""
+	Retrieve the cost per GB for data transfer from source_region to every other region in one query.
+
+	Args:
+	    source_region: The AWS source region code (e.g., 'us-east-1')
+	    pricing_client: boto3 Pricing API client
+
+	Returns:
+	    dict: Mapping of destination region code to cost per GB in USD, empty on error
+	"""
+	costs = {}
+	try:
+		pages = pricing_client.get_paginator('get_products').paginate(
+			ServiceCode='AWSDataTransfer',
+			Filters=[
+				{'Type': 'TERM_MATCH', 'Field': 'fromRegionCode', 'Value': source_region},
+				{'Type': 'TERM_MATCH', 'Field': 'transferType', 'Value': 'InterRegion Outbound'},
+			],
+			PaginationConfig={'PageSize': 100},
+		)
+
+		for page in pages:
+			for price_item_str in page.get('PriceList', []):
+				price_item = json.loads(price_item_str)
+				destination_region = price_item.get('product', {}).get('attributes', {}).get('toRegionCode')
+				if destination_region and destination_region not in costs:
+					usd_price = _parse_price_item(price_item)
+					if usd_price is not None:
+						costs[destination_region] = usd_price
+
+	except Exception as e:
+		logger.exception(f'Error retrieving data transfer costs from {source_region}: {str(e)}')
+
+	return costs
+
+
 def get_average_data_transfer_cost(
 	source_region: str,
 	destination_regions: List[str],
-) -> Optional[Decimal]:
+) -> Optional[float]:
 	"""
 	Retrieve the average cost per GB for data transfer from source_region to multiple destination_regions.
 
@@ -263,19 +365,36 @@ def get_average_data_transfer_cost(
 	    destination_regions: List of AWS destination region codes
 
 	Returns:
-	    Decimal: Average cost per GB in USD across all destination regions,
+	    float: Average cost per GB in USD across all destination regions,
 	             or None if pricing information could not be found for any region
 	"""
 	if not destination_regions:
 		logger.warning('No destination regions provided')
 		return None
 
-	costs = []
-
-	for destination_region in destination_regions:
-		cost = _get_data_transfer_cost(source_region, destination_region)
-		if cost is not None:
-			costs.append(cost)
+	# Create the shared client before fanning out so the threads reuse it
+	pricing_client = _get_pricing_client()
+
+	# Fetch the prices to every destination with a single query, unless they are all cached
+	if any((source_region, region) not in _data_transfer_costs for region in destination_regions):
+		for region, cost in _get_all_transfer_costs_from(source_region, pricing_client).items():
+			_data_transfer_costs[(source_region, region)] = cost
+
+	costs = [
+		_data_transfer_costs[(source_region, region)]
+		for region in destination_regions
+		if (source_region, region) in _data_transfer_costs
+	]
+	missing_regions = [region for region in destination_regions if (source_region, region) not in _data_transfer_costs]
+
+	# Fall back to per-region queries, in parallel, for any destination the bulk query missed
+	if missing_regions:
+		with ThreadPoolExecutor(max_workers=min(10, len(missing_regions))) as executor:
+			results = executor.map(
+				lambda destination_region: _get_data_transfer_cost(source_region, destination_region, pricing_client),
+				missing_regions,
+			)
+			costs.extend(cost for cost in results if cost is not None)
 
 	if not costs:
 		logger.warning(f'No valid pricing data found for transfer from {source_region} to any of the provided regions')
@@ -311,10 +430,9 @@ def send_cfn_response(
 		'Data': response_data,
 	}
 
-	logger.info(f'Sending response: {json.dumps(response_body)}')
-
-	# Convert Decimal objects to strings for JSON serialization
-	response_json = json.dumps(response_body, default=lambda x: str(x) if isinstance(x, Decimal) else x)
+	response_json = json.dumps(response_body)
+	logger.info(f'Sending response: {response_json}')
+	response_bytes = response_json.encode('utf-8')
 
 	# Send the response back to CloudFormation
 	response_url = event.get('ResponseURL')
@@ -323,19 +441,17 @@ def send_cfn_response(
 		logger.warning('No ResponseURL found in event')
 		return
 
-	headers = {'Content-Type': '', 'Content-Length': str(len(response_json))}
+	headers = {'Content-Type': '', 'Content-Length': str(len(response_bytes))}
 
 	parsed_url = urllib.parse.urlparse(response_url)
 	if parsed_url.scheme not in ('http', 'https'):
 		logger.error(f"Refusing to send response to non-HTTP(S) URL: {response_url}")
 		return
 
-	req = urllib.request.Request(url=response_url, data=response_json.encode('utf-8'), headers=headers, method='PUT')
-
 	try:
-		with urllib.request.urlopen(req) as response:
-			logger.info(f'Status code: {response.getcode()}')
-			logger.info(f'Status message: {response.msg}')
+		response = _http.request('PUT', response_url, body=response_bytes, headers=headers)
+		logger.info(f'Status code: {response.status}')
+		logger.info(f'Status message: {response.reason}')
 	except Exception as e:
 		logger.error(f'Error sending response to CloudFormation: {str(e)}')
 
@@ -348,7 +464,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> None:
 	    event: Lambda event data
 	    context: Lambda context
 	"""
-	logger.info(f'Received event: {json.dumps(event, default=str)}')
+	# Only serialize the event when INFO logging is enabled
+	if logger.isEnabledFor(logging.INFO):
+		logger.info(f'Received event: {json.dumps(event, default=str)}')
 
 	# Initialize response data
 	response_data = {}
@@ -363,7 +481,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> None:
 			return
 
 		# Extract parameters from the event
-		logger.info(f'Extracting parameters from the event: {event}')
+		if logger.isEnabledFor(logging.INFO):
+			logger.info(f'Extracting parameters from the event: {event}')
 		resource_property = event.get('ResourceProperties', {})
 		region = resource_property.get('AwsRegion')
 		cpu = resource_property.get('FargateCpu')
@@ -371,15 +490,15 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> None:
 		ephemeral_disk = resource_property.get('FargateEphemeralDisk', '20')  # Default to 20GB if not specified
 		target_regions_str = resource_property.get('TargetRegions', '')
 
-		# Parse the target regions list
+		# Parse the target regions into a list once, whichever form they arrive in
 		target_regions = (
 			[r.strip() for r in target_regions_str.split(',')]
 			if isinstance(target_regions_str, str)
-			else target_regions_str
+			else list(target_regions_str)
 		)
 
 		# Validate required parameters
-		if not all([region, cpu, memory]):
+		if not (region and cpu and memory):
 			error_msg = 'Missing required parameters. Required: AwsRegion, FargateCpu, FargateMemory'
 			logger.error(error_msg)
 			send_cfn_response(event, context, 'FAILED', {'Error': error_msg})
@@ -398,13 +517,14 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> None:
 			'FargateCostPerMinute': str(fargate_cost_per_minute),
 			'AverageDataTransferCostPerGB': str(avg_data_transfer_cost) if avg_data_transfer_cost else '0',
 			'Region': region,
-			'TargetRegions': ','.join(target_regions) if isinstance(target_regions, list) else target_regions,
+			'TargetRegions': ','.join(target_regions),
 			'EphemeralDiskGB': ephemeral_disk,
 			'CPU': cpu,
 			'MemoryGB': memory,
 		}
 
-		logger.info(f'Calculation results: {json.dumps(response_data, default=str)}')
+		if logger.isEnabledFor(logging.INFO):
+			logger.info(f'Calculation results: {json.dumps(response_data, default=str)}')
 		send_cfn_response(event, context, 'SUCCESS', response_data)
 
 	except Exception as e:
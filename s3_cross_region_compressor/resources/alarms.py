@@ -6,6 +6,7 @@ various aspects of the application, including DLQ message counts,
 ECS task failures, and service utilization.
 """
 
+from typing import Callable, Dict, Tuple
 from constructs import Construct
 from aws_cdk import (
 	Duration,
@@ -20,8 +21,61 @@ from s3_cross_region_compressor.utils.ecs_utils import (
 	create_desired_count_metric,
 )
 
+# Task count metrics already built, keyed by (cluster address, service address, metric factory name)
+_task_count_metrics: Dict[Tuple[str, str, str], cw.Metric] = {}
 
-def create_dlq_alarm(scope: Construct, id: str, dlq_queue: sqs.Queue, sns_topic: sns.Topic) -> cw.Alarm:
+
+def _get_task_count_metric(
+	factory: Callable[[ecs.Cluster, ecs.FargateService], cw.Metric],
+	ecs_cluster: ecs.Cluster,
+	ecs_service: ecs.FargateService,
+) -> cw.Metric:
+	"""
+	Get a task count metric for a service, building it only once per service.
+
+	Args:
+	    factory: Metric factory, e.g. create_desired_count_metric
+	    ecs_cluster: The ECS cluster to monitor
+	    ecs_service: The ECS service to monitor
+
+	Returns:
+	    The CloudWatch metric shared by every alarm on this service
+	"""
+	key = (ecs_cluster.node.addr, ecs_service.node.addr, factory.__name__)
+	if key not in _task_count_metrics:
+		_task_count_metrics[key] = factory(ecs_cluster, ecs_service)
+	return _task_count_metrics[key]
+
+
+# SNS alarm actions already built, keyed by topic address
+_sns_actions: Dict[str, cw_actions.SnsAction] = {}
+
+
+def _get_sns_action(sns_topic: sns.Topic) -> cw_actions.SnsAction:
+	"""
+	Get the alarm action notifying a topic, building it only once per topic.
+
+	Args:
+	    sns_topic: The SNS topic to notify
+
+	Returns:
+	    The SNS action shared by every alarm notifying this topic
+	"""
+	key = sns_topic.node.addr
+	if key not in _sns_actions:
+		_sns_actions[key] = cw_actions.SnsAction(sns_topic)
+	return _sns_actions[key]
+
+
+def create_dlq_alarm(
+	scope: Construct,
+	id: str,
+	dlq_queue: sqs.Queue,
+	sns_topic: sns.Topic,
+	period: Duration = Duration.minutes(5),
+	evaluation_periods: int = 2,
+	datapoints_to_alarm: int = 1,
+) -> cw.Alarm:
 	"""
 	Create an alarm that triggers when ANY message appears in a DLQ.
 
@@ -30,12 +84,15 @@ def create_dlq_alarm(scope: Construct, id: str, dlq_queue: sqs.Queue, sns_topic:
 	    id: Identifier for the alarm resources
 	    dlq_queue: The DLQ to monitor
 	    sns_topic: The SNS topic to notify
+	    period: Period over which the DLQ depth is evaluated (default: 5 minutes)
+	    evaluation_periods: Number of periods to evaluate (default: 2)
+	    datapoints_to_alarm: Number of breaching periods needed to alarm (default: 1)
 
 	Returns:
 	    A CloudWatch alarm that triggers when any messages are in the DLQ
 	"""
 	alarm = dlq_queue.metric_approximate_number_of_messages_visible(
-		period=Duration.minutes(1), statistic='Sum'
+		period=period, statistic='Sum'
 	).create_alarm(
 		scope=scope,
 		id=f'DLQAlarm-{id}',
@@ -43,18 +100,26 @@ def create_dlq_alarm(scope: Construct, id: str, dlq_queue: sqs.Queue, sns_topic:
 		alarm_description=f'Alarm when ANY message appears in DLQ {dlq_queue.queue_name}',
 		threshold=0,
 		comparison_operator=cw.ComparisonOperator.GREATER_THAN_THRESHOLD,
-		evaluation_periods=1,
+		evaluation_periods=evaluation_periods,
+		datapoints_to_alarm=datapoints_to_alarm,
 		treat_missing_data=cw.TreatMissingData.NOT_BREACHING,
 	)
 
 	# Add SNS action
-	alarm.add_alarm_action(cw_actions.SnsAction(sns_topic))
+	alarm.add_alarm_action(_get_sns_action(sns_topic))
 
 	return alarm
 
 
 def create_ecs_task_failures_alarm(
-	scope: Construct, id: str, ecs_cluster: ecs.Cluster, ecs_service: ecs.FargateService, sns_topic: sns.Topic
+	scope: Construct,
+	id: str,
+	ecs_cluster: ecs.Cluster,
+	ecs_service: ecs.FargateService,
+	sns_topic: sns.Topic,
+	period: Duration = Duration.minutes(5),
+	evaluation_periods: int = 5,
+	datapoints_to_alarm: int = 3,
 ) -> cw.Alarm:
 	"""
 	Create an alarm for ECS task failures.
@@ -68,23 +133,26 @@ def create_ecs_task_failures_alarm(
 	    ecs_cluster: The ECS cluster to monitor
 	    ecs_service: The ECS service to monitor
 	    sns_topic: The SNS topic to notify
+	    period: Period over which the task count gap is evaluated (default: 5 minutes)
+	    evaluation_periods: Number of periods to evaluate (default: 5)
+	    datapoints_to_alarm: Number of breaching periods needed to alarm (default: 3)
 
 	Returns:
 	    A CloudWatch alarm that triggers when tasks are failing repeatedly
 	"""
 	# Create metrics for desired and running tasks
-	desired_task_count = create_desired_count_metric(ecs_cluster, ecs_service)
-	running_task_count = create_running_task_count_metric(ecs_cluster, ecs_service)
+	desired_task_count = _get_task_count_metric(create_desired_count_metric, ecs_cluster, ecs_service)
+	running_task_count = _get_task_count_metric(create_running_task_count_metric, ecs_cluster, ecs_service)
 
 	# Create a math expression for the difference
 	task_failure_expression = cw.MathExpression(
 		expression='m1 - m2',
 		using_metrics={'m1': desired_task_count, 'm2': running_task_count},
 		label='Task failures (desired - running)',
-		period=Duration.seconds(60),
+		period=period,
 	)
 
-	# Create alarm for when difference persists
+	# Create alarm for when difference persists, ignoring a single transient dip
 	alarm = cw.Alarm(
 		scope=scope,
 		id=f'TaskFailuresAlarm-{id}',
@@ -93,12 +161,13 @@ def create_ecs_task_failures_alarm(
 		metric=task_failure_expression,
 		threshold=1,
 		comparison_operator=cw.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
-		evaluation_periods=3,  # Tasks failing for 3 consecutive periods (3 minutes)
+		evaluation_periods=evaluation_periods,
+		datapoints_to_alarm=datapoints_to_alarm,
 		treat_missing_data=cw.TreatMissingData.NOT_BREACHING,
 	)
 
 	# Add SNS action
-	alarm.add_alarm_action(cw_actions.SnsAction(sns_topic))
+	alarm.add_alarm_action(_get_sns_action(sns_topic))
 
 	return alarm
 
@@ -110,6 +179,9 @@ def create_max_capacity_alarm(
 	ecs_service: ecs.FargateService,
 	max_capacity: int,
 	sns_topic: sns.Topic,
+	period: Duration = Duration.minutes(5),
+	evaluation_periods: int = 4,
+	datapoints_to_alarm: int = 3,
 ) -> cw.Alarm:
 	"""
 	Create an alarm that triggers when a service is at max capacity for extended periods.
@@ -124,35 +196,32 @@ def create_max_capacity_alarm(
 	    ecs_service: The ECS service to monitor
 	    max_capacity: The maximum capacity of the service
 	    sns_topic: The SNS topic to notify
+	    period: Period over which the desired task count is evaluated (default: 5 minutes)
+	    evaluation_periods: Number of periods to evaluate (default: 4)
+	    datapoints_to_alarm: Number of breaching periods needed to alarm (default: 3)
 
 	Returns:
 	    A CloudWatch alarm that triggers when service is at max capacity for extended periods
 	"""
 	# Get desired task count metric
-	desired_task_count = create_desired_count_metric(ecs_cluster, ecs_service)
-
-	# Create a math expression to check if desired count equals max capacity
-	at_max_capacity_expression = cw.MathExpression(
-		expression=f'm1 >= {max_capacity}',
-		using_metrics={'m1': desired_task_count},
-		label=f'At max capacity ({max_capacity} tasks)',
-		period=Duration.seconds(60),
-	)
+	desired_task_count = _get_task_count_metric(create_desired_count_metric, ecs_cluster, ecs_service)
 
-	# Alarm when at max capacity for 15+ minutes
+	# Alarm when at max capacity for most of the evaluation window: the lowest desired count
+	# in each period is compared directly, without a math expression
 	alarm = cw.Alarm(
 		scope=scope,
 		id=f'MaxCapacityAlarm-{id}',
 		alarm_name=f'Service-At-Max-Capacity-{id}',
 		alarm_description=f'Alarm when service {id} is at maximum capacity for extended periods',
-		metric=at_max_capacity_expression,
-		threshold=0.5,  # Slightly less than 1 to account for potential metric variability
-		comparison_operator=cw.ComparisonOperator.GREATER_THAN_THRESHOLD,
-		evaluation_periods=15,  # 15 minutes at max capacity
+		metric=desired_task_count.with_(period=period, statistic='Minimum'),
+		threshold=max_capacity,
+		comparison_operator=cw.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+		evaluation_periods=evaluation_periods,
+		datapoints_to_alarm=datapoints_to_alarm,
 		treat_missing_data=cw.TreatMissingData.NOT_BREACHING,
 	)
 
 	# Add SNS action
-	alarm.add_alarm_action(cw_actions.SnsAction(sns_topic))
+	alarm.add_alarm_action(_get_sns_action(sns_topic))
 
 	return alarm
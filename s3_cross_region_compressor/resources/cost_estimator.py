@@ -7,7 +7,7 @@ between AWS regions.
 """
 
 from constructs import Construct
-from aws_cdk import aws_lambda as lambda_, aws_iam as iam, Duration, CustomResource, CfnOutput, Stack
+from aws_cdk import aws_lambda as lambda_, aws_iam as iam, Duration, CustomResource, CfnOutput
 from typing import List
 
 
@@ -40,7 +40,6 @@ def cr_cost_estimator(
 	scope.avg_data_transfer_cost = cost_estimator_cr.get_att_string('AverageDataTransferCostPerGB')
 
 	# Create CloudFormation outputs
-	Stack.of(scope)
 	CfnOutput(
 		scope,
 		'FargateCostPerMinuteOutput',
@@ -5,41 +5,80 @@ This module provides functions for creating a consolidated CloudWatch Dashboard
 that displays metrics for all source prefixes in a tabular format.
 
 Key features:
-- One consolidated dashboard per source region
+- One consolidated dashboard for all source regions, with a Region selector
 - Tabular view of metrics by source bucket and prefix
 - Overview of regional performance metrics
 - Time series analysis of compression performance
 """
 
+from typing import Any, Dict, List, Optional, Tuple
 from constructs import Construct
 from aws_cdk import (
 	aws_cloudwatch as cw,
 	Stack,
 )
 
+# Search terms restricting metrics to the dashboard variables' selected values
+_VAR_FILTER = ' SourceBucket=SourceBucket SourcePrefix=SourcePrefix TargetRegion=TargetRegion'
+# For metrics that don't have the TargetRegion dimension
+_VAR_FILTER_NO_REGION = ' SourceBucket=SourceBucket SourcePrefix=SourcePrefix'
 
-def create_compression_dashboard(scope: Construct, stack_name: str) -> cw.Dashboard:
+
+def get_source_regions(replication_config: List[Dict[str, Any]]) -> List[str]:
+	"""
+	List the source regions of the replication configuration, in configuration order.
+
+	The first one hosts the compression dashboard for all of them.
+
+	Args:
+	    replication_config: Replication configuration
+
+	Returns:
+	    The distinct source regions
+	"""
+	return list(dict.fromkeys(config['source']['region'] for config in replication_config))
+
+
+def create_compression_dashboard(
+	scope: Construct, stack_name: str, replication_config: Optional[List[Dict[str, Any]]] = None
+) -> cw.Dashboard:
 	"""
 	Create a consolidated CloudWatch Dashboard for visualizing compression metrics.
 
-	Creates a single dashboard per region that displays metrics for all source buckets
-	and prefixes in a tabular format, along with overview metrics and time series graphs.
+	Creates a single dashboard for all source regions that displays metrics for all source
+	buckets and prefixes in a tabular format, along with overview metrics and time series graphs.
+	A Region variable points every widget at the selected source region.
 
 	Args:
 	    scope: The CDK construct scope
 	    stack_name: Name of the stack for resource naming
+	    replication_config: Replication configuration, used to list the source regions and
+	        the metrics of their sources explicitly instead of searching for them
 
 	Returns:
 	    A CloudWatch Dashboard displaying compression metrics
 	"""
 	# Get current region from the stack
 	region = Stack.of(scope).region
+	source_regions = get_source_regions(replication_config or []) or [region]
 
 	dashboard = cw.Dashboard(
 		scope,
 		f'{stack_name}-Compression-Dashboard',
-		dashboard_name=f'{stack_name}-{region}-Compression-Metrics',
+		dashboard_name=f'{stack_name}-Compression-Metrics',
 		variables=[
+			cw.DashboardVariable(
+				id='Region',
+				type=cw.VariableType.PROPERTY,
+				label='Region',
+				input_type=cw.VariableInputType.SELECT,
+				visible=True,
+				value='region',
+				values=cw.Values.from_values(
+					*(cw.VariableValue(value=source_region) for source_region in source_regions)
+				),
+				default_value=cw.DefaultValue.value(region),
+			),
 			cw.DashboardVariable(
 				id='SourceBucket',
 				type=cw.VariableType.PROPERTY,
@@ -88,6 +127,7 @@ def create_compression_dashboard(scope: Construct, stack_name: str) -> cw.Dashbo
 		stack_name,
 		filter_by_variables=False,
 		section_title='compression performance metrics across all sources',
+		source_dimensions=_enumerate_source_dimensions(replication_config or []),
 	)
 	_add_overview_section(
 		dashboard,
@@ -99,8 +139,80 @@ def create_compression_dashboard(scope: Construct, stack_name: str) -> cw.Dashbo
 	return dashboard
 
 
+def _enumerate_source_dimensions(
+	replication_config: List[Dict[str, Any]],
+) -> Optional[List[Tuple[str, str, List[str]]]]:
+	"""
+	List the metric dimensions emitted by the sources of every source region.
+
+	The source service reports its configured prefix_filter as the SourcePrefix
+	dimension, or 'root' when no prefix_filter is set. Sources of other regions
+	than the selected one simply have no data in it.
+
+	Args:
+	    replication_config: Replication configuration
+
+	Returns:
+	    List of (SourceBucket, SourcePrefix, [TargetRegion, ...]) tuples, or None if
+	    there are no sources
+	"""
+	source_dimensions = []
+	for config in replication_config:
+		source = config['source']
+		prefix = source.get('prefix_filter') or 'root'
+		target_regions = list(dict.fromkeys(destination['region'] for destination in config['destinations']))
+		source_dimensions.append((source['bucket'], prefix, target_regions))
+
+	return source_dimensions or None
+
+
+def _metric_list_expression(
+	function: str,
+	stack_name: str,
+	metric_name: str,
+	statistic: str,
+	dimensions_maps: List[Dict[str, str]],
+	label: str,
+	suffix: str = '',
+) -> cw.MathExpression:
+	"""
+	Build a math expression over an explicit list of metrics.
+
+	Metric ids are prefixed with the metric name and statistic, so expressions over
+	different metrics can share a widget without their ids colliding.
+
+	Args:
+	    function: Expression applied to the metric array, e.g. 'SUM({})' or 'AVG(REMOVE_EMPTY({}))'
+	    stack_name: Name of the stack for metric namespace
+	    metric_name: Name of the metric
+	    statistic: Statistic of each metric
+	    dimensions_maps: Dimensions of each metric to include
+	    label: Label of the expression
+	    suffix: Text appended to the expression, e.g. a unit conversion
+
+	Returns:
+	    The math expression
+	"""
+	id_prefix = f'{metric_name[0].lower()}{metric_name[1:]}{statistic}'
+	using_metrics = {
+		f'{id_prefix}{index}': cw.Metric(
+			namespace=stack_name, metric_name=metric_name, dimensions_map=dimensions_map, statistic=statistic
+		)
+		for index, dimensions_map in enumerate(dimensions_maps)
+	}
+	return cw.MathExpression(
+		expression=function.format('[' + ','.join(using_metrics) + ']') + suffix,
+		using_metrics=using_metrics,
+		label=label,
+	)
+
+
 def _add_overview_section(
-	dashboard: cw.Dashboard, stack_name: str, filter_by_variables: bool, section_title: str
+	dashboard: cw.Dashboard,
+	stack_name: str,
+	filter_by_variables: bool,
+	section_title: str,
+	source_dimensions: Optional[List[Tuple[str, str, List[str]]]] = None,
 ) -> None:
 	"""
 	Add overview metrics section to the dashboard.
@@ -110,130 +222,182 @@ def _add_overview_section(
 	    stack_name: Name of the stack for metric namespace
 	    filter_by_variables: If True, filter metrics by dashboard variables
 	    section_title: Title to display in the section header
+	    source_dimensions: Dimensions of every source metric, from _enumerate_source_dimensions.
+	        When given, the metrics are read directly instead of through SEARCH expressions
+	"""
+	if source_dimensions and not filter_by_variables:
+		_add_overview_widgets(dashboard, section_title, *_build_listed_expressions(stack_name, source_dimensions))
+		return
+
+	_add_overview_widgets(dashboard, section_title, *_build_overview_expressions(stack_name, filter_by_variables))
+
+
+def _build_overview_expressions(stack_name: str, filter_by_variables: bool) -> Tuple[cw.MathExpression, ...]:
+	"""
+	Build the overview SEARCH expressions.
+
+	Args:
+	    stack_name: Name of the stack for metric namespace
+	    filter_by_variables: If True, filter metrics by dashboard variables
+
+	Returns:
+	    The overview expressions, in the order expected by _add_overview_widgets
 	"""
 	# Variable filter string to add to search expressions if needed
-	var_filter = ''
-	var_filter_no_region = ''
-	if filter_by_variables:
-		var_filter = ' SourceBucket=SourceBucket SourcePrefix=SourcePrefix TargetRegion=TargetRegion'
-		# For metrics that don't have TargetRegion dimension, we need to remove that part from var_filter
-		var_filter_no_region = var_filter.replace(' TargetRegion=TargetRegion', '')
+	var_filter = _VAR_FILTER if filter_by_variables else ''
+	var_filter_no_region = _VAR_FILTER_NO_REGION if filter_by_variables else ''
+
+	# Metrics with SourceBucket, SourcePrefix, TargetRegion dimensions
+	region_schema = f'{{{stack_name},SourceBucket,SourcePrefix,TargetRegion}}'
+	# Metrics with SourceBucket, SourcePrefix dimensions
+	source_schema = f'{{{stack_name},SourceBucket,SourcePrefix}}'
 
 	# For metrics that have dimensions, we need to use a search expression to aggregate across all dimension values
-	# Original Size - Using search expression since it uses SourceBucket, SourcePrefix, TargetRegion dimensions
-	original_size_sum = cw.MathExpression(
-		expression="SUM(SEARCH('{"
-		+ stack_name
-		+ ',SourceBucket,SourcePrefix,TargetRegion}'
-		+ var_filter
-		+ " MetricName=\"OriginalSize\"', 'Sum'))",
-		label='Total Original Size',
+	return (
+		cw.MathExpression(
+			expression=f"SUM(SEARCH('{region_schema} MetricName=\"OriginalSize\"{var_filter}', 'Sum'))",
+			label='Total Original Size',
+		),
+		cw.MathExpression(
+			expression=f"SUM(SEARCH('{region_schema} MetricName=\"CompressedSize\"{var_filter}', 'Sum'))",
+			label='Total Compressed Size',
+		),
+		cw.MathExpression(
+			expression=f"SUM(SEARCH('{region_schema} MetricName=\"BytesSaved\"{var_filter}', 'Sum'))",
+			label='Total Bytes Saved',
+		),
+		cw.MathExpression(
+			expression=(
+				f"AVG(REMOVE_EMPTY(SEARCH('{source_schema} MetricName=\"CompressionRatio\""
+				f"{var_filter_no_region}', 'Average')))"
+			),
+			label='Average Compression Ratio',
+		),
+		cw.MathExpression(
+			expression=(
+				f"AVG(REMOVE_EMPTY(SEARCH('{source_schema} MetricName=\"TransferEfficiency\""
+				f"{var_filter_no_region}', 'Average')))"
+			),
+			label='Average Transfer Efficiency (%)',
+		),
+		cw.MathExpression(
+			expression=(
+				f"AVG(REMOVE_EMPTY(SEARCH('{source_schema} MetricName=\"CompressionThroughput\""
+				f"{var_filter_no_region}', 'Average')))"
+			),
+			label='Average Compression Throughput (MB/s)',
+		),
+		cw.MathExpression(
+			expression=(
+				f"SUM(SEARCH('{source_schema} MetricName=\"CompressionThroughput\""
+				f"{var_filter_no_region}', 'Sum')) / 1024"
+			),
+			label='Aggregated Compression Throughput (GB/s)',
+		),
 	)
 
-	# Compressed Size - Using search expression since it uses SourceBucket, SourcePrefix, TargetRegion dimensions
-	compressed_size_sum = cw.MathExpression(
-		expression="SUM(SEARCH('{"
-		+ stack_name
-		+ ',SourceBucket,SourcePrefix,TargetRegion}'
-		+ var_filter
-		+ " MetricName=\"CompressedSize\"', 'Sum'))",
-		label='Total Compressed Size',
-	)
 
-	# Bytes Saved - Using search expression since it uses SourceBucket, SourcePrefix, TargetRegion dimensions
-	bytes_saved_sum = cw.MathExpression(
-		expression="SUM(SEARCH('{"
-		+ stack_name
-		+ ',SourceBucket,SourcePrefix,TargetRegion}'
-		+ var_filter
-		+ " MetricName=\"BytesSaved\"', 'Sum'))",
-		label='Total Bytes Saved',
-	)
+def _build_listed_expressions(
+	stack_name: str, source_dimensions: List[Tuple[str, str, List[str]]]
+) -> Tuple[cw.MathExpression, ...]:
+	"""
+	Build the overview expressions from an explicit list of source metrics.
 
-	# Compression Ratio - Using search expression since it uses SourceBucket, SourcePrefix dimensions
-	compression_ratio_avg = cw.MathExpression(
-		expression="AVG(REMOVE_EMPTY(SEARCH('{"
-		+ stack_name
-		+ ',SourceBucket,SourcePrefix}'
-		+ var_filter_no_region
-		+ " MetricName=\"CompressionRatio\"', 'Average')))",
-		label='Average Compression Ratio',
-	)
+	Args:
+	    stack_name: Name of the stack for metric namespace
+	    source_dimensions: Dimensions of every source metric, from _enumerate_source_dimensions
 
-	# Transfer Efficiency - Using search expression since it uses SourceBucket, SourcePrefix dimensions
-	transfer_efficiency_avg = cw.MathExpression(
-		expression="AVG(REMOVE_EMPTY(SEARCH('{"
-		+ stack_name
-		+ ',SourceBucket,SourcePrefix}'
-		+ var_filter_no_region
-		+ " MetricName=\"TransferEfficiency\"', 'Average')))",
-		label='Average Transfer Efficiency (%)',
-	)
+	Returns:
+	    The overview expressions, in the order expected by _add_overview_widgets
+	"""
+	source_dims = [{'SourceBucket': bucket, 'SourcePrefix': prefix} for bucket, prefix, _ in source_dimensions]
+	region_dims = [
+		{'SourceBucket': bucket, 'SourcePrefix': prefix, 'TargetRegion': target_region}
+		for bucket, prefix, target_regions in source_dimensions
+		for target_region in target_regions
+	]
 
-	# Compression Throughput - Using search expression since it uses SourceBucket, SourcePrefix dimensions
-	compression_throughput_avg = cw.MathExpression(
-		expression="AVG(REMOVE_EMPTY(SEARCH('{"
-		+ stack_name
-		+ ',SourceBucket,SourcePrefix}'
-		+ var_filter_no_region
-		+ " MetricName=\"CompressionThroughput\"', 'Average')))",
-		label='Average Compression Throughput (MB/s)',
+	return (
+		_metric_list_expression('SUM({})', stack_name, 'OriginalSize', 'Sum', region_dims, 'Total Original Size'),
+		_metric_list_expression('SUM({})', stack_name, 'CompressedSize', 'Sum', region_dims, 'Total Compressed Size'),
+		_metric_list_expression('SUM({})', stack_name, 'BytesSaved', 'Sum', region_dims, 'Total Bytes Saved'),
+		_metric_list_expression(
+			'AVG(REMOVE_EMPTY({}))', stack_name, 'CompressionRatio', 'Average', source_dims, 'Average Compression Ratio'
+		),
+		_metric_list_expression(
+			'AVG(REMOVE_EMPTY({}))',
+			stack_name,
+			'TransferEfficiency',
+			'Average',
+			source_dims,
+			'Average Transfer Efficiency (%)',
+		),
+		_metric_list_expression(
+			'AVG(REMOVE_EMPTY({}))',
+			stack_name,
+			'CompressionThroughput',
+			'Average',
+			source_dims,
+			'Average Compression Throughput (MB/s)',
+		),
+		_metric_list_expression(
+			'SUM({})',
+			stack_name,
+			'CompressionThroughput',
+			'Sum',
+			source_dims,
+			'Aggregated Compression Throughput (GB/s)',
+			suffix=' / 1024',
+		),
 	)
 
-	compression_throughput_sum = cw.MathExpression(
-		expression="SUM(SEARCH('{"
-		+ stack_name
-		+ ',SourceBucket,SourcePrefix}'
-		+ var_filter_no_region
-		+ " MetricName=\"CompressionThroughput\"', 'Sum')) / 1024",
-		label='Aggregated Compression Throughput (GB/s)',
-	)
 
+def _add_overview_widgets(
+	dashboard: cw.Dashboard,
+	section_title: str,
+	original_size_sum: cw.MathExpression,
+	compressed_size_sum: cw.MathExpression,
+	bytes_saved_sum: cw.MathExpression,
+	compression_ratio_avg: cw.MathExpression,
+	transfer_efficiency_avg: cw.MathExpression,
+	compression_throughput_avg: cw.MathExpression,
+	compression_throughput_sum: cw.MathExpression,
+) -> None:
+	"""
+	Add the overview and detail widgets of a section to the dashboard.
+
+	Args:
+	    dashboard: The CloudWatch Dashboard to add widgets to
+	    section_title: Title to display in the section header
+	    original_size_sum: Total original size expression
+	    compressed_size_sum: Total compressed size expression
+	    bytes_saved_sum: Total bytes saved expression
+	    compression_ratio_avg: Average compression ratio expression
+	    transfer_efficiency_avg: Average transfer efficiency expression
+	    compression_throughput_avg: Average compression throughput expression
+	    compression_throughput_sum: Aggregated compression throughput expression
+	"""
 	# Add header with title
 	dashboard.add_widgets(cw.TextWidget(markdown=f'## Overview of {section_title}', width=24, height=1))
 
-	# Add summary metrics as single value widgets
+	# Add summary metrics as single value widgets, one widget (and one GetMetricData request) per row
 	dashboard.add_widgets(
 		cw.SingleValueWidget(
-			title='Total Original Data Size',
-			metrics=[original_size_sum],
-			width=8,
-			height=4,
-			set_period_to_time_range=True,
-		),
-		cw.SingleValueWidget(
-			title='Total Compressed Data',
-			metrics=[compressed_size_sum],
-			width=8,
+			title='Data Size',
+			metrics=[original_size_sum, compressed_size_sum, bytes_saved_sum],
+			width=24,
 			height=4,
 			set_period_to_time_range=True,
-		),
-		cw.SingleValueWidget(
-			title='Total Bytes Saved', metrics=[bytes_saved_sum], width=8, height=4, set_period_to_time_range=True
-		),
+		)
 	)
 	dashboard.add_widgets(
 		cw.SingleValueWidget(
-			title='Average Compression Ratio',
-			metrics=[compression_ratio_avg],
-			width=8,
-			height=3,
-			set_period_to_time_range=True,
-		),
-		cw.SingleValueWidget(
-			title='Average Transfer Efficiency (%)',
-			metrics=[transfer_efficiency_avg],
-			width=8,
-			height=3,
-			set_period_to_time_range=True,
-		),
-		cw.SingleValueWidget(
-			title='Average Compression Throughput (MB/s)',
-			metrics=[compression_throughput_avg],
-			width=8,
+			title='Compression Performance',
+			metrics=[compression_ratio_avg, transfer_efficiency_avg, compression_throughput_avg],
+			width=24,
 			height=3,
 			set_period_to_time_range=True,
-		),
+		)
 	)
 
 	# Add header with title
@@ -9,25 +9,45 @@ This module provides the CloudFormation resources for creating DynamoDB tables:
 from aws_cdk import aws_dynamodb as ddb, RemovalPolicy
 
 
-def create_compression_settings_ddb_table(scope):
+def _autoscaled_billing(min_capacity: int, max_capacity: int) -> ddb.Billing:
+	"""
+	Provisioned billing with read and write capacity auto-scaled between the given bounds.
+
+	Args:
+		min_capacity: Minimum read and write capacity units
+		max_capacity: Maximum read and write capacity units
+
+	Returns:
+		ddb.Billing: The billing configuration
+	"""
+	return ddb.Billing.provisioned(
+		read_capacity=ddb.Capacity.autoscaled(min_capacity=min_capacity, max_capacity=max_capacity),
+		write_capacity=ddb.Capacity.autoscaled(min_capacity=min_capacity, max_capacity=max_capacity),
+	)
+
+
+def create_compression_settings_ddb_table(scope, min_capacity: int = 1, max_capacity: int = 20):
 	# Create the DynamoDB table for compression settings
+	# Reads and writes follow the source tasks' steady processing rate, so auto-scaled provisioned capacity is cheaper
 	return ddb.TableV2(
 		scope=scope,
 		id='compression-settings',
 		partition_key=ddb.Attribute(name='BucketPrefix', type=ddb.AttributeType.STRING),
-		billing=ddb.Billing.on_demand(),
+		billing=_autoscaled_billing(min_capacity, max_capacity),
 		removal_policy=RemovalPolicy.DESTROY,
 		point_in_time_recovery_specification=ddb.PointInTimeRecoverySpecification(point_in_time_recovery_enabled=True),
 	)
 
 
-def create_parameters_ddb_table(scope):
+def create_parameters_ddb_table(scope, min_capacity: int = 1, max_capacity: int = 5):
 	"""
 	Create a DynamoDB table for storing replication parameters.
 	This table replaces the SSM Parameters previously used for target region information.
 
 	Args:
 		scope: The CDK construct scope
+		min_capacity: Minimum read and write capacity units
+		max_capacity: Maximum read and write capacity units
 
 	Returns:
 		ddb.TableV2: The created DynamoDB table
@@ -36,7 +56,8 @@ def create_parameters_ddb_table(scope):
 		scope=scope,
 		id='replication-parameters',
 		partition_key=ddb.Attribute(name='ParameterName', type=ddb.AttributeType.STRING),
-		billing=ddb.Billing.on_demand(),
+		billing=_autoscaled_billing(min_capacity, max_capacity),
 		removal_policy=RemovalPolicy.DESTROY,
-		point_in_time_recovery_specification=ddb.PointInTimeRecoverySpecification(point_in_time_recovery_enabled=True),
+		# Contents are seeded from the replication configuration on every deployment, so there is nothing to recover
+		point_in_time_recovery_specification=ddb.PointInTimeRecoverySpecification(point_in_time_recovery_enabled=False),
 	)
@@ -5,7 +5,7 @@ This module provides functions for creating ECR repositories to store
 container images for source and target regions.
 """
 
-from aws_cdk import RemovalPolicy, aws_kms as kms, aws_ecr as ecr
+from aws_cdk import Duration, RemovalPolicy, aws_kms as kms, aws_ecr as ecr
 
 
 def create_ecr_repository(scope, ecr_id: str, kms_key: kms.Key) -> ecr.Repository:
@@ -27,7 +27,11 @@ def create_ecr_repository(scope, ecr_id: str, kms_key: kms.Key) -> ecr.Repositor
 	return ecr.Repository(
 		scope=scope,
 		id=f'ecr-{ecr_id}-repository',
-		lifecycle_rules=[ecr.LifecycleRule(max_image_count=10)],
+		lifecycle_rules=[
+			# Images left untagged when a tag is pushed again are never pulled, so drop them first
+			ecr.LifecycleRule(rule_priority=1, tag_status=ecr.TagStatus.UNTAGGED, max_image_age=Duration.days(1)),
+			ecr.LifecycleRule(rule_priority=2, tag_status=ecr.TagStatus.ANY, max_image_count=10),
+		],
 		removal_policy=RemovalPolicy.DESTROY,
 		empty_on_delete=True,
 		encryption=ecr.RepositoryEncryption.KMS,
@@ -5,6 +5,7 @@ This module provides functions for creating ECS resources,
 such as Fargate clusters and related components for container workloads.
 """
 
+from typing import List
 from constructs import Construct
 from aws_cdk import (
 	RemovalPolicy,
@@ -18,16 +19,43 @@ from aws_cdk import (
 from s3_cross_region_compressor.utils.ecs_utils import create_autoscaling_policy
 from cdk_nag import NagSuppressions
 
-def create_ecs_fargate_cluster(scope: Construct, vpc: ec2.Vpc) -> ecs.Cluster:
+
+def _capacity_provider_strategies(fargate_base: int, spot_weight: int) -> List[ecs.CapacityProviderStrategy]:
+	"""
+	Build the capacity provider strategy mixing a FARGATE base with FARGATE_SPOT.
+
+	The first fargate_base tasks run on FARGATE so that a mass Spot reclamation leaves them
+	running; tasks beyond the base are split 1:spot_weight between FARGATE and FARGATE_SPOT.
+
+	Args:
+		fargate_base: Number of tasks always placed on FARGATE (0 for FARGATE_SPOT only)
+		spot_weight: Relative weight of FARGATE_SPOT beyond the base
+
+	Returns:
+		List[ecs.CapacityProviderStrategy]: The capacity provider strategies
+	"""
+	if not fargate_base:
+		return [ecs.CapacityProviderStrategy(capacity_provider='FARGATE_SPOT', weight=1)]
+	return [
+		ecs.CapacityProviderStrategy(capacity_provider='FARGATE', weight=1, base=fargate_base),
+		ecs.CapacityProviderStrategy(capacity_provider='FARGATE_SPOT', weight=spot_weight),
+	]
+
+
+def create_ecs_fargate_cluster(
+	scope: Construct, vpc: ec2.Vpc, fargate_base: int = 1, spot_weight: int = 4
+) -> ecs.Cluster:
 	"""
 	Create an ECS Fargate cluster.
 
 	Creates an ECS cluster in the specified VPC with Fargate capacity
-	providers configured for cost optimization (using FARGATE_SPOT).
+	providers configured for cost optimization (mostly FARGATE_SPOT).
 
 	Args:
 		scope: The CDK construct scope
 		vpc: VPC to create the cluster in
+		fargate_base: Number of tasks always placed on FARGATE (default: 1, 0 for FARGATE_SPOT only)
+		spot_weight: Relative weight of FARGATE_SPOT beyond the base (default: 4)
 
 	Returns:
 		ecs.Cluster: The created ECS cluster
@@ -40,9 +68,7 @@ def create_ecs_fargate_cluster(scope: Construct, vpc: ec2.Vpc) -> ecs.Cluster:
 		container_insights_v2=ecs.ContainerInsights.ENHANCED,
 	)
 	ecs_cluster.apply_removal_policy(RemovalPolicy.DESTROY)
-	ecs_cluster.add_default_capacity_provider_strategy(
-		[ecs.CapacityProviderStrategy(capacity_provider='FARGATE_SPOT', weight=1)]
-	)
+	ecs_cluster.add_default_capacity_provider_strategy(_capacity_provider_strategies(fargate_base, spot_weight))
 	NagSuppressions.add_resource_suppressions(
     	ecs_cluster,
     	[
@@ -170,12 +196,19 @@ def create_ecs_service(
 	scaling_target_backlog_per_task: int = 30,
 	scale_out_cooldown: int = 60,
 	scale_in_cooldown: int = 120,
+	scale_out_datapoints_to_alarm: int = 1,
+	scale_in_datapoints_to_alarm: int = 5,
+	message_activity_window: int = 5,
+	fargate_base: int = 1,
+	spot_weight: int = 4,
+	max_healthy_percent: int = 200,
+	circuit_breaker_rollback: bool = True,
 ) -> ecs.FargateService:
 	"""
 	Create an ECS Fargate service with SQS-based auto-scaling.
 
 	Creates an ECS Fargate service with auto-scaling based on SQS queue depth,
-	using FARGATE_SPOT for cost optimization.
+	using mostly FARGATE_SPOT for cost optimization.
 
 	Args:
 		id: Identifier for the service
@@ -188,6 +221,13 @@ def create_ecs_service(
 		scaling_target_backlog_per_task: Target number of messages per task (default: 10)
 		scale_out_cooldown: Cooldown period for scaling out in seconds (default: 60)
 		scale_in_cooldown: Cooldown period for scaling in in seconds (default: 300)
+		scale_out_datapoints_to_alarm: Consecutive minutes of high backlog needed to scale out (default: 1)
+		scale_in_datapoints_to_alarm: Consecutive minutes of low backlog needed to scale in (default: 5)
+		message_activity_window: Minutes without queue activity before scaling to zero (default: 5)
+		fargate_base: Number of tasks always placed on FARGATE (default: 1, 0 for FARGATE_SPOT only)
+		spot_weight: Relative weight of FARGATE_SPOT beyond the base (default: 4)
+		max_healthy_percent: Upper limit of running tasks during a deployment, in percent of the desired count (default: 200)
+		circuit_breaker_rollback: Roll back to the last completed deployment when the circuit breaker trips (default: True)
 
 	Returns:
 		ecs.FargateService: The created ECS service
@@ -200,8 +240,12 @@ def create_ecs_service(
 		task_definition=task_definition,
 		assign_public_ip=False,
 		security_groups=[security_group],
-		capacity_provider_strategies=[ecs.CapacityProviderStrategy(capacity_provider='FARGATE_SPOT', weight=1)],
+		capacity_provider_strategies=_capacity_provider_strategies(fargate_base, spot_weight),
 		min_healthy_percent=100,
+		max_healthy_percent=max_healthy_percent,
+		# Stop deployments whose tasks keep failing instead of retrying them indefinitely
+		circuit_breaker=ecs.DeploymentCircuitBreaker(enable=True, rollback=circuit_breaker_rollback),
+		deployment_controller=ecs.DeploymentController(type=ecs.DeploymentControllerType.ECS),
 		propagate_tags=ecs.PropagatedTagSource.SERVICE,
 	)
 	ecs_service.apply_removal_policy(RemovalPolicy.DESTROY)
@@ -217,6 +261,9 @@ def create_ecs_service(
 		scaling_target_backlog_per_task=scaling_target_backlog_per_task,
 		scale_out_cooldown=scale_out_cooldown,
 		scale_in_cooldown=scale_in_cooldown,
+		scale_out_datapoints_to_alarm=scale_out_datapoints_to_alarm,
+		scale_in_datapoints_to_alarm=scale_in_datapoints_to_alarm,
+		message_activity_window=message_activity_window,
 	)
 
 	return ecs_service
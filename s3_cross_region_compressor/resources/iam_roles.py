@@ -95,7 +95,7 @@ def create_s3_replication_role(scope: Construct, role_id: str, outbound_bucket_n
 		iam.PolicyStatement(
 			actions=['kms:Decrypt'],
 			resources=[f'arn:aws:kms:{scope.region}:{scope.account}:key/*'],
-			conditions={'ForAnyValue:StringLike': {'kms:ResourceAliases': 'alias/outbound'}},
+			conditions={'ForAnyValue:StringEquals': {'kms:ResourceAliases': 'alias/outbound'}},
 		)
 	)
 
@@ -6,10 +6,12 @@ such as SQS queues with appropriate security settings.
 """
 
 from constructs import Construct
-from aws_cdk import Duration, RemovalPolicy, aws_sqs as sqs, aws_kms as kms
+from aws_cdk import Duration, RemovalPolicy, Stack, aws_sqs as sqs, aws_kms as kms
 
 
-def create_sqs_queue(scope: Construct, kms_key: kms.Key, sqs_id: str, visibility_timeout: int = 300) -> sqs.Queue:
+def create_sqs_queue(
+	scope: Construct, kms_key: kms.Key, sqs_id: str, visibility_timeout: int = 300, receive_wait_time: int = 20
+) -> sqs.Queue:
 	"""
 	Create an SQS queue with KMS encryption and dead-letter queue.
 
@@ -21,15 +23,25 @@ def create_sqs_queue(scope: Construct, kms_key: kms.Key, sqs_id: str, visibility
 	    scope: The CDK construct scope
 	    kms_key: The KMS key to use for encryption
 	    sqs_id: Identifier for the SQS queue
+	    visibility_timeout: Visibility timeout in seconds (default: 300)
+	    receive_wait_time: Default long polling wait in seconds for receives that don't set one (default: 20)
 
 	Returns:
 	    sqs.Queue: The created SQS queue
 	"""
+	# Referenced by ARN rather than through the queue construct, which itself refers to the DLQ
+	source_queue = sqs.Queue.from_queue_arn(
+		scope, f'{sqs_id}-sqs-dlq-source', Stack.of(scope).format_arn(service='sqs', resource=sqs_id)
+	)
 	sqs_dlq_queue = sqs.Queue(
 		scope=scope,
 		id=f'{sqs_id}-sqs-dlq',
 		queue_name=f'{sqs_id}-dlq',
 		visibility_timeout=Duration.seconds(visibility_timeout),
+		receive_message_wait_time=Duration.seconds(receive_wait_time),
+		redrive_allow_policy=sqs.RedriveAllowPolicy(
+			redrive_permission=sqs.RedrivePermission.BY_QUEUE, source_queues=[source_queue]
+		),
 		encryption=sqs.QueueEncryption.KMS,
 		encryption_master_key=kms_key,
 		enforce_ssl=True,
@@ -40,6 +52,7 @@ def create_sqs_queue(scope: Construct, kms_key: kms.Key, sqs_id: str, visibility
 		scope=scope,
 		id=f'{sqs_id}-sqs',
 		visibility_timeout=Duration.seconds(visibility_timeout),
+		receive_message_wait_time=Duration.seconds(receive_wait_time),
 		queue_name=sqs_id,
 		dead_letter_queue=sqs.DeadLetterQueue(
 			max_receive_count=5,
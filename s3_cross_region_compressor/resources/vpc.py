@@ -6,7 +6,7 @@ such as VPCs with private subnets and VPC endpoints.
 """
 
 from constructs import Construct
-from aws_cdk import aws_ec2 as ec2
+from aws_cdk import Stack, aws_ec2 as ec2, aws_iam as iam
 from cdk_nag import NagSuppressions
 
 def create_vpc_endpoints(scope: Construct, vpc: ec2.Vpc) -> None:
@@ -15,6 +15,8 @@ def create_vpc_endpoints(scope: Construct, vpc: ec2.Vpc) -> None:
 
 	Creates gateway endpoints for S3 and DynamoDB, and interface endpoints
 	for other AWS services based on whether the region is a source or not.
+	Interface endpoints are shared by every service of the VPC and only accept
+	requests from principals of this account.
 
 	Args:
 	    scope: The CDK construct scope
@@ -43,6 +45,14 @@ def create_vpc_endpoints(scope: Construct, vpc: ec2.Vpc) -> None:
 			service=endpoint_type,
 			subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED),
 			)
+		endpoint.add_to_policy(
+			iam.PolicyStatement(
+				principals=[iam.AnyPrincipal()],
+				actions=['*'],
+				resources=['*'],
+				conditions={'StringEquals': {'aws:PrincipalAccount': Stack.of(scope).account}},
+			)
+		)
 		if endpoint.connections and endpoint.connections.security_groups:
 			for sg in endpoint.connections.security_groups:
 				NagSuppressions.add_resource_suppressions(
@@ -31,7 +31,7 @@ from s3_cross_region_compressor.source_service_stack import (
 )
 
 from s3_cross_region_compressor.resources.cost_estimator import create_lambda
-from s3_cross_region_compressor.resources.dashboard import create_compression_dashboard
+from s3_cross_region_compressor.resources.dashboard import create_compression_dashboard, get_source_regions
 
 
 class SourceStackProps:
@@ -154,6 +154,15 @@ class SourceStack(NestedStack):
 
 		# Create DynamoDB table for replication parameters
 		self.replication_parameters_table = create_parameters_ddb_table(self)
+		NagSuppressions.add_resource_suppressions(
+			self.replication_parameters_table,
+			[
+				{
+					'id': 'AwsSolutions-DDB3',
+					'reason': 'Replication parameters are seeded from the replication configuration on every deployment',
+				}
+			],
+		)
 
 		# Seed the parameters table with data from replication_config.json
 		seed_parameters_table(self, self.replication_parameters_table, props.replication_config, props.stack_name)
@@ -191,8 +200,12 @@ class SourceStack(NestedStack):
 
 		cost_estimator_lambda = create_lambda(self)
 
-		# Create CloudWatch Dashboard to visualize compression metrics
-		self.compression_dashboard = create_compression_dashboard(scope=self, stack_name=props.stack_name)
+		# Create the CloudWatch Dashboard visualizing compression metrics of all source regions,
+		# in the first source region only
+		if self.region == get_source_regions(props.replication_config)[0]:
+			self.compression_dashboard = create_compression_dashboard(
+				scope=self, stack_name=props.stack_name, replication_config=props.replication_config
+			)
 
 		for config_id, config in enumerate(props.replication_config):
 			if config['source']['region'] == self.region:
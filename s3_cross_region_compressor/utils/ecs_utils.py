@@ -54,6 +54,23 @@ def create_sqs_queue_in_flight_messages_metric(
 	)
 
 
+def create_sqs_queue_sent_messages_metric(
+	sqs_queue: sqs.Queue, statistic: str = 'Sum', period_sec: int = 60
+) -> cw.Metric:
+	"""
+	Create a CloudWatch metric for messages sent to an SQS queue.
+
+	Args:
+	    sqs_queue: The SQS queue to monitor
+	    statistic: The statistic to use (default: "Sum")
+	    period_sec: The period in seconds (default: 60)
+
+	Returns:
+	    A CloudWatch metric for the number of messages sent to the queue
+	"""
+	return sqs_queue.metric_number_of_messages_sent(statistic=statistic, period=Duration.seconds(period_sec))
+
+
 def create_running_task_count_metric(ecs_cluster: ecs.Cluster, ecs_service: ecs.FargateService) -> cw.Metric:
 	"""
 	Create a CloudWatch metric for running ECS task count.
@@ -106,18 +123,22 @@ def create_queue_empty_but_messages_in_flight(
 	"""
 	Create a math expression that detects when queue is empty, but there are messages in flight.
 	This accommodate situations where the processing is too fast and the queue is fully in flight.
+	Messages sent during the period also count as activity, as they may be received and deleted
+	between two samples of the queue depth.
 
 	Args:
 	    sqs_queue: The SQS queue to monitor
 
 	Returns:
-	    A math expression that equals 1 when queue has no visible messages and also no in flight processing.
+	    A math expression that equals 1 when queue has no visible messages, no in flight processing
+	    and received no messages.
 	"""
 	return cw.MathExpression(
-		expression='IF( m1 + m2 == 0, 1, 0)',  # If there are no messages in the queue (visible or otherwise), return 1 and trigger scale to 0 action.
+		expression='IF( m1 + m2 + FILL(m3,0) == 0, 1, 0)',  # If there are no messages in the queue (visible or otherwise) and none arrived, return 1 and trigger scale to 0 action.
 		using_metrics={
 			'm1': create_sqs_queue_visible_messages_metric(sqs_queue),
 			'm2': create_sqs_queue_in_flight_messages_metric(sqs_queue),
+			'm3': create_sqs_queue_sent_messages_metric(sqs_queue),
 		},
 		label='Queue with messages and zero tasks',
 		period=Duration.seconds(60),
@@ -183,6 +204,7 @@ def create_high_backlog_per_task_alarm(
 	id: str,
 	backlog_per_task: cw.MathExpression,
 	scaling_target_backlog_per_task: int,
+	datapoints_to_alarm: int = 1,
 ) -> cw.Alarm:
 	"""
 	Create an alarm that triggers when backlog per task is higher than threshold.
@@ -191,6 +213,7 @@ def create_high_backlog_per_task_alarm(
 	    scope: The CDK construct scope
 	    backlog_per_task: Math expression for backlog per task
 	    scaling_target_backlog_per_task: Target backlog per task
+	    datapoints_to_alarm: Consecutive breaching minutes needed to scale out (default: 1)
 
 	Returns:
 	    The created CloudWatch alarm
@@ -201,18 +224,22 @@ def create_high_backlog_per_task_alarm(
 		alarm_name=f'{id}-HighBacklogPerTaskAlarm',
 		comparison_operator=cw.ComparisonOperator.GREATER_THAN_THRESHOLD,
 		threshold=scaling_target_backlog_per_task,
-		evaluation_periods=1,
+		evaluation_periods=datapoints_to_alarm,
+		datapoints_to_alarm=datapoints_to_alarm,
 		metric=backlog_per_task,
 	)
 
 
-def create_queue_empty_alarm(scope: Construct, id: str, queue_empty_metric: cw.MathExpression) -> cw.Alarm:
+def create_queue_empty_alarm(
+	scope: Construct, id: str, queue_empty_metric: cw.MathExpression, evaluation_periods: int = 5
+) -> cw.Alarm:
 	"""
 	Create an alarm that triggers when queue is empty.
 
 	Args:
 	    scope: The CDK construct scope
 	    queue_empty_metric: Math expression that equals 1 when queue is completely empty (no visible or in-flight messages)
+	    evaluation_periods: Consecutive idle minutes before the alarm triggers (default: 5)
 
 	Returns:
 	    The created CloudWatch alarm
@@ -223,13 +250,13 @@ def create_queue_empty_alarm(scope: Construct, id: str, queue_empty_metric: cw.M
 		alarm_name=f'{id}-QueueEmptyAlarm',
 		comparison_operator=cw.ComparisonOperator.GREATER_THAN_THRESHOLD,
 		threshold=0,
-		evaluation_periods=2,  # Sustained empty queue for 2 periods
+		evaluation_periods=evaluation_periods,  # Sustained idle queue, keeping tasks warm for sparse arrivals
 		metric=queue_empty_metric,
 	)
 
 
 def create_low_backlog_multiple_tasks_alarm(
-	scope: Construct, id: str, low_backlog_and_multiple_tasks: cw.MathExpression
+	scope: Construct, id: str, low_backlog_and_multiple_tasks: cw.MathExpression, datapoints_to_alarm: int = 5
 ) -> cw.Alarm:
 	"""
 	Create an alarm that triggers when backlog is low but multiple tasks are running.
@@ -237,6 +264,7 @@ def create_low_backlog_multiple_tasks_alarm(
 	Args:
 	    scope: The CDK construct scope
 	    low_backlog_and_multiple_tasks: Math expression for low backlog but multiple tasks
+	    datapoints_to_alarm: Consecutive breaching minutes needed to scale in (default: 5)
 
 	Returns:
 	    The created CloudWatch alarm
@@ -247,7 +275,8 @@ def create_low_backlog_multiple_tasks_alarm(
 		alarm_name=f'{id}-LowBacklogMultipleTasksAlarm',
 		comparison_operator=cw.ComparisonOperator.GREATER_THAN_THRESHOLD,
 		threshold=0,  # Alarm when expression equals 1
-		evaluation_periods=1,  # Sustained for 1 periods
+		evaluation_periods=datapoints_to_alarm,  # Sustained for every evaluated period
+		datapoints_to_alarm=datapoints_to_alarm,
 		metric=low_backlog_and_multiple_tasks,
 	)
 
@@ -401,6 +430,7 @@ def configure_scale_out_on_high_backlog(
 	running_task_count: cw.Metric,
 	scaling_target_backlog_per_task: int,
 	scale_out_cooldown: int,
+	scale_out_datapoints_to_alarm: int = 1,
 ) -> None:
 	"""
 	Configure scaling out when backlog per task is high.
@@ -412,6 +442,7 @@ def configure_scale_out_on_high_backlog(
 	    running_task_count: Metric for running task count
 	    scaling_target_backlog_per_task: Target backlog per task
 	    scale_out_cooldown: Cooldown period in seconds
+	    scale_out_datapoints_to_alarm: Consecutive breaching minutes needed to scale out (default: 1)
 	"""
 	backlog_per_task = create_backlog_per_task_expression(
 		sqs_queue, running_task_count, scaling_target_backlog_per_task
@@ -421,6 +452,7 @@ def configure_scale_out_on_high_backlog(
 		id=id,
 		backlog_per_task=backlog_per_task,
 		scaling_target_backlog_per_task=scaling_target_backlog_per_task,
+		datapoints_to_alarm=scale_out_datapoints_to_alarm,
 	)
 	action = create_scale_out_action(scope, scaling, scale_out_cooldown, scaling_target_backlog_per_task)
 	alarm.add_alarm_action(cw_actions.ApplicationScalingAction(action))
@@ -432,6 +464,7 @@ def configure_scale_to_zero_on_empty_queue(
 	scaling: appscaling.ScalableTarget,
 	sqs_queue: sqs.Queue,
 	scale_in_cooldown: int,
+	message_activity_window: int = 5,
 ) -> None:
 	"""
 	Configure scaling to zero when queue is empty.
@@ -441,9 +474,12 @@ def configure_scale_to_zero_on_empty_queue(
 	    scaling: The scalable target
 	    sqs_queue: The SQS queue to monitor
 	    scale_in_cooldown: Cooldown period in seconds
+	    message_activity_window: Minutes without queue activity before scaling to zero (default: 5)
 	"""
 	queue_empty_metric = create_queue_empty_but_messages_in_flight(sqs_queue)
-	alarm = create_queue_empty_alarm(scope=scope, id=id, queue_empty_metric=queue_empty_metric)
+	alarm = create_queue_empty_alarm(
+		scope=scope, id=id, queue_empty_metric=queue_empty_metric, evaluation_periods=message_activity_window
+	)
 	action = create_scale_to_zero_action(scope, scaling, scale_in_cooldown)
 	alarm.add_alarm_action(cw_actions.ApplicationScalingAction(action))
 
@@ -456,6 +492,7 @@ def configure_scale_in_on_low_backlog(
 	running_task_count: cw.Metric,
 	scaling_target_backlog_per_task: int,
 	scale_in_cooldown: int,
+	scale_in_datapoints_to_alarm: int = 5,
 ) -> None:
 	"""
 	Configure scaling in when backlog is low.
@@ -467,11 +504,17 @@ def configure_scale_in_on_low_backlog(
 	    running_task_count: Metric for running task count
 	    scaling_target_backlog_per_task: Target backlog per task
 	    scale_in_cooldown: Cooldown period in seconds
+	    scale_in_datapoints_to_alarm: Consecutive breaching minutes needed to scale in (default: 5)
 	"""
 	expression = create_low_backlog_and_multiple_tasks_expression(
 		sqs_queue, running_task_count, scaling_target_backlog_per_task
 	)
-	alarm = create_low_backlog_multiple_tasks_alarm(scope=scope, id=id, low_backlog_and_multiple_tasks=expression)
+	alarm = create_low_backlog_multiple_tasks_alarm(
+		scope=scope,
+		id=id,
+		low_backlog_and_multiple_tasks=expression,
+		datapoints_to_alarm=scale_in_datapoints_to_alarm,
+	)
 	action = create_scale_in_action(scope, scaling, scale_in_cooldown)
 	alarm.add_alarm_action(cw_actions.ApplicationScalingAction(action))
 
@@ -487,13 +530,16 @@ def create_autoscaling_policy(
 	scaling_target_backlog_per_task: int = 60,
 	scale_out_cooldown: int = 60,
 	scale_in_cooldown: int = 90,
+	scale_out_datapoints_to_alarm: int = 1,
+	scale_in_datapoints_to_alarm: int = 5,
+	message_activity_window: int = 5,
 ):
 	"""
 	Create a comprehensive auto-scaling policy for an ECS service based on SQS queue depth.
 
 	This configures several scaling policies:
 	1. Scale out when backlog exceeds target per task
-	2. Scale to zero when queue is empty
+	2. Scale to zero when queue has been idle for the message activity window
 	3. Scale from zero when messages appear but no tasks are running
 	4. Scale in when backlog is low but multiple tasks are running
 
@@ -508,6 +554,10 @@ def create_autoscaling_policy(
 	    scaling_target_backlog_per_task: Target backlog per task (default: 60)
 	    scale_out_cooldown: Cooldown period for scaling out in seconds (default: 60)
 	    scale_in_cooldown: Cooldown period for scaling in in seconds (default: 90)
+	    scale_out_datapoints_to_alarm: Consecutive minutes of high backlog needed to scale out (default: 1)
+	    scale_in_datapoints_to_alarm: Consecutive minutes of low backlog needed to scale in by one task (default: 5)
+	    message_activity_window: Minutes without queued, in-flight or newly sent messages before scaling to zero,
+	        keeping a task warm for sparse arrivals (default: 5)
 	"""
 	# Create scalable target
 	scaling = appscaling.ScalableTarget(
@@ -534,10 +584,16 @@ def create_autoscaling_policy(
 		running_task_count=running_task_count,
 		scaling_target_backlog_per_task=scaling_target_backlog_per_task,
 		scale_out_cooldown=scale_out_cooldown,
+		scale_out_datapoints_to_alarm=scale_out_datapoints_to_alarm,
 	)
 
 	configure_scale_to_zero_on_empty_queue(
-		scope=scope, id=id, scaling=scaling, sqs_queue=sqs_queue, scale_in_cooldown=scale_in_cooldown
+		scope=scope,
+		id=id,
+		scaling=scaling,
+		sqs_queue=sqs_queue,
+		scale_in_cooldown=scale_in_cooldown,
+		message_activity_window=message_activity_window,
 	)
 
 	configure_scale_in_on_low_backlog(
@@ -548,4 +604,5 @@ def create_autoscaling_policy(
 		running_task_count=running_task_count,
 		scaling_target_backlog_per_task=scaling_target_backlog_per_task,
 		scale_in_cooldown=scale_in_cooldown,
+		scale_in_datapoints_to_alarm=scale_in_datapoints_to_alarm,
 	)
@@ -5,16 +5,22 @@ This module provides helper functions for working with S3 buckets,
 such as adding event notifications and creating bucket references.
 """
 
-from typing import Optional
+from typing import Dict, List, Optional
 from constructs import Construct
-from aws_cdk import aws_s3 as s3, aws_s3_notifications as s3n, aws_sqs as sqs
+from aws_cdk import (
+	aws_events as events,
+	aws_events_targets as targets,
+	aws_s3 as s3,
+	aws_s3_notifications as s3n,
+	aws_sqs as sqs,
+)
 
 
-def build_notification_filter(prefix: str, suffix: str) -> Optional[s3.NotificationKeyFilter]:
+def build_object_key_filter(prefix: str, suffix: str) -> Optional[List[Dict[str, str]]]:
 	"""
-	Build an S3 notification key filter based on prefix and suffix values.
+	Build an EventBridge pattern filter on object keys based on prefix and suffix values.
 
-	Creates a filter for S3 event notifications to limit which objects
+	Creates a filter for S3 events routed through EventBridge to limit which objects
 	trigger notifications based on their key prefix and/or suffix.
 
 	Args:
@@ -22,18 +28,17 @@ def build_notification_filter(prefix: str, suffix: str) -> Optional[s3.Notificat
 	    suffix: The suffix to filter objects (can be empty)
 
 	Returns:
-	    NotificationKeyFilter if either prefix or suffix is set, None otherwise
+	    Content filter list for the object key if either prefix or suffix is set, None otherwise
 	"""
-	if not prefix and not suffix:
-		return None
-
-	filter_args = {}
+	if prefix and suffix:
+		# Both must match, which a single wildcard expresses; its special characters are escaped
+		escape = str.maketrans({'\\': '\\\\', '*': '\\*'})
+		return [{'wildcard': f'{prefix.translate(escape)}*{suffix.translate(escape)}'}]
 	if prefix:
-		filter_args['prefix'] = prefix
+		return [{'prefix': prefix}]
 	if suffix:
-		filter_args['suffix'] = suffix
-
-	return s3.NotificationKeyFilter(**filter_args) if filter_args else None
+		return [{'suffix': suffix}]
+	return None
 
 
 def add_source_bucket_notification(
@@ -44,10 +49,12 @@ def add_source_bucket_notification(
 	suffix_filter: str,
 ) -> None:
 	"""
-	Add an S3 event notification to a bucket for OBJECT_CREATED events.
+	Route a bucket's Object Created events to an SQS queue through EventBridge.
 
-	Configures a source S3 bucket to send event notifications to an SQS queue
-	when objects are created, optionally filtered by prefix and/or suffix.
+	Enables EventBridge notifications on the source S3 bucket and adds a rule
+	sending its Object Created events to the SQS queue, optionally filtered by
+	prefix and/or suffix. Unlike S3 event notifications, several rules on the
+	same bucket may have overlapping filters.
 
 	Args:
 	    scope: The CDK construct scope
@@ -58,15 +65,19 @@ def add_source_bucket_notification(
 	"""
 	# Create the bucket reference
 	source_bucket = s3.Bucket.from_bucket_name(scope, 'source_bucket', bucket_name)
-
-	notification_filter = build_notification_filter(prefix_filter, suffix_filter)
-
-	if notification_filter:
-		source_bucket.add_event_notification(
-			s3.EventType.OBJECT_CREATED, s3n.SqsDestination(sqs_queue), notification_filter
-		)
-	else:
-		source_bucket.add_event_notification(s3.EventType.OBJECT_CREATED, s3n.SqsDestination(sqs_queue))
+	source_bucket.enable_event_bridge_notification()
+
+	detail = {'bucket': {'name': [bucket_name]}}
+	key_filter = build_object_key_filter(prefix_filter, suffix_filter)
+	if key_filter:
+		detail['object'] = {'key': key_filter}
+
+	events.Rule(
+		scope,
+		'source_bucket_rule',
+		event_pattern=events.EventPattern(source=['aws.s3'], detail_type=['Object Created'], detail=detail),
+		targets=[targets.SqsQueue(sqs_queue)],
+	)
 
 
 def add_inbound_bucket_notification(
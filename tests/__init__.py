@@ -0,0 +1,8 @@
+"""
+Tests for the CDK application.
+
+This package defines the cdk_tests namespace.
+"""
+
+# Define a unique package name to avoid import conflicts
+__package__ = 'cdk_tests'
@@ -0,0 +1,94 @@
+"""
+Unit tests for the compression dashboard of the CDK application.
+"""
+
+import json
+
+import pytest
+
+aws_cdk = pytest.importorskip('aws_cdk')
+from aws_cdk.assertions import Template  # noqa: E402
+
+# Import the module under test
+from s3_cross_region_compressor.resources.dashboard import create_compression_dashboard  # noqa: E402
+
+
+REPLICATION_CONFIG = [
+	{
+		'source': {'region': 'us-east-1', 'bucket': 'source-bucket-1', 'prefix_filter': 'data'},
+		'destinations': [
+			{'region': 'eu-west-1', 'bucket': 'target-bucket-1'},
+			{'region': 'us-west-2', 'bucket': 'target-bucket-2'},
+		],
+	},
+	{
+		'source': {'region': 'us-west-2', 'bucket': 'source-bucket-2'},
+		'destinations': [{'region': 'eu-west-1', 'bucket': 'target-bucket-3'}],
+	},
+]
+
+
+def synth_dashboard_stack(replication_config):
+	"""Synthesize a stack holding only the compression dashboard."""
+	app = aws_cdk.App()
+	stack = aws_cdk.Stack(app, 'DashboardStack', env=aws_cdk.Environment(account='123456789012', region='us-east-1'))
+	create_compression_dashboard(stack, 'TestStack', replication_config)
+	return Template.from_stack(stack)
+
+
+def dashboard_widgets(template):
+	"""Decode the widgets of the synthesized dashboard body, with tokens replaced by placeholders."""
+	dashboard = next(iter(template.find_resources('AWS::CloudWatch::Dashboard').values()))
+	parts = dashboard['Properties']['DashboardBody']['Fn::Join'][1]
+	return json.loads(''.join(part if isinstance(part, str) else 'TOKEN' for part in parts))['widgets']
+
+
+def metric_ids(widget):
+	"""List the ids of the metrics read by a metric widget."""
+	return [metric[-1]['id'] for metric in widget['properties']['metrics'] if 'id' in metric[-1]]
+
+
+class TestCompressionDashboard:
+	"""Tests for the compression dashboard."""
+
+	def test_dashboard_synthesizes_with_listed_sources(self):
+		"""Test the dashboard synthesizes when the all-sources section lists its metrics."""
+		# Given: A replication configuration with sources in two regions
+
+		# When: We synthesize a stack with the dashboard
+		template = synth_dashboard_stack(REPLICATION_CONFIG)
+
+		# Then: A single dashboard should be created
+		template.resource_count_is('AWS::CloudWatch::Dashboard', 1)
+
+	def test_dashboard_synthesizes_without_sources(self):
+		"""Test the dashboard synthesizes with SEARCH expressions when no sources are configured."""
+		# Given: No replication configuration
+
+		# When: We synthesize a stack with the dashboard
+		template = synth_dashboard_stack(None)
+
+		# Then: A single dashboard should be created
+		template.resource_count_is('AWS::CloudWatch::Dashboard', 1)
+
+	def test_overview_rows_share_a_widget_without_id_collisions(self):
+		"""Test each overview row is one widget whose listed metrics all have distinct ids."""
+		# Given: A replication configuration with listed sources
+
+		# When: We synthesize a stack with the dashboard
+		widgets = dashboard_widgets(synth_dashboard_stack(REPLICATION_CONFIG))
+
+		# Then: Each overview row should show its three expressions in a single widget, in both sections
+		metric_widgets = [widget for widget in widgets if widget['type'] == 'metric']
+		for title in ('Data Size', 'Compression Performance'):
+			rows = [widget for widget in metric_widgets if widget['properties']['title'] == title]
+			assert len(rows) == 2
+			for widget in rows:
+				metrics = widget['properties']['metrics']
+				assert sum(isinstance(metric[0], dict) and 'expression' in metric[0] for metric in metrics) == 3
+
+		# And no two metrics of a widget should share an id; the first section lists its metrics
+		assert metric_ids(metric_widgets[0])
+		for widget in metric_widgets:
+			ids = metric_ids(widget)
+			assert len(ids) == len(set(ids))